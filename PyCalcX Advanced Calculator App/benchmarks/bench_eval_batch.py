@@ -0,0 +1,66 @@
+"""Compare row-by-row Calculator.eval against Calculator.eval_batch.
+
+Run from the app folder:
+
+    python benchmarks/bench_eval_batch.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pycalcx.calculator import Calculator  # noqa: E402
+
+EXPR = "sqrt(x**2 + y**2) * sin(x) + log(y + 1) / pi"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    xs = [rng.uniform(0, 10) for _ in range(args.rows)]
+    ys = [rng.uniform(0, 10) for _ in range(args.rows)]
+    calc = Calculator()
+
+    start = time.perf_counter()
+    rows = []
+    for x, y in zip(xs, ys):
+        calc.vars["x"] = x
+        calc.vars["y"] = y
+        rows.append(calc.eval(EXPR)[0])
+    row_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = calc.eval_batch(EXPR, {"x": xs, "y": ys})
+    list_time = time.perf_counter() - start
+
+    columns = {"x": np.asarray(xs), "y": np.asarray(ys)}
+    start = time.perf_counter()
+    calc.eval_batch(EXPR, columns)
+    array_time = time.perf_counter() - start
+
+    worst = max(abs(a - b) for a, b in zip(rows, batch))
+    print(f"expression:           {EXPR}")
+    print(f"rows:                 {args.rows}")
+    for label, elapsed in (
+        ("row loop", row_time),
+        ("eval_batch (lists)", list_time),
+        ("eval_batch (arrays)", array_time),
+    ):
+        print(
+            f"{label + ':':<22}{elapsed:.4f}s ({args.rows / elapsed:,.0f} rows/s, "
+            f"{row_time / elapsed:.1f}x)"
+        )
+    print(f"max abs diff:         {worst:.2e}")
+
+
+if __name__ == "__main__":
+    main()
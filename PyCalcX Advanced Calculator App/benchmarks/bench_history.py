@@ -0,0 +1,74 @@
+"""Memory used by Calculator history for long sessions.
+
+Compares the old unbounded list of (text, value) tuples with the History
+ring buffer, both holding every entry and capped with spill to disk. Run
+from the app folder:
+
+    python benchmarks/bench_history.py --entries 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pycalcx.history import UNSET, History, HistoryEntry  # noqa: E402
+
+
+def session(n):
+    for i in range(n):
+        yield f"x{i % 100} = {i} * 2", float(i * 2), f"x{i % 100}", float(i * 2 - 200) if i >= 100 else UNSET
+
+
+def measure(label, n, fill):
+    texts = list(session(n))  # the texts exist either way; don't count them
+    tracemalloc.start()
+    start = time.perf_counter()
+    keep = fill(texts)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28}{current / 2**20:9.1f} MiB  {current / n:7.1f} B/entry  {elapsed:6.2f}s")
+    return keep
+
+
+def as_list(rows):
+    history = []
+    for text, value, _, _ in rows:
+        history.append((text, value))
+    return history
+
+
+def as_history(maxlen, spill_path=None):
+    def fill(rows):
+        history = History(maxlen, spill_path)
+        for text, value, var, prev in rows:
+            history.record(HistoryEntry(text, value, var, prev))
+        history.close()
+        return history
+
+    return fill
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--cap", type=int, default=10_000)
+    args = parser.parse_args()
+
+    n = args.entries
+    print(f"{n:,} assignments; sizes exclude the expression strings themselves")
+    measure("list of tuples (unbounded)", n, as_list)
+    measure(f"History(maxlen={n:,})", n, as_history(n))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "spill.jsonl")
+        measure(f"History(maxlen={args.cap:,}) + spill", n, as_history(args.cap, path))
+        print(f"spill file: {os.path.getsize(path) / 2**20:.1f} MiB")
+    measure(f"History(maxlen={args.cap:,})", n, as_history(args.cap))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Load test for CalculatorService.
+
+Simulates `--sessions` users sending a mix of assignments and expressions,
+through the thread pool (`submit`) or asyncio (`evaluate_async`), and
+reports throughput and p50/p99 request latency. Latency is measured from
+submission to completion, so it includes time spent queued. Run from the
+app folder:
+
+    python benchmarks/bench_service.py --requests 50000 --sessions 500 --mode async
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pycalcx.service import CalculatorService  # noqa: E402
+
+REQUESTS = [
+    "x = {n}",
+    "y = x * 2 + {n}",
+    "sqrt(x**2 + y**2)",
+    "sin(x) * cos(y) + {n}",
+    "x / (y + 1)",
+    "floor(y / 3) % 7",
+]
+
+
+def workload(count, sessions, seed):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        session = f"user{rnd.randrange(sessions)}"
+        yield session, rnd.choice(REQUESTS).format(n=rnd.randrange(100))
+
+
+def run_threads(svc, work, inflight):
+    latencies = []
+    pending = []
+    for session, text in work:
+        start = time.perf_counter()
+        future = svc.submit(session, text)
+        future.add_done_callback(lambda f, start=start: latencies.append(time.perf_counter() - start))
+        pending.append(future)
+        if len(pending) >= inflight:
+            for f in pending:
+                f.exception()
+            pending.clear()
+    for f in pending:
+        f.exception()
+    return latencies
+
+
+def run_async(svc, work, inflight):
+    latencies = []
+
+    async def one(session, text, limit):
+        async with limit:
+            start = time.perf_counter()
+            try:
+                await svc.evaluate_async(session, text)
+            except Exception:
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    async def main():
+        limit = asyncio.Semaphore(inflight)
+        await asyncio.gather(*(one(session, text, limit) for session, text in work))
+
+    asyncio.run(main())
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--max-sessions", type=int, default=1000, help="service session limit (LRU)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--inflight", type=int, default=64, help="requests outstanding at once")
+    parser.add_argument("--mode", choices=("threads", "async"), default="threads")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    work = list(workload(args.requests, args.sessions, args.seed))
+    with CalculatorService(max_sessions=args.max_sessions, workers=args.workers) as svc:
+        start = time.perf_counter()
+        runner = run_async if args.mode == "async" else run_threads
+        latencies = runner(svc, work, args.inflight)
+        elapsed = time.perf_counter() - start
+        stats = svc.stats()
+
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies)} requests over {args.sessions} sessions ({args.mode}, {args.workers} workers)")
+    print(f"throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency:    p50 {cuts[49] * 1e3:.3f} ms  p99 {cuts[98] * 1e3:.3f} ms  max {max(latencies) * 1e3:.3f} ms")
+    print(
+        f"sessions:   {stats['sessions']} live, {stats['evicted']} evicted; "
+        f"cache {stats['cache_hits']} hits / {stats['cache_misses']} misses"
+    )
+
+
+if __name__ == "__main__":
+    main()
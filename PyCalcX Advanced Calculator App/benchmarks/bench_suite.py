@@ -0,0 +1,144 @@
+"""Benchmark suite for Calculator.eval across its main code paths.
+
+Each workload evaluates a fixed list of lines round-robin and reports
+evaluations per second (best of `--repeat` runs) plus, from tracemalloc,
+the peak memory one evaluation allocates and the number of memory blocks
+still held per evaluation once a run is over (history, variables, cache).
+Results can be saved as JSON and compared against an earlier run. Run from
+the app folder:
+
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pycalcx.calculator import Calculator  # noqa: E402
+
+
+def _nested(depth):
+    expr = "x"
+    for i in range(depth):
+        expr = f"({expr} {'+-*/'[i % 4]} {i % 7 + 1})"
+    return expr
+
+
+FUNCTIONS = "sqrt(fabs(sin(x)) + cos(y)**2) + log(exp(x) + 1) + floor(y) * ceil(x) - log10(y)"
+
+# name -> (description, calculator options, lines, trace)
+WORKLOADS = {
+    "tiny": ("short literal expressions", {}, ["1+2", "3*4", "2**8", "7-5"], False),
+    "nested": ("one expression nested 40 levels deep", {}, [_nested(40)], False),
+    "functions": ("function-heavy expression", {}, [FUNCTIONS], False),
+    "parse": ("function-heavy expression, cache disabled", {"cache_size": 0}, [FUNCTIONS], False),
+    "assign": (
+        "assignment-heavy session",
+        {},
+        ["a = x + 1", "b = a * 2", "c = a * b - y", "x = c % 7"],
+        False,
+    ),
+    "reactive": (
+        "assignments in spreadsheet mode",
+        {"reactive": True},
+        ["a = 1", "b = a * 2", "c = a + b", "d = c * c - b", "a = 3"],
+        False,
+    ),
+    "trace": ("function-heavy expression with trace=True", {}, [FUNCTIONS], True),
+}
+
+
+def _make_calc(options):
+    calc = Calculator(**options)
+    calc.vars.update(x=1.25, y=3.5)
+    return calc
+
+
+def _run(calc, lines, trace, number):
+    evaluate = calc.eval
+    count = len(lines)
+    start = time.perf_counter()
+    for i in range(number):
+        evaluate(lines[i % count], trace=trace)
+    return time.perf_counter() - start
+
+
+def _memory(options, lines, trace, number):
+    calc = _make_calc(options)
+    for line in lines:  # warm the cache so one-off compiles are not counted
+        calc.eval(line, trace=trace)
+    tracemalloc.start()
+    calc.eval(lines[0], trace=trace)
+    _, peak = tracemalloc.get_traced_memory()
+    before = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    _run(calc, lines, trace, number)
+    after = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    return peak, (after - before) / number
+
+
+def bench(name, number, repeat):
+    _, options, lines, trace = WORKLOADS[name]
+    best = float("inf")
+    for _ in range(repeat):
+        calc = _make_calc(options)
+        _run(calc, lines, trace, len(lines))
+        best = min(best, _run(calc, lines, trace, number))
+    peak, retained = _memory(options, lines, trace, min(number, 2000))
+    return {
+        "ops_per_sec": number / best,
+        "us_per_op": best / number * 1e6,
+        "peak_bytes_per_eval": peak,
+        "retained_blocks_per_eval": retained,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20_000, help="evaluations per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per workload; the best is kept")
+    parser.add_argument("--only", nargs="+", choices=sorted(WORKLOADS), help="run only these workloads")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    for name in args.only or WORKLOADS:
+        result = results[name] = bench(name, args.number, args.repeat)
+        line = (
+            f"{name:<10}{result['ops_per_sec']:>12,.0f} ops/s {result['us_per_op']:8.2f} us/op  "
+            f"peak {result['peak_bytes_per_eval']:6d} B/eval  "
+            f"retained {result['retained_blocks_per_eval']:5.2f} blocks/eval"
+        )
+        if name in baseline:
+            line += f"  {result['ops_per_sec'] / baseline[name]['ops_per_sec']:5.2f}x vs baseline"
+        print(f"{line}  ({WORKLOADS[name][0]})")
+
+    if args.save:
+        report = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "number": args.number,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
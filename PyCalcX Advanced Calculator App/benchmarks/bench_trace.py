@@ -0,0 +1,72 @@
+"""Measure the cost of step tracing in Calculator.eval.
+
+Compares untraced evaluation, traced evaluation that only records events,
+and traced evaluation whose lines are all formatted. Run from the app
+folder:
+
+    python benchmarks/bench_trace.py --number 20000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pycalcx.calculator import Calculator  # noqa: E402
+
+EXPR = "sqrt(x**2 + y**2) * sin(x) + log(y + 1) / pi - floor(x) % 3"
+
+
+def untraced(calc):
+    calc.eval(EXPR)
+
+
+def traced(calc):
+    calc.eval(EXPR, trace=True)
+
+
+def traced_formatted(calc):
+    _, lines = calc.eval(EXPR, trace=True)
+    list(lines)
+
+
+def peak_bytes(calc, fn):
+    fn(calc)  # warm the expression cache
+    tracemalloc.start()
+    fn(calc)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    calc = Calculator()
+    calc.vars.update(x=1.25, y=3.5)
+    nodes = len(calc.eval(EXPR, trace=True)[1])
+    print(f"expression: {EXPR} ({nodes} traced nodes)")
+    base = None
+    for label, fn in (
+        ("untraced", untraced),
+        ("traced", traced),
+        ("traced + format", traced_formatted),
+    ):
+        fn(calc)
+        start = time.perf_counter()
+        for _ in range(args.number):
+            fn(calc)
+        per_eval = (time.perf_counter() - start) / args.number
+        base = base or per_eval
+        print(
+            f"{label + ':':<17}{per_eval * 1e6:8.2f} us/eval  {per_eval / base:5.1f}x  "
+            f"peak {peak_bytes(calc, fn):6d} B/eval"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """Compatibility wrapper to run the PyCalcX CLI with `python calculator.py`."""
-from cli import repl
+import sys
+
+from cli import main
 
 
 if __name__ == "__main__":
-    repl()
+    sys.exit(main())
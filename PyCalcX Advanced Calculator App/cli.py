@@ -1,6 +1,17 @@
-"""Simple CLI for PyCalcX calculator."""
+"""Simple CLI for PyCalcX calculator.
+
+Without arguments this starts the interactive REPL. With a file argument
+(or `-` for stdin) it evaluates one expression per line and writes one
+result per line, as plain text or JSON lines.
+"""
 from pycalcx.calculator import Calculator, CalcError
+import argparse
+import itertools
+import json
+import math
 import sys
+import time
+from typing import Any, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 
 def repl():
@@ -22,6 +33,7 @@ def repl():
                 print(":vars — show variables")
                 print(":history — show history")
                 print(":undo — undo last assignment")
+                print(":redo — redo last undone item")
                 print(":clear — clear vars and history")
                 print(":trace on/off — toggle step tracing for each eval (not global)")
                 print(":quit — exit")
@@ -43,6 +55,13 @@ def repl():
                 except CalcError as e:
                     print(f"Error: {e}")
                 continue
+            if cmd == "redo":
+                try:
+                    calc.redo()
+                    print("Redone")
+                except CalcError as e:
+                    print(f"Error: {e}")
+                continue
             if cmd == "clear":
                 calc.clear()
                 print("Cleared")
@@ -69,5 +88,145 @@ def repl():
             print(f"Error: {e}")
 
 
+# strict JSON: NaN and infinities are not valid JSON numbers, so
+# `_json_value` writes them as the strings the text output shows
+_ENCODER = json.JSONEncoder(default=repr, allow_nan=False)
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)  # "inf", "-inf" or "nan"
+    return value
+
+
+def _error_text(e: Exception) -> str:
+    if isinstance(e, CalcError):
+        return str(e)
+    return f"{type(e).__name__}: {e}"
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(lines)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def eval_lines(
+    calc: Calculator, lines: List[str], as_json: bool = False, independent: bool = False
+) -> Tuple[List[str], int]:
+    """Evaluate `lines` in order; return (output lines, error count).
+
+    In text mode a blank line gives an empty output line, so output
+    lines match input lines one to one; JSON lines skip blank lines
+    instead. Errors, including arithmetic ones, are
+    reported inline instead of stopping the run. With `independent` set,
+    assignments are rejected because their effect would not reach lines
+    run by other workers.
+    """
+    out: List[str] = []
+    errors = 0
+    for raw in lines:
+        text = raw.strip()
+        if not text:
+            if not as_json:
+                out.append("")
+            continue
+        try:
+            if independent and "=" in text:
+                raise CalcError("Assignments are not supported with --jobs")
+            value = calc.eval(text)[0]
+        except Exception as e:
+            errors += 1
+            if as_json:
+                out.append(_ENCODER.encode({"expr": text, "error": _error_text(e)}))
+            else:
+                out.append(f"Error: {_error_text(e)}")
+            continue
+        if as_json:
+            out.append(_ENCODER.encode({"expr": text, "result": _json_value(value)}))
+        else:
+            out.append(str(value))
+    return out, errors
+
+
+_worker_calc: Optional[Calculator] = None
+
+
+def _eval_chunk(args: Tuple[List[str], bool]) -> Tuple[List[str], int]:
+    global _worker_calc
+    if _worker_calc is None:
+        _worker_calc = Calculator(history_size=1)
+    lines, as_json = args
+    return eval_lines(_worker_calc, lines, as_json, independent=True)
+
+
+def run_batch(
+    lines: Iterable[str],
+    out: TextIO,
+    as_json: bool = False,
+    jobs: int = 1,
+    chunk_size: int = 2000,
+) -> Tuple[int, int]:
+    """Stream `lines` through the calculator and write results to `out`.
+
+    Input is read and output written one chunk at a time, so memory use
+    does not grow with the input. With `jobs` > 1 chunks are evaluated by a
+    pool of worker processes (lines must then be independent); results are
+    still written in input order. Returns (expressions evaluated,
+    errors); blank lines do not count.
+    """
+    total = errors = 0
+    if jobs > 1:
+        import multiprocessing
+
+        with multiprocessing.Pool(jobs) as pool:
+            work = ((chunk, as_json) for chunk in _chunks(lines, chunk_size))
+            for results, failed in pool.imap(_eval_chunk, work):
+                if results:
+                    out.write("\n".join(results) + "\n")
+                total += len(results) - results.count("")
+                errors += failed
+        return total, errors
+
+    calc = Calculator(history_size=1)
+    for chunk in _chunks(lines, chunk_size):
+        results, failed = eval_lines(calc, chunk, as_json)
+        if results:
+            out.write("\n".join(results) + "\n")
+        total += len(results) - results.count("")
+        errors += failed
+    return total, errors
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="pycalcx", description="PyCalcX calculator")
+    parser.add_argument("input", nargs="?", help="evaluate expressions from this file ('-' for stdin) instead of the REPL")
+    parser.add_argument("--json", action="store_true", help="write results as JSON lines")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="worker processes for independent lines")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="lines per read/write (and per worker task)")
+    parser.add_argument("--stats", action="store_true", help="report throughput on stderr")
+    args = parser.parse_args(argv)
+
+    if args.input is None:
+        repl()
+        return 0
+
+    start = time.perf_counter()
+    if args.input == "-":
+        total, errors = run_batch(sys.stdin, sys.stdout, args.json, args.jobs, args.chunk_size)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            total, errors = run_batch(f, sys.stdout, args.json, args.jobs, args.chunk_size)
+    sys.stdout.flush()
+    if args.stats:
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed else float("inf")
+        print(f"{total} lines, {errors} errors in {elapsed:.2f}s ({rate:,.0f} lines/s)", file=sys.stderr)
+    return 1 if errors else 0
+
+
 if __name__ == "__main__":
-    repl()
+    sys.exit(main())
@@ -7,41 +7,350 @@ tracing of evaluation.
 from __future__ import annotations
 
 import ast
-import operator
-import math
-from typing import Any, Dict, List, Tuple
-
-
-class CalcError(Exception):
-    pass
-
-
-SAFE_OPERATORS = {
-    ast.Add: operator.add,
-    ast.Sub: operator.sub,
-    ast.Mult: operator.mul,
-    ast.Div: operator.truediv,
-    ast.Pow: operator.pow,
-    ast.Mod: operator.mod,
-    ast.USub: operator.neg,
-    ast.UAdd: operator.pos,
-}
-
-
-SAFE_FUNCS = {name: getattr(math, name) for name in (
-    "sin",
-    "cos",
-    "tan",
-    "sqrt",
-    "log",
-    "log10",
-    "exp",
-    "factorial",
-    "floor",
-    "ceil",
-    "fabs",
-)}
-SAFE_CONSTS = {"pi": math.pi, "e": math.e}
+import numbers
+import time
+from collections import ChainMap, OrderedDict
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .errors import CalcError
+from .history import UNSET, History, HistoryEntry
+from .numeric import FLOAT, SAFE_CONSTS, SAFE_FUNCS, SAFE_OPERATORS, Backend, Limits, make_backend
+from .optimizer import OptimizedTree, optimize
+from .tracing import Trace, TraceEvent
+
+
+def _parse(expr: str) -> ast.Expression:
+    try:
+        return ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise CalcError(f"Syntax error: {e.msg}")
+
+
+class _Compiler:
+    """Translates validated AST nodes into closures taking the variables.
+
+    The operator, function and constant tables are parameters so the same
+    whitelist can be compiled against other numeric implementations;
+    `literal`, if given, converts int and float literals to that
+    implementation's numbers. `compile` expects a tree from `optimize`,
+    which has already converted them; `trace` converts them itself.
+    """
+
+    def __init__(
+        self,
+        operators: Mapping[type, Callable[..., Any]] = SAFE_OPERATORS,
+        funcs: Mapping[str, Callable[..., Any]] = SAFE_FUNCS,
+        consts: Mapping[str, Any] = SAFE_CONSTS,
+        literal: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        self.operators = operators
+        self.funcs = funcs
+        self.consts = consts
+        self.literal = literal
+
+    @classmethod
+    def for_backend(cls, backend: Backend) -> "_Compiler":
+        return cls(backend.operators, backend.funcs, backend.consts, backend.literal)
+
+    def compile(
+        self, tree: ast.Expression, temps: FrozenSet[str] = frozenset()
+    ) -> Callable[[Mapping[str, Any]], Any]:
+        """Compile a whole expression.
+
+        `temps` names the temporaries bound by the optimizer's assignment
+        expressions; any other assignment expression is rejected. When
+        there are temporaries, each call evaluates against a fresh frame
+        list, ``[variables, temp0, temp1, ...]``, so the result stays safe
+        to share between threads.
+        """
+        if not temps:
+            return self._node(tree, {})
+        slots = {name: i for i, name in enumerate(sorted(temps), 1)}
+        body = self._node(tree, slots)
+        blank = [None] * len(slots)
+        return lambda v: body([v, *blank])
+
+    def _node(self, node: ast.AST, slots: Dict[str, int]) -> Callable[[Any], Any]:
+        if isinstance(node, ast.Expression):
+            return self._node(node.body, slots)
+
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda v: value
+
+        if isinstance(node, ast.BinOp):
+            op_type = type(node.op)
+            if op_type not in SAFE_OPERATORS or op_type not in self.operators:
+                raise CalcError(f"Unsupported operator: {op_type}")
+            binop = self.operators[op_type]
+            left = self._node(node.left, slots)
+            right = self._node(node.right, slots)
+            return lambda v: binop(left(v), right(v))
+
+        if isinstance(node, ast.UnaryOp):
+            op_type = type(node.op)
+            if op_type not in SAFE_OPERATORS or op_type not in self.operators:
+                raise CalcError(f"Unsupported unary operator: {op_type}")
+            unop = self.operators[op_type]
+            operand = self._node(node.operand, slots)
+            return lambda v: unop(operand(v))
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name):
+                raise CalcError("Only simple function calls allowed")
+            fname = node.func.id
+            if fname not in SAFE_FUNCS or fname not in self.funcs:
+                raise CalcError(f"Function not allowed: {fname}")
+            func = self.funcs[fname]
+            args = [self._node(a, slots) for a in node.args]
+            if len(args) == 1:
+                arg = args[0]
+                return lambda v: func(arg(v))
+            return lambda v: func(*[a(v) for a in args])
+
+        if isinstance(node, ast.NamedExpr) and node.target.id in slots:
+            slot = slots[node.target.id]
+            value = self._node(node.value, slots)
+
+            def bind(f: List[Any]) -> Any:
+                f[slot] = res = value(f)
+                return res
+
+            return bind
+
+        if isinstance(node, ast.Name):
+            return self._name(node.id, slots)
+
+        raise CalcError(f"Unsupported expression: {ast.dump(node)}")
+
+    def trace(self, tree: ast.AST, variables: Mapping[str, Any], tracer: Trace) -> Any:
+        """Evaluate an already validated tree, reporting each node to `tracer`.
+
+        This walks the tree instead of running compiled closures, so only
+        traced evaluations pay for timing and event records.
+        """
+        clock = time.perf_counter
+        record = tracer.record
+        literal = self.literal
+
+        def walk(node: ast.AST) -> Any:
+            if isinstance(node, ast.Expression):
+                return walk(node.body)
+
+            start = clock()
+            if isinstance(node, ast.Constant):
+                value = node.value if literal is None else literal(node.value)
+                kind = "num" if isinstance(value, numbers.Number) else "const"
+                record(TraceEvent(kind, "", (), value, clock() - start))
+                return value
+
+            if isinstance(node, ast.BinOp):
+                left = walk(node.left)
+                right = walk(node.right)
+                res = self.operators[type(node.op)](left, right)
+                record(TraceEvent("binop", type(node.op).__name__, (left, right), res, clock() - start))
+                return res
+
+            if isinstance(node, ast.UnaryOp):
+                operand = walk(node.operand)
+                res = self.operators[type(node.op)](operand)
+                record(TraceEvent("unaryop", type(node.op).__name__, (operand,), res, clock() - start))
+                return res
+
+            if isinstance(node, ast.Call):
+                fname = node.func.id  # type: ignore[attr-defined]
+                args = tuple(walk(a) for a in node.args)
+                res = self.funcs[fname](*args)
+                record(TraceEvent("call", fname, args, res, clock() - start))
+                return res
+
+            if isinstance(node, ast.Name):
+                idn = node.id
+                if idn in variables:
+                    val = variables[idn]
+                    record(TraceEvent("var", idn, (), val, clock() - start))
+                    return val
+                if idn in self.consts:
+                    val = self.consts[idn]
+                    record(TraceEvent("constname", idn, (), val, clock() - start))
+                    return val
+                raise CalcError(f"Unknown identifier: {idn}")
+
+            raise CalcError(f"Unsupported expression: {ast.dump(node)}")
+
+        return walk(tree)
+
+    def _name(self, idn: str, slots: Dict[str, int]) -> Callable[[Any], Any]:
+        if idn in slots:
+            slot = slots[idn]
+            return lambda f: f[slot]
+
+        if idn in self.consts:
+            const = self.consts[idn]
+            if slots:
+                return lambda f: f[0][idn] if idn in f[0] else const
+            return lambda v: v[idn] if idn in v else const
+
+        def unknown() -> CalcError:
+            return CalcError(f"Unknown identifier: {idn}")
+
+        if slots:
+
+            def framed_lookup(f: List[Any]) -> Any:
+                try:
+                    return f[0][idn]
+                except KeyError:
+                    raise unknown() from None
+
+            return framed_lookup
+
+        def lookup(v: Mapping[str, Any]) -> Any:
+            try:
+                return v[idn]
+            except KeyError:
+                raise unknown() from None
+
+        return lookup
+
+
+_DEFAULT_COMPILER = _Compiler.for_backend(FLOAT)
+
+
+class CompiledExpr:
+    """An expression parsed and validated once, evaluated many times.
+
+    Instances hold no reference to a Calculator and never change after
+    construction, so they can be cached and shared. Call with a mapping of
+    variable values; names missing from it fall back to the constants.
+    `names` lists the identifiers the expression reads.
+
+    The parsed tree is run through the optimizer before compilation;
+    `optimized` holds the rewritten tree and what was saved. Constants
+    listed in `shadowed` are not folded, because a variable overrides them;
+    `assumes` lists the constant names that were folded, so a caller can
+    recompile if one of them becomes shadowed later.
+    """
+
+    __slots__ = ("source", "tree", "optimized", "assumes", "_fn", "_names")
+
+    def __init__(
+        self,
+        source: str,
+        tree: ast.Expression,
+        compiler: _Compiler = _DEFAULT_COMPILER,
+        shadowed: AbstractSet[str] = frozenset(),
+    ) -> None:
+        self.source = source
+        self.tree = tree
+        self._names: Optional[FrozenSet[str]] = None
+        foldable = {k: v for k, v in compiler.consts.items() if k not in shadowed}
+        self.optimized: OptimizedTree = optimize(
+            tree, compiler.operators, compiler.funcs, foldable, compiler.literal
+        )
+        self.assumes = self.optimized.assumes
+        self._fn = compiler.compile(self.optimized.tree, self.optimized.temps)
+
+    def __call__(self, variables: Mapping[str, Any]) -> Any:
+        return self._fn(variables)
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        if self._names is None:
+            called = {id(n.func) for n in ast.walk(self.tree) if isinstance(n, ast.Call)}
+            self._names = frozenset(
+                n.id for n in ast.walk(self.tree) if isinstance(n, ast.Name) and id(n) not in called
+            )
+        return self._names
+
+    def __repr__(self) -> str:
+        return f"CompiledExpr({self.source!r})"
+
+
+def compile_expr(
+    expr: str,
+    compiler: _Compiler = _DEFAULT_COMPILER,
+    shadowed: AbstractSet[str] = frozenset(),
+) -> CompiledExpr:
+    """Parse, validate and compile an expression (not an assignment)."""
+    return CompiledExpr(expr, _parse(expr), compiler, shadowed)
+
+
+class ExpressionCache:
+    """Bounded LRU cache of compiled expressions keyed by expression text.
+
+    `hits` and `misses` count lookups; a maxsize of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, CompiledExpr]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[CompiledExpr]:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: CompiledExpr) -> None:
+        if not self.maxsize:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
+class BoundExpr:
+    """A compiled expression that evaluates against a Calculator's vars."""
+
+    __slots__ = ("expr", "_calc")
+
+    def __init__(self, expr: CompiledExpr, calc: "Calculator") -> None:
+        self.expr = expr
+        self._calc = calc
+
+    def __call__(self) -> Any:
+        expr = self.expr
+        variables = self._calc.vars
+        if expr.assumes and not expr.assumes.isdisjoint(variables):
+            expr = self._calc._compiled(expr.source)
+        return expr(variables)
+
+    def __repr__(self) -> str:
+        return f"BoundExpr({self.expr.source!r})"
 
 
 class Calculator:
@@ -49,19 +358,59 @@ class Calculator:
 
     Contract:
     - Input: string expressions (e.g. '2+3', 'a = 5', 'sqrt(2)')
-    - Output: numeric results (int/float) and trace steps
+    - Output: numeric results (int/float, or the backend's numbers) and trace steps
     - Errors: raises CalcError for invalid inputs or unsafe operations
+
+    Untraced evaluations go through an LRU cache of compiled expressions
+    (`cache`) holding up to `cache_size` entries. Pass `cache` to share one
+    cache between calculators; they must use the same backend.
+
+    `history` keeps the last `history_size` evaluations; older ones are
+    dropped, or appended to `history_file` when one is given.
+
+    With `reactive=True` the calculator behaves like a spreadsheet: each
+    assignment keeps its formula (`formulas`), and assigning a variable
+    recomputes every variable whose formula depends on it, in dependency
+    order. Circular references raise CalcError. If any recomputation fails,
+    the assignment is rejected and no variable changes. Assign through
+    `eval`; writing to `vars` directly does not update dependents.
+
+    `backend` selects the numbers expressions compute with: "float" (the
+    default), "fraction" for exact rationals or "decimal" rounded to
+    `precision` digits; see `pycalcx.numeric`. `limits` bounds `**` and
+    factorial() before they run; exceeding them raises CalcError.
     """
 
-    def __init__(self) -> None:
-        self.vars: Dict[str, float] = {}
-        self.history: List[Tuple[str, Any]] = []
+    def __init__(
+        self,
+        cache_size: int = 256,
+        reactive: bool = False,
+        history_size: int = 1000,
+        history_file: Optional[str] = None,
+        backend: Union[str, Backend] = "float",
+        precision: int = 28,
+        limits: Optional[Limits] = None,
+        cache: Optional[ExpressionCache] = None,
+    ) -> None:
+        if isinstance(backend, str):
+            backend = FLOAT if backend == "float" and limits is None else make_backend(backend, precision, limits)
+        self.backend = backend
+        self._compiler = _DEFAULT_COMPILER if backend is FLOAT else _Compiler.for_backend(backend)
+        self.vars: Dict[str, Any] = {}
+        self.history = History(history_size, history_file)
+        self.cache = ExpressionCache(cache_size) if cache is None else cache
+        self.reactive = reactive
+        self.formulas: Dict[str, str] = {}
+        self._depends: Dict[str, FrozenSet[str]] = {}  # var -> names its formula reads
+        self._dependents: Dict[str, Set[str]] = {}  # name -> vars whose formula reads it
 
-    def eval(self, text: str, trace: bool = False) -> Tuple[Any, List[str]]:
+    def eval(self, text: str, trace: Union[bool, Trace] = False) -> Tuple[Any, Sequence[str]]:
         """Evaluate an expression or assignment.
 
         Returns (result, trace_lines). For assignments, result is the value
-        assigned.
+        assigned. With `trace` true the unoptimized expression is evaluated
+        step by step and trace_lines is a `Trace`; pass a `Trace` instance
+        to receive the events yourself.
         """
         text = text.strip()
         if not text:
@@ -74,94 +423,202 @@ class Calculator:
             expr = parts[1].strip()
             if not var.isidentifier():
                 raise CalcError(f"Invalid variable name: {var}")
-            val, trace_lines = self._eval_expr(expr, trace)
-            self.vars[var] = val
-            self.history.append((text, val))
+            prev = self.vars.get(var, UNSET)
+            prev_formula = self.formulas.get(var)
+            if self.reactive:
+                val, trace_lines = self._assign(var, expr, trace)
+            else:
+                val, trace_lines = self._eval_expr(expr, trace)
+                self.vars[var] = val
+            self.history.record(HistoryEntry(text, val, var, prev, prev_formula))
             return val, trace_lines
 
         val, trace_lines = self._eval_expr(text, trace)
-        self.history.append((text, val))
+        self.history.record(HistoryEntry(text, val))
         return val, trace_lines
 
-    def undo(self) -> None:
-        """Undo last history item (removes var assignment if any)."""
-        if not self.history:
-            raise CalcError("Nothing to undo")
-        expr, val = self.history.pop()
-        if "=" in expr:
-            var = expr.split("=", 1)[0].strip()
-            if var in self.vars:
-                del self.vars[var]
+    def compile(self, text: str) -> BoundExpr:
+        """Compile an expression once for repeated evaluation.
 
-    def clear(self) -> None:
-        self.vars.clear()
-        self.history.clear()
+        The returned object is called with no arguments and evaluates against
+        the calculator's variables as they are at call time. Calls are not
+        recorded in history.
+        """
+        text = text.strip()
+        if not text:
+            raise CalcError("Empty expression")
+        return BoundExpr(self._compiled(text), self)
 
-    def _eval_expr(self, expr: str, trace: bool) -> Tuple[Any, List[str]]:
+    def eval_batch(self, expr: str, columns: Mapping[str, Any]) -> Any:
+        """Evaluate an expression element-wise over columns of values.
+
+        `columns` maps variable names to equal-length sequences; the result
+        is a NumPy array with one value per row. Names not found in
+        `columns` fall back to `vars` and SAFE_CONSTS. Requires numpy. Batch
+        evaluations always use float64, whatever the backend, and are not
+        recorded in history. factorial() arguments are bounded by the
+        backend's `limits`.
+        """
         try:
-            node = ast.parse(expr, mode="eval")
-        except SyntaxError as e:
-            raise CalcError(f"Syntax error: {e.msg}")
-
-        tracer: List[str] = []
-
-        def _eval(node_: ast.AST) -> Any:
-            if isinstance(node_, ast.Expression):
-                return _eval(node_.body)
-
-            if isinstance(node_, ast.Num):  # type: ignore[attr-defined]
-                tracer.append(f"num: {node_.n}")
-                return node_.n
-
-            if isinstance(node_, ast.Constant):
-                tracer.append(f"const: {node_.value}")
-                return node_.value
-
-            if isinstance(node_, ast.BinOp):
-                left = _eval(node_.left)
-                right = _eval(node_.right)
-                op_type = type(node_.op)
-                if op_type in SAFE_OPERATORS:
-                    res = SAFE_OPERATORS[op_type](left, right)
-                    tracer.append(f"{left} {node_.op.__class__.__name__} {right} -> {res}")
-                    return res
-                raise CalcError(f"Unsupported operator: {op_type}")
+            from .vectorize import eval_batch
+        except ImportError:
+            raise CalcError("eval_batch requires numpy")
+        return eval_batch(expr, columns, self.vars, self.backend.limits)
 
-            if isinstance(node_, ast.UnaryOp):
-                operand = _eval(node_.operand)
-                op_type = type(node_.op)
-                if op_type in SAFE_OPERATORS:
-                    res = SAFE_OPERATORS[op_type](operand)
-                    tracer.append(f"{node_.op.__class__.__name__} {operand} -> {res}")
-                    return res
-                raise CalcError(f"Unsupported unary operator: {op_type}")
+    def explain(self, text: str) -> OptimizedTree:
+        """Return the optimized form of an expression.
 
-            if isinstance(node_, ast.Call):
-                if not isinstance(node_.func, ast.Name):
-                    raise CalcError("Only simple function calls allowed")
-                fname = node_.func.id
-                if fname not in SAFE_FUNCS:
-                    raise CalcError(f"Function not allowed: {fname}")
-                args = [_eval(a) for a in node_.args]
-                res = SAFE_FUNCS[fname](*args)
-                tracer.append(f"{fname}({', '.join(map(str,args))}) -> {res}")
-                return res
+        `.source` shows the rewritten expression; `folded`, `shared` and the
+        node counts show what the optimizer saved.
+        """
+        text = text.strip()
+        if not text:
+            raise CalcError("Empty expression")
+        return self._compiled(text).optimized
 
-            if isinstance(node_, ast.Name):
-                idn = node_.id
-                if idn in self.vars:
-                    val = self.vars[idn]
-                    tracer.append(f"var {idn} -> {val}")
-                    return val
-                if idn in SAFE_CONSTS:
-                    val = SAFE_CONSTS[idn]
-                    tracer.append(f"const {idn} -> {val}")
-                    return val
-                raise CalcError(f"Unknown identifier: {idn}")
+    def _compiled(self, expr: str, variables: Optional[Mapping[str, Any]] = None) -> CompiledExpr:
+        if variables is None:
+            variables = self.vars
+        compiled = self.cache.get(expr)
+        if compiled is None:
+            compiled = compile_expr(expr, self._compiler)
+            self.cache.put(expr, compiled)
+        if compiled.assumes and not compiled.assumes.isdisjoint(variables):
+            # a variable shadows a folded constant: use a variant without it
+            shadowed = frozenset(k for k in self._compiler.consts if k in variables)
+            key = (expr, shadowed)
+            compiled = self.cache.get(key)
+            if compiled is None:
+                compiled = compile_expr(expr, self._compiler, shadowed)
+                self.cache.put(key, compiled)
+        return compiled
+
+    def _assign(self, var: str, expr: str, trace: Union[bool, Trace]) -> Tuple[Any, Sequence[str]]:
+        """Reactive assignment: store the formula and update dependents."""
+        deps = self._compiled(expr).names
+        downstream = self._downstream(var)
+        cyclic = deps & {var, *downstream}
+        if cyclic:
+            raise CalcError(f"Circular reference: {var} = {expr} reads {', '.join(sorted(cyclic))}")
+
+        val, trace_lines = self._eval_expr(expr, trace)
+        self._commit(var, val, downstream, expr, deps)
+        return val, trace_lines
+
+    def _commit(
+        self,
+        var: str,
+        value: Any,
+        downstream: List[str],
+        formula: Optional[str] = None,
+        deps: FrozenSet[str] = frozenset(),
+    ) -> None:
+        """Set `var` (remove it if `value` is UNSET) and recompute `downstream`.
 
-            raise CalcError(f"Unsupported expression: {ast.dump(node_)}")
+        Either everything is applied or, if a dependent fails, nothing is.
+        """
+        if value is UNSET:
+            staged: Dict[str, Any] = {}
+            base: Mapping[str, Any] = {k: v for k, v in self.vars.items() if k != var}
+        else:
+            staged = {var: value}
+            base = self.vars
+        scope = ChainMap(staged, base)
+        for name in downstream:
+            try:
+                staged[name] = self._compiled(self.formulas[name], scope)(scope)
+            except Exception as e:
+                raise CalcError(f"Cannot update {name} = {self.formulas[name]}: {e}") from e
+
+        if value is UNSET:
+            self.vars.pop(var, None)
+        self.vars.update(staged)
+        self._unlink(var)
+        if formula is not None:
+            self.formulas[var] = formula
+            self._depends[var] = deps
+            for name in deps:
+                self._dependents.setdefault(name, set()).add(var)
+
+    def _restore(self, var: str, value: Any, formula: Optional[str]) -> None:
+        """Put `var` back to an earlier value or formula (UNSET removes it)."""
+        if not self.reactive:
+            if value is UNSET:
+                self.vars.pop(var, None)
+            else:
+                self.vars[var] = value
+            self._unlink(var)
+        elif formula is not None:
+            self._assign(var, formula, False)
+        else:
+            self._commit(var, value, self._downstream(var))
+
+    def _unlink(self, var: str) -> None:
+        self.formulas.pop(var, None)
+        for name in self._depends.pop(var, ()):
+            readers = self._dependents[name]
+            readers.discard(var)
+            if not readers:
+                del self._dependents[name]
+
+    def _downstream(self, var: str) -> List[str]:
+        """Variables whose formulas depend on `var`, in recomputation order."""
+        # reverse post-order of a depth-first walk is a topological order
+        order: List[str] = []
+        seen = {var}
+        stack = [(var, iter(self._dependents.get(var, ())))]
+        while stack:
+            name, readers = stack[-1]
+            for reader in readers:
+                if reader not in seen:
+                    seen.add(reader)
+                    stack.append((reader, iter(self._dependents.get(reader, ()))))
+                    break
+            else:
+                stack.pop()
+                order.append(name)
+        order.reverse()
+        return order[1:]
+
+    def undo(self) -> None:
+        """Undo the last history item, restoring the variable it assigned.
+
+        The variable gets back the value it had before (or is removed if it
+        was new); in reactive mode its previous formula is restored and its
+        dependents recomputed.
+        """
+        entry = self.history.peek()
+        if entry is None:
+            raise CalcError("Nothing to undo")
+        if entry.var is not None:
+            self._restore(entry.var, entry.prev, entry.prev_formula)
+        self.history.undo()
+
+    def redo(self) -> None:
+        """Re-apply the most recently undone history item."""
+        entry = self.history.peek_redo()
+        if entry is None:
+            raise CalcError("Nothing to redo")
+        if entry.var is not None:
+            if self.reactive:
+                self._assign(entry.var, entry.text.split("=", 1)[1].strip(), False)
+            else:
+                self.vars[entry.var] = entry.value
+        self.history.redo()
+
+    def clear(self) -> None:
+        self.vars.clear()
+        self.history.clear()
+        self.formulas.clear()
+        self._depends.clear()
+        self._dependents.clear()
 
-        result = _eval(node)
-        if not trace:
-            tracer = []
-        return result, tracer
+    def _eval_expr(self, expr: str, trace: Union[bool, Trace]) -> Tuple[Any, Sequence[str]]:
+        compiled = self._compiled(expr)
+        if isinstance(trace, Trace):
+            tracer = trace  # an empty Trace is falsy, so test the type first
+        elif trace:
+            tracer = Trace()
+        else:
+            return compiled(self.vars), []
+        return self._compiler.trace(compiled.tree, self.vars, tracer), tracer
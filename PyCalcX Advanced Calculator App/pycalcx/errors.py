@@ -0,0 +1,5 @@
+"""Exceptions raised by PyCalcX."""
+
+
+class CalcError(Exception):
+    pass
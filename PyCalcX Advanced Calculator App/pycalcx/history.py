@@ -0,0 +1,148 @@
+"""Bounded evaluation history for PyCalcX.
+
+`History` keeps the most recent evaluations in a ring buffer of compact
+`HistoryEntry` records. Each assignment record remembers the value the
+variable had before, so undo and redo restore state directly instead of
+re-parsing text. Entries pushed out of the buffer can be appended to a JSON
+lines file instead of being dropped.
+"""
+from __future__ import annotations
+
+import json
+from collections import deque
+from typing import IO, Any, Deque, Iterator, List, Optional, Tuple
+
+
+class _Unset:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "UNSET"
+
+
+# `prev` value of an entry whose variable did not exist before
+UNSET: Any = _Unset()
+
+_ENCODER = json.JSONEncoder(default=repr)
+
+
+class HistoryEntry:
+    """One evaluation. Unpacks as ``(text, value)`` like the old tuples.
+
+    For assignments `var` is the variable name, `prev` its previous value
+    (UNSET if it was new) and `prev_formula` its previous formula in
+    reactive mode; all three are None/UNSET for plain expressions.
+    """
+
+    __slots__ = ("text", "value", "var", "prev", "prev_formula")
+
+    def __init__(
+        self,
+        text: str,
+        value: Any,
+        var: Optional[str] = None,
+        prev: Any = UNSET,
+        prev_formula: Optional[str] = None,
+    ) -> None:
+        self.text = text
+        self.value = value
+        self.var = var
+        self.prev = prev
+        self.prev_formula = prev_formula
+
+    def __iter__(self) -> Iterator[Any]:
+        yield self.text
+        yield self.value
+
+    def __repr__(self) -> str:
+        return f"HistoryEntry({self.text!r}, {self.value!r})"
+
+
+class History:
+    """Ring buffer of the last `maxlen` entries plus a redo stack.
+
+    All operations are O(1). When the buffer is full the oldest entry is
+    evicted; with `spill_path` set it is first appended to that file as one
+    JSON object per line. Evicted entries can no longer be undone.
+    """
+
+    def __init__(self, maxlen: int = 1000, spill_path: Optional[str] = None) -> None:
+        if maxlen < 1:
+            raise ValueError("maxlen must be >= 1")
+        self.maxlen = maxlen
+        self.spill_path = spill_path
+        self.spilled = 0
+        self._entries: Deque[HistoryEntry] = deque()
+        self._redo: List[HistoryEntry] = []
+        self._spill: Optional[IO[str]] = None
+
+    def record(self, entry: HistoryEntry) -> None:
+        """Add a new entry; this discards anything that could be redone."""
+        self._redo.clear()
+        self._push(entry)
+
+    def _push(self, entry: HistoryEntry) -> None:
+        if len(self._entries) >= self.maxlen:
+            self._evict(self._entries.popleft())
+        self._entries.append(entry)
+
+    def _evict(self, entry: HistoryEntry) -> None:
+        if self.spill_path is None:
+            return
+        if self._spill is None:
+            self._spill = open(self.spill_path, "a", encoding="utf-8")
+        self._spill.write(_ENCODER.encode({"text": entry.text, "value": entry.value}) + "\n")
+        self.spilled += 1
+
+    def undo(self) -> Optional[HistoryEntry]:
+        """Move the newest entry to the redo stack and return it."""
+        if not self._entries:
+            return None
+        entry = self._entries.pop()
+        self._redo.append(entry)
+        return entry
+
+    def redo(self) -> Optional[HistoryEntry]:
+        """Move the most recently undone entry back and return it."""
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._push(entry)
+        return entry
+
+    def peek(self) -> Optional[HistoryEntry]:
+        return self._entries[-1] if self._entries else None
+
+    def peek_redo(self) -> Optional[HistoryEntry]:
+        return self._redo[-1] if self._redo else None
+
+    def flush(self) -> None:
+        if self._spill is not None:
+            self._spill.flush()
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._redo.clear()
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        return iter(self._entries)
+
+    def __getitem__(self, index: int) -> HistoryEntry:
+        return self._entries[index]
+
+
+def read_spill(path: str) -> Iterator[Tuple[str, Any]]:
+    """Yield the ``(text, value)`` pairs previously spilled to `path`."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield record["text"], record["value"]
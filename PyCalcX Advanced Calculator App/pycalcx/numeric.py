@@ -0,0 +1,268 @@
+"""Numeric backends for PyCalcX.
+
+A `Backend` bundles the operator, function and constant tables an
+expression is compiled against, plus a converter for number literals:
+
+- "float": Python ints and floats with the `math` module (the default);
+- "fraction": exact rational arithmetic with `fractions.Fraction`;
+  functions without exact rational results (sin, log, non-square sqrt,
+  ...) return floats;
+- "decimal": `decimal.Decimal` rounded to a configurable precision, with
+  every function computed at that precision.
+
+All backends accept the same whitelist (SAFE_OPERATORS, SAFE_FUNCS,
+SAFE_CONSTS) and check `**` and factorial() against `Limits` before
+computing, so a single expression cannot stall the evaluator.
+"""
+from __future__ import annotations
+
+import ast
+import decimal
+import math
+import operator
+from fractions import Fraction
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
+
+from .errors import CalcError
+
+SAFE_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.Mod: operator.mod,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+SAFE_FUNCS = {name: getattr(math, name) for name in (
+    "sin",
+    "cos",
+    "tan",
+    "sqrt",
+    "log",
+    "log10",
+    "exp",
+    "factorial",
+    "floor",
+    "ceil",
+    "fabs",
+)}
+SAFE_CONSTS = {"pi": math.pi, "e": math.e}
+
+BACKENDS = ("float", "fraction", "decimal")
+
+
+class Limits(NamedTuple):
+    """Resource limits checked before an expensive operation runs.
+
+    Only exact results (ints and fractions) can grow without bound, so
+    `**` is checked when both operands are exact and the exponent is
+    integral: its magnitude must not exceed `max_exponent` and the result,
+    estimated from the base's size, must not exceed `max_power_bits` bits.
+    factorial() arguments may not exceed `max_factorial` in any backend.
+    """
+
+    max_exponent: int = 100_000
+    max_power_bits: int = 1_000_000
+    max_factorial: int = 10_000
+
+
+class Backend(NamedTuple):
+    name: str
+    operators: Mapping[type, Callable[..., Any]]
+    funcs: Mapping[str, Callable[..., Any]]
+    consts: Mapping[str, Any]
+    literal: Optional[Callable[[Any], Any]]  # converts int/float literals
+    limits: Limits
+
+
+def _bits(x: Any) -> int:
+    """Size in bits of an exact number, 0 for anything else."""
+    if isinstance(x, int):
+        return x.bit_length()
+    if isinstance(x, Fraction):
+        return max(x.numerator.bit_length(), x.denominator.bit_length())
+    return 0
+
+
+def _checked_pow(power: Callable[[Any, Any], Any], limits: Limits) -> Callable[[Any, Any], Any]:
+    max_exponent, max_bits = limits.max_exponent, limits.max_power_bits
+
+    def checked(base: Any, exp: Any) -> Any:
+        if isinstance(exp, Fraction) and exp.denominator == 1:
+            exp = exp.numerator
+        if isinstance(exp, int):
+            bits = _bits(base)
+            # 0, 1 and -1 stay that small whatever the exponent; other exact
+            # bases (even fractions under 1) grow with it
+            if bits and base not in (0, 1, -1):
+                if abs(exp) > max_exponent:
+                    raise CalcError(f"Exponent too large: {exp} (limit {max_exponent})")
+                if bits > 1 and abs(exp) * bits > max_bits:
+                    raise CalcError(f"Power too large: about {abs(exp) * bits} bits (limit {max_bits})")
+        return power(base, exp)
+
+    return checked
+
+
+def _checked_factorial(factorial: Callable[[Any], Any], limits: Limits) -> Callable[[Any], Any]:
+    max_factorial = limits.max_factorial
+
+    def checked(x: Any) -> Any:
+        if x > max_factorial:
+            raise CalcError(f"Factorial argument too large: {x} (limit {max_factorial})")
+        return factorial(x)
+
+    return checked
+
+
+def _integral(x: Any) -> int:
+    if x != int(x):
+        raise CalcError("factorial() only accepts integral values")
+    return int(x)
+
+
+def float_backend(limits: Limits = Limits()) -> Backend:
+    operators = dict(SAFE_OPERATORS)
+    operators[ast.Pow] = _checked_pow(operator.pow, limits)
+    funcs = dict(SAFE_FUNCS)
+    funcs["factorial"] = _checked_factorial(math.factorial, limits)
+    return Backend("float", operators, funcs, SAFE_CONSTS, None, limits)
+
+
+def _to_fraction(value: Any) -> Any:
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise CalcError(f"No exact value for {value!r}")
+        return Fraction(repr(value))  # the literal as written, not its binary approximation
+    if isinstance(value, int):
+        return Fraction(value)
+    return value
+
+
+def _fraction_sqrt(x: Any) -> Any:
+    if isinstance(x, Fraction) and x >= 0:
+        num, den = math.isqrt(x.numerator), math.isqrt(x.denominator)
+        if num * num == x.numerator and den * den == x.denominator:
+            return Fraction(num, den)
+    return math.sqrt(x)
+
+
+def fraction_backend(limits: Limits = Limits()) -> Backend:
+    operators = dict(SAFE_OPERATORS)
+    operators[ast.Pow] = _checked_pow(operator.pow, limits)
+    funcs: Dict[str, Callable[..., Any]] = dict(SAFE_FUNCS)
+    funcs.update(
+        sqrt=_fraction_sqrt,
+        fabs=abs,
+        factorial=_checked_factorial(lambda x: Fraction(math.factorial(_integral(x))), limits),
+    )
+    return Backend("fraction", operators, funcs, SAFE_CONSTS, _to_fraction, limits)
+
+
+def _decimal_pi(ctx: decimal.Context) -> decimal.Decimal:
+    with decimal.localcontext(ctx) as local:
+        local.prec += 2
+        three = decimal.Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, three, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    return ctx.plus(s)
+
+
+def _decimal_trig(ctx: decimal.Context, pi: decimal.Decimal, cosine: bool) -> Callable[[Any], Any]:
+    def trig(x: Any) -> decimal.Decimal:
+        with decimal.localcontext(ctx) as local:
+            local.prec += 2
+            x = decimal.Decimal(x).remainder_near(2 * pi)  # keeps the series short
+            # Taylor series: sum of (-1)^k x^(2k+i) / (2k+i)!, i = 0 for cos, 1 for sin
+            i = 0 if cosine else 1
+            term = decimal.Decimal(1) if cosine else x
+            s, lasts = term, None
+            while s != lasts:
+                lasts = s
+                term = -term * x * x / ((i + 1) * (i + 2))
+                i += 2
+                s += term
+        return ctx.plus(s)
+
+    return trig
+
+
+def decimal_backend(precision: int = 28, limits: Limits = Limits()) -> Backend:
+    """Decimal arithmetic rounded to `precision` significant digits.
+
+    Each backend uses its own `decimal.Context`, so evaluation does not
+    depend on, or change, the thread's current context.
+    """
+    ctx = decimal.Context(prec=precision)
+    pi = _decimal_pi(decimal.Context(prec=precision + 2))
+    sin = _decimal_trig(ctx, pi, cosine=False)
+    cos = _decimal_trig(ctx, pi, cosine=True)
+
+    def mod(a: Any, b: Any) -> decimal.Decimal:
+        # Decimal's % keeps the dividend's sign; match Python numbers instead
+        r = ctx.remainder(a, b)
+        if r and (r < 0) != (b < 0):
+            r = ctx.add(r, b)
+        return r
+
+    def log(x: Any, base: Any = None) -> decimal.Decimal:
+        if base is None:
+            return ctx.ln(x)
+        return ctx.divide(ctx.ln(x), ctx.ln(base))
+
+    def to_decimal(value: Any) -> Any:
+        if isinstance(value, float):
+            return decimal.Decimal(repr(value))
+        if isinstance(value, int):
+            return decimal.Decimal(value)
+        return value
+
+    operators = {
+        ast.Add: ctx.add,
+        ast.Sub: ctx.subtract,
+        ast.Mult: ctx.multiply,
+        ast.Div: ctx.divide,
+        ast.Pow: _checked_pow(ctx.power, limits),
+        ast.Mod: mod,
+        ast.USub: ctx.minus,
+        ast.UAdd: ctx.plus,
+    }
+    funcs = {
+        "sin": sin,
+        "cos": cos,
+        "tan": lambda x: ctx.divide(sin(x), cos(x)),
+        "sqrt": ctx.sqrt,
+        "log": log,
+        "log10": ctx.log10,
+        "exp": ctx.exp,
+        "factorial": _checked_factorial(lambda x: ctx.plus(decimal.Decimal(math.factorial(_integral(x)))), limits),
+        "floor": lambda x: decimal.Decimal(x).to_integral_value(decimal.ROUND_FLOOR),
+        "ceil": lambda x: decimal.Decimal(x).to_integral_value(decimal.ROUND_CEILING),
+        "fabs": ctx.abs,
+    }
+    consts = {"pi": ctx.plus(pi), "e": ctx.exp(1)}
+    return Backend(f"decimal:{precision}", operators, funcs, consts, to_decimal, limits)
+
+
+def make_backend(name: str = "float", precision: int = 28, limits: Optional[Limits] = None) -> Backend:
+    """Build the backend called `name`; `precision` only applies to "decimal"."""
+    limits = limits or Limits()
+    if name == "float":
+        return float_backend(limits)
+    if name == "fraction":
+        return fraction_backend(limits)
+    if name == "decimal":
+        return decimal_backend(precision, limits)
+    raise ValueError(f"Unknown numeric backend: {name!r} (expected one of {', '.join(BACKENDS)})")
+
+
+FLOAT = float_backend()
@@ -0,0 +1,288 @@
+"""Optimizing pass for PyCalcX expression trees.
+
+Runs between parsing and compilation and performs two rewrites:
+
+- constant folding: subtrees built only from literals, constant names and
+  whitelisted operators/functions are evaluated once and replaced by their
+  value;
+- common-subexpression elimination: identical subtrees that occur more than
+  once are evaluated once per call and reused through a temporary, written
+  as an assignment expression (``(_t0 := x * y) + sin(_t0)``).
+
+Nothing that could change the outcome is rewritten: unknown operators and
+functions are left for the compiler to reject, and a constant subtree whose
+evaluation raises stays in place so the error is raised at evaluation time,
+as it would be without the pass.
+"""
+from __future__ import annotations
+
+import ast
+import itertools
+from collections import Counter
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Mapping, NamedTuple, Optional, Set, Tuple
+
+_COMPOUND = (ast.BinOp, ast.UnaryOp, ast.Call)
+
+# A repeated subtree is shared only if doing so skips at least this many
+# operator/function applications per evaluation.
+MIN_SHARED_OPERATIONS = 3
+
+
+class OptimizedTree(NamedTuple):
+    """Result of `optimize`, kept on compiled expressions for inspection."""
+
+    tree: ast.Expression
+    original: ast.Expression
+    temps: FrozenSet[str]  # names bound by the CSE temporaries
+    assumes: FrozenSet[str]  # constant names that were folded into values
+    folded: int  # subtrees replaced by their constant value
+    shared: int  # repeated subtrees now evaluated once per call
+
+    @property
+    def source(self) -> str:
+        return ast.unparse(self.tree)
+
+    @property
+    def nodes_before(self) -> int:
+        return count_nodes(self.original)
+
+    @property
+    def nodes_after(self) -> int:
+        return count_nodes(self.tree)
+
+
+def count_nodes(tree: ast.AST) -> int:
+    """Number of expression nodes in `tree` (operators and contexts excluded)."""
+    return sum(isinstance(n, ast.expr) for n in ast.walk(tree))
+
+
+class _Folder:
+    def __init__(
+        self,
+        operators: Mapping[type, Callable[..., Any]],
+        funcs: Mapping[str, Callable[..., Any]],
+        consts: Mapping[str, Any],
+        literal: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        self.operators = operators
+        self.funcs = funcs
+        self.consts = consts
+        self.literal = literal
+        self.assumes: Set[str] = set()
+        self.folded = 0
+
+    def _constant(self, compute: Callable[[], Any]) -> Optional[ast.Constant]:
+        try:
+            value = compute()
+        except Exception:
+            return None
+        self.folded += 1
+        return ast.Constant(value=value)
+
+    # Nodes are only copied when a child changed, so `tree` itself is never
+    # modified and unchanged subtrees are shared with it.
+    def fold(self, node: ast.AST) -> ast.AST:
+        if isinstance(node, ast.Constant):
+            if self.literal is None:
+                return node
+            value = self.literal(node.value)
+            return node if value is node.value else ast.Constant(value=value)
+
+        if isinstance(node, ast.Name):
+            if node.id in self.consts:
+                self.assumes.add(node.id)
+                self.folded += 1
+                return ast.Constant(value=self.consts[node.id])
+            return node
+
+        if isinstance(node, ast.BinOp):
+            left = self.fold(node.left)
+            right = self.fold(node.right)
+            func = self.operators.get(type(node.op))
+            if func is not None and isinstance(left, ast.Constant) and isinstance(right, ast.Constant):
+                folded = self._constant(lambda: func(left.value, right.value))
+                if folded is not None:
+                    return folded
+            if left is node.left and right is node.right:
+                return node
+            return ast.BinOp(left=left, op=node.op, right=right)
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self.fold(node.operand)
+            func = self.operators.get(type(node.op))
+            if func is not None and isinstance(operand, ast.Constant):
+                folded = self._constant(lambda: func(operand.value))
+                if folded is not None:
+                    return folded
+            if operand is node.operand:
+                return node
+            return ast.UnaryOp(op=node.op, operand=operand)
+
+        if isinstance(node, ast.Call):
+            args = [self.fold(a) for a in node.args]
+            if isinstance(node.func, ast.Name) and all(isinstance(a, ast.Constant) for a in args):
+                func = self.funcs.get(node.func.id)
+                if func is not None:
+                    folded = self._constant(lambda: func(*[a.value for a in args]))
+                    if folded is not None:
+                        return folded
+            if all(new is old for new, old in zip(args, node.args)):
+                return node
+            return ast.Call(func=node.func, args=args, keywords=node.keywords)
+
+        return node
+
+
+def _value_numbers(root: ast.AST) -> Tuple[Dict[int, int], Counter, Dict[int, int]]:
+    """Number subtrees so that identical subtrees get the same number.
+
+    Returns id(node) -> number, how often each compound number occurs, and
+    how many operations each compound number's subtree performs.
+    """
+    table: Dict[Hashable, int] = {}
+    numbers: Dict[int, int] = {}
+    counts: Counter = Counter()
+    operations: Dict[int, int] = {}
+
+    def visit(node: ast.AST) -> Tuple[int, int]:
+        ops = 0
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, (float, complex)):
+                value = repr(value)  # keeps 0.0 and -0.0 apart
+            try:
+                key: Hashable = ("const", type(node.value), value)
+                hash(key)
+            except TypeError:
+                key = ("opaque", id(node))
+        elif isinstance(node, ast.Name):
+            key = ("name", node.id)
+        elif isinstance(node, ast.BinOp):
+            (left, lops), (right, rops) = visit(node.left), visit(node.right)
+            key = ("bin", type(node.op), left, right)
+            ops = 1 + lops + rops
+        elif isinstance(node, ast.UnaryOp):
+            operand, ops = visit(node.operand)
+            key = ("unary", type(node.op), operand)
+            ops += 1
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            args = [visit(a) for a in node.args]
+            key = ("call", node.func.id, *(num for num, _ in args))
+            ops = 1 + sum(n for _, n in args)
+        elif isinstance(node, ast.Call):
+            for a in node.args:
+                visit(a)
+            key = ("opaque", id(node))
+        else:
+            # never shared: give the node a number of its own
+            key = ("opaque", id(node))
+        num = table.setdefault(key, len(table))
+        numbers[id(node)] = num
+        if ops:
+            counts[num] += 1
+            operations[num] = ops
+        return num, ops
+
+    visit(root)
+    return numbers, counts, operations
+
+
+def _reserved_names(body: ast.AST) -> Set[str]:
+    reserved = set()
+    for n in ast.walk(body):
+        if isinstance(n, ast.Name):
+            reserved.add(n.id)
+        elif isinstance(n, ast.Call) and isinstance(n.func, ast.Name):
+            reserved.add(n.func.id)
+    return reserved
+
+
+def _eliminate_common(body: ast.AST) -> Tuple[ast.AST, FrozenSet[str], int]:
+    numbers, counts, operations = _value_numbers(body)
+    # Binding and reading a temporary costs about as much as one cheap
+    # operation, so only share subtrees where that buys back real work.
+    worth = {
+        num
+        for num, count in counts.items()
+        if count > 1 and operations[num] * (count - 1) >= MIN_SHARED_OPERATIONS
+    }
+    if not worth:
+        return body, frozenset(), 0
+
+    reserved = _reserved_names(body)
+    prefix = "_t"
+    while any(name.startswith(prefix) for name in reserved):
+        prefix = "_" + prefix
+    names = (f"{prefix}{i}" for i in itertools.count())
+    bound: Dict[int, str] = {}
+    loads: Counter = Counter()
+
+    # Pre-order, left to right: the first occurrence of a subtree is always
+    # evaluated before any later one, so it is the one that binds the temp.
+    def share(node: ast.AST) -> ast.AST:
+        if isinstance(node, _COMPOUND):
+            num = numbers[id(node)]
+            if num in worth:
+                if num in bound:
+                    loads[bound[num]] += 1
+                    return ast.Name(id=bound[num], ctx=ast.Load())
+                name = bound[num] = next(names)
+                return ast.NamedExpr(target=ast.Name(id=name, ctx=ast.Store()), value=rebuild(node))
+        return rebuild(node)
+
+    def rebuild(node: ast.AST) -> ast.AST:
+        if isinstance(node, ast.BinOp):
+            return ast.BinOp(left=share(node.left), op=node.op, right=share(node.right))
+        if isinstance(node, ast.UnaryOp):
+            return ast.UnaryOp(op=node.op, operand=share(node.operand))
+        if isinstance(node, ast.Call):
+            return ast.Call(func=node.func, args=[share(a) for a in node.args], keywords=node.keywords)
+        return node
+
+    body = share(body)
+
+    # Occurrences nested inside a reused subtree disappear with it, which can
+    # leave a temp that is bound but never read; drop those bindings.
+    def prune(node: ast.AST) -> ast.AST:
+        if isinstance(node, ast.NamedExpr):
+            value = prune(node.value)
+            if loads[node.target.id]:
+                return ast.NamedExpr(target=node.target, value=value)
+            return value
+        if isinstance(node, ast.BinOp):
+            return ast.BinOp(left=prune(node.left), op=node.op, right=prune(node.right))
+        if isinstance(node, ast.UnaryOp):
+            return ast.UnaryOp(op=node.op, operand=prune(node.operand))
+        if isinstance(node, ast.Call):
+            return ast.Call(func=node.func, args=[prune(a) for a in node.args], keywords=node.keywords)
+        return node
+
+    body = prune(body)
+    temps = frozenset(name for name, n in loads.items() if n)
+    return body, temps, len(temps)
+
+
+def optimize(
+    tree: ast.Expression,
+    operators: Mapping[type, Callable[..., Any]],
+    funcs: Mapping[str, Callable[..., Any]],
+    consts: Mapping[str, Any],
+    literal: Optional[Callable[[Any], Any]] = None,
+) -> OptimizedTree:
+    """Fold constants and share repeated subtrees of a parsed expression.
+
+    `consts` lists the names that may be folded; leave out any constant a
+    variable could shadow. `literal` converts number literals before they
+    are folded, as the compiler would. `tree` itself is not modified.
+    """
+    folder = _Folder(operators, funcs, consts, literal)
+    body = folder.fold(tree.body)
+    body, temps, shared = _eliminate_common(body)
+    return OptimizedTree(
+        tree=ast.Expression(body=body),
+        original=tree,
+        temps=temps,
+        assumes=frozenset(folder.assumes),
+        folded=folder.folded,
+        shared=shared,
+    )
@@ -0,0 +1,179 @@
+"""Concurrent, multi-session evaluation service for PyCalcX.
+
+`CalculatorService` keeps one `Calculator` per session id, so each user has
+their own variables and history, while every session reads and fills one
+shared cache of compiled expressions. Compiled expressions never change and
+evaluate against a per-call frame, so they are safe to share between
+threads. Requests for the same session are serialized by a per-session
+lock; different sessions run in parallel on the service's thread pool.
+
+Sessions are created on first use. When there are more than `max_sessions`
+the least recently used one is dropped, and sessions idle for longer than
+`idle_timeout` seconds are dropped the next time the service is used. A
+dropped session starts over, with no variables, on its next request. A
+session is never dropped while a request on it is in flight, so its
+result always lands in the session the next request sees.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Optional
+
+from .calculator import Calculator, CompiledExpr, ExpressionCache
+from .numeric import Backend, Limits, make_backend
+
+
+class SharedExpressionCache(ExpressionCache):
+    """ExpressionCache that can be used from several threads at once."""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        super().__init__(maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CompiledExpr]:
+        with self._lock:
+            return super().get(key)
+
+    def put(self, key: Hashable, value: CompiledExpr) -> None:
+        with self._lock:
+            super().put(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+
+
+class _Session:
+    __slots__ = ("calc", "lock", "last_used", "busy")
+
+    def __init__(self, calc: Calculator) -> None:
+        self.calc = calc
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.busy = 0  # requests in flight; the session is pinned while > 0
+
+
+class CalculatorService:
+    """Thread-safe front end over many per-session calculators.
+
+    `evaluate` runs on the calling thread, `submit` on the service's thread
+    pool and `evaluate_async` awaits the pool from asyncio. All three return
+    (or resolve to) the value of the expression or assignment and raise
+    what `Calculator.eval` raises. Use the service as a context manager, or
+    call `shutdown`, to stop the pool.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_timeout: Optional[float] = None,
+        workers: int = 8,
+        cache_size: int = 4096,
+        history_size: int = 100,
+        backend: str = "float",
+        precision: int = 28,
+        limits: Optional[Limits] = None,
+    ) -> None:
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be >= 1")
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.history_size = history_size
+        self.cache = SharedExpressionCache(cache_size)
+        # built once so sessions share the same tables (and cache entries)
+        self.backend: Backend = make_backend(backend, precision, limits)
+        self.evicted = 0
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="pycalcx")
+
+    def _acquire(self, session_id: str) -> _Session:
+        """The session for `session_id`, pinned until `_release`."""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                calc = Calculator(history_size=self.history_size, backend=self.backend, cache=self.cache)
+                session = self._sessions[session_id] = _Session(calc)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            session.busy += 1
+            self._evict(now)
+        return session
+
+    def _release(self, session: _Session) -> None:
+        with self._lock:
+            session.busy -= 1
+            session.last_used = time.monotonic()
+
+    def _evict(self, now: float) -> None:
+        # the dict is in least recently used order, so stop at the first
+        # session that may stay; pinned sessions are skipped (the service
+        # briefly holds more than max_sessions if they are all busy)
+        excess = len(self._sessions) - self.max_sessions
+        deadline = now - self.idle_timeout if self.idle_timeout is not None else None
+        victims = []
+        for session_id, session in self._sessions.items():
+            if len(victims) >= excess and (deadline is None or session.last_used >= deadline):
+                break
+            if not session.busy:
+                victims.append(session_id)
+        for session_id in victims:
+            del self._sessions[session_id]
+        self.evicted += len(victims)
+
+    def evaluate(self, session_id: str, text: str) -> Any:
+        session = self._acquire(session_id)
+        try:
+            with session.lock:
+                return session.calc.eval(text)[0]
+        finally:
+            self._release(session)
+
+    def submit(self, session_id: str, text: str) -> "Future[Any]":
+        return self._pool.submit(self.evaluate, session_id, text)
+
+    async def evaluate_async(self, session_id: str, text: str) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.evaluate, session_id, text)
+
+    def variables(self, session_id: str) -> Dict[str, Any]:
+        """A copy of a session's variables (empty for an unknown session)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return {}
+        with session.lock:
+            return dict(session.calc.vars)
+
+    def close_session(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            sessions = len(self._sessions)
+        return {
+            "sessions": sessions,
+            "evicted": self.evicted,
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait)
+
+    def __enter__(self) -> "CalculatorService":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
@@ -0,0 +1,82 @@
+"""Step tracing for PyCalcX evaluations.
+
+Traced evaluations report one structured `TraceEvent` per AST node to a
+`Trace`. Nothing is formatted while evaluating; a `Trace` reads as a
+sequence of human-readable lines, rendered on access. Untraced evaluations
+never touch this module.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterator, List, NamedTuple, Sequence, Tuple, Union, overload
+
+
+class TraceEvent(NamedTuple):
+    """One evaluated node.
+
+    `kind` is one of "num", "const" (literals), "binop", "unaryop", "call",
+    "var" and "constname" (name lookups). `label` is the operator class
+    name, function name or identifier; `elapsed` is in seconds and includes
+    the time spent evaluating the node's operands.
+    """
+
+    kind: str
+    label: str
+    operands: Tuple[Any, ...]
+    result: Any
+    elapsed: float
+
+
+def format_event(event: TraceEvent) -> str:
+    kind = event.kind
+    if kind == "num":
+        return f"num: {event.result}"
+    if kind == "const":
+        return f"const: {event.result}"
+    if kind == "binop":
+        left, right = event.operands
+        return f"{left} {event.label} {right} -> {event.result}"
+    if kind == "unaryop":
+        return f"{event.label} {event.operands[0]} -> {event.result}"
+    if kind == "call":
+        return f"{event.label}({', '.join(map(str, event.operands))}) -> {event.result}"
+    if kind == "var":
+        return f"var {event.label} -> {event.result}"
+    if kind == "constname":
+        return f"const {event.label} -> {event.result}"
+    return f"{kind} {event.label} -> {event.result}"
+
+
+class Trace(Sequence[str]):
+    """Events of one traced evaluation, read as formatted lines.
+
+    This is the instrumentation hook: the evaluator calls `record` once per
+    node. Subclass and override `record` to stream events elsewhere.
+    """
+
+    __slots__ = ("events",)
+
+    def __init__(self) -> None:
+        self.events: List[TraceEvent] = []
+
+    def record(self, event: TraceEvent) -> None:
+        self.events.append(event)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [format_event(e) for e in self.events[index]]
+        return format_event(self.events[index])
+
+    def __iter__(self) -> Iterator[str]:
+        return map(format_event, self.events)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __repr__(self) -> str:
+        return f"Trace({list(self)!r})"
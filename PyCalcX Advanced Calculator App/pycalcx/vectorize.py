@@ -0,0 +1,128 @@
+"""Vectorized evaluation of PyCalcX expressions over NumPy arrays.
+
+The scalar whitelist (SAFE_OPERATORS, SAFE_FUNCS, SAFE_CONSTS) is mapped
+onto NumPy ufuncs, so an expression accepted by the usual validation rules
+is evaluated once over whole columns instead of once per row.
+"""
+from __future__ import annotations
+
+import ast
+import functools
+import math
+from collections import ChainMap
+from typing import Any, Callable, Dict, Mapping, Optional
+
+import numpy as np
+
+from .calculator import CalcError, SAFE_CONSTS, _Compiler, compile_expr
+from .numeric import Limits
+
+# every factorial that fits a float64; 171! does not
+_FACTORIALS = np.array([float(math.factorial(n)) for n in range(171)])
+
+
+def _factorial(limits: Limits) -> Callable[[Any], np.ndarray]:
+    max_factorial = limits.max_factorial
+
+    def factorial(x: Any) -> np.ndarray:
+        arr = np.asarray(x, dtype=float)
+        if np.any(np.isnan(arr)) or np.any(arr < 0) or np.any(arr != np.floor(arr)):
+            raise CalcError("factorial() only accepts non-negative integral values")
+        largest = arr.max(initial=0)
+        if largest > max_factorial:
+            raise CalcError(f"Factorial argument too large: {largest:g} (limit {max_factorial})")
+        if largest >= len(_FACTORIALS):
+            raise CalcError(f"Numeric error: factorial({largest:g}) overflows float64")
+        return _FACTORIALS[arr.astype(np.intp)]
+
+    return factorial
+
+
+NUMPY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+    ast.Mod: np.mod,
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+
+
+NUMPY_FUNCS = {
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "sqrt": np.sqrt,
+    "log": np.log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "fabs": np.fabs,
+}
+
+
+def _to_float64(value: Any) -> Any:
+    # number literals are float64 like the columns: NumPy would otherwise
+    # compute (and fold) integer literals as int64, which silently wraps
+    # around (2**70 == 0)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return np.float64(value)
+        except OverflowError:
+            raise CalcError(f"Number too large: {value}") from None
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def _compiler(limits: Limits) -> _Compiler:
+    funcs = dict(NUMPY_FUNCS, factorial=_factorial(limits))
+    return _Compiler(NUMPY_OPERATORS, funcs, SAFE_CONSTS, literal=_to_float64)
+
+
+def eval_batch(
+    expr: str,
+    columns: Mapping[str, Any],
+    variables: Optional[Mapping[str, Any]] = None,
+    limits: Optional[Limits] = None,
+) -> np.ndarray:
+    """Evaluate `expr` element-wise over equal-length columns.
+
+    Each column is converted to a 1-D float64 array. Names are resolved from
+    `columns`, then `variables` (scalars, broadcast to every row), then
+    SAFE_CONSTS. Returns one value per row. `limits` bounds factorial()
+    arguments as in the scalar backends (default `Limits()`).
+
+    Every numeric error raises CalcError: division by zero, domain errors,
+    overflow, and factorials too large for float64. This is not always the
+    scalar evaluator's exception; there `1/0` raises ZeroDivisionError,
+    `sqrt(-1)` ValueError and `factorial(171)` returns an exact int.
+    """
+    expr = expr.strip()
+    if not expr:
+        raise CalcError("Empty expression")
+
+    arrays: Dict[str, np.ndarray] = {}
+    length = 0
+    for name, values in columns.items():
+        if not name.isidentifier():
+            raise CalcError(f"Invalid variable name: {name}")
+        arr = np.asarray(values, dtype=float)
+        if arr.ndim != 1:
+            raise CalcError(f"Column {name} must be one-dimensional")
+        if arrays and len(arr) != length:
+            raise CalcError("Columns must all have the same length")
+        length = len(arr)
+        arrays[name] = arr
+
+    scope: Mapping[str, Any] = ChainMap(arrays, dict(variables)) if variables else arrays
+    shadowed = frozenset(k for k in SAFE_CONSTS if k in scope)
+    try:
+        # constant folding runs under the same error state as evaluation
+        with np.errstate(all="raise"):
+            result = compile_expr(expr, _compiler(limits or Limits()), shadowed)(scope)
+    except FloatingPointError as e:
+        raise CalcError(f"Numeric error: {e}") from None
+    return np.broadcast_to(np.asarray(result), (length,)).copy()
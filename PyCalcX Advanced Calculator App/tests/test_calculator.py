@@ -53,3 +53,69 @@ def test_errors():
     c = Calculator()
     with pytest.raises(CalcError):
         c.eval("import os")
+
+
+def test_compile_evaluates_against_current_vars():
+    c = Calculator()
+    c.eval("x = 2")
+    f = c.compile("x * 3 + pi")
+    assert f() == pytest.approx(6 + math.pi)
+    c.vars["x"] = 10
+    assert f() == pytest.approx(30 + math.pi)
+    c.vars["pi"] = 0
+    assert f() == 30
+
+
+def test_compile_rejects_unsafe_expressions():
+    c = Calculator()
+    with pytest.raises(CalcError):
+        c.compile("__import__('os')")
+    with pytest.raises(CalcError):
+        c.compile("(1).real")
+    f = c.compile("missing + 1")
+    with pytest.raises(CalcError):
+        f()
+
+
+def test_expression_cache_hits_and_eviction():
+    c = Calculator(cache_size=2)
+    c.eval("1+1")
+    c.eval("1+1")
+    assert (c.cache.hits, c.cache.misses) == (1, 1)
+    c.eval("2+2")
+    c.eval("3+3")
+    assert len(c.cache) == 2
+    assert "1+1" not in c.cache
+    c.eval("y = 2+2")
+    assert c.cache.hits == 2
+
+
+def test_trace_records_structured_events():
+    c = Calculator()
+    c.vars["a"] = 2
+    val, trace = c.eval("sqrt(16) * a", trace=True)
+    assert val == 8
+    assert [e.kind for e in trace.events] == ["num", "call", "var", "binop"]
+    last = trace.events[-1]
+    assert (last.label, last.operands, last.result) == ("Mult", (4.0, 2), 8.0)
+    assert last.elapsed >= 0
+    assert trace[-1] == "4.0 Mult 2 -> 8.0"
+
+
+def test_trace_hook_receives_events():
+    from pycalcx.tracing import Trace
+
+    class Collect(Trace):
+        def __init__(self):
+            super().__init__()
+            self.kinds = []
+
+        def record(self, event):
+            self.kinds.append(event.kind)
+
+    hook = Collect()
+    val, lines = Calculator().eval("1 + 2", trace=hook)
+    assert val == 3
+    assert lines is hook
+    assert hook.kinds == ["num", "num", "binop"]
+    assert Calculator().eval("1 + 2")[1] == []
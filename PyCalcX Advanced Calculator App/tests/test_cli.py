@@ -0,0 +1,50 @@
+import io
+import json
+from cli import run_batch
+
+
+def test_batch_text_reports_errors_inline():
+    out = io.StringIO()
+    total, errors = run_batch(["1+1\n", "a = 2\n", "a*3\n", "1/0\n", "foo(\n"], out)
+    assert (total, errors) == (5, 2)
+    lines = out.getvalue().splitlines()
+    assert lines[:3] == ["2", "2", "6"]
+    assert lines[3].startswith("Error: ZeroDivisionError")
+    assert lines[4].startswith("Error: Syntax error")
+
+
+def test_batch_json_lines():
+    out = io.StringIO()
+    run_batch(["2**3", "sqrt(-1)"], out, as_json=True)
+    first, second = map(json.loads, out.getvalue().splitlines())
+    assert first == {"expr": "2**3", "result": 8}
+    assert second["expr"] == "sqrt(-1)" and "error" in second
+
+
+def test_batch_jobs_keeps_order_and_rejects_assignments():
+    out = io.StringIO()
+    lines = [f"{i}*2" for i in range(50)] + ["x = 1"]
+    total, errors = run_batch(lines, out, jobs=2, chunk_size=7)
+    results = out.getvalue().splitlines()
+    assert total == 51 and errors == 1
+    assert results[:50] == [str(i * 2) for i in range(50)]
+    assert results[50].startswith("Error: Assignments")
+
+
+def test_batch_keeps_blank_lines_in_text_mode():
+    lines = ["1+1\n", "\n", "   \n", "2+2\n"]
+    out = io.StringIO()
+    total, errors = run_batch(lines, out)
+    assert (total, errors) == (2, 0)
+    assert out.getvalue().splitlines() == ["2", "", "", "4"]
+    out = io.StringIO()
+    assert run_batch(lines, out, as_json=True) == (2, 0)
+    assert [json.loads(line)["result"] for line in out.getvalue().splitlines()] == [2, 4]
+
+
+def test_batch_json_is_strict_for_non_finite_results():
+    out = io.StringIO()
+    run_batch(["1e308 * 10", "-1e308 * 10", "1e308 * 10 - 1e308 * 10"], out, as_json=True)
+    text = out.getvalue()
+    assert "Infinity" not in text and "NaN" not in text
+    assert [json.loads(line)["result"] for line in text.splitlines()] == ["inf", "-inf", "nan"]
@@ -0,0 +1,46 @@
+import pytest
+from pycalcx.calculator import Calculator, CalcError
+from pycalcx.history import read_spill
+
+
+def test_undo_restores_previous_value():
+    c = Calculator()
+    c.eval("a = 1")
+    c.eval("a = 2")
+    c.undo()
+    assert c.vars["a"] == 1
+    c.undo()
+    assert "a" not in c.vars
+    with pytest.raises(CalcError):
+        c.undo()
+
+
+def test_redo_reapplies_and_new_eval_clears_redo():
+    c = Calculator()
+    c.eval("a = 1")
+    c.eval("a = a + 1")
+    c.undo()
+    c.redo()
+    assert c.vars["a"] == 2
+    assert [text for text, _ in c.history] == ["a = 1", "a = a + 1"]
+    c.undo()
+    c.eval("3 * 3")
+    with pytest.raises(CalcError):
+        c.redo()
+
+
+def test_history_is_bounded_and_spills(tmp_path):
+    path = tmp_path / "history.jsonl"
+    c = Calculator(history_size=3, history_file=str(path))
+    for i in range(5):
+        c.eval(f"x = {i}")
+    assert len(c.history) == 3
+    assert [v for _, v in c.history] == [2, 3, 4]
+    c.history.flush()
+    assert list(read_spill(str(path))) == [("x = 0", 0), ("x = 1", 1)]
+    c.undo()
+    c.undo()
+    c.undo()
+    assert "x" in c.vars and c.vars["x"] == 1
+    with pytest.raises(CalcError):
+        c.undo()
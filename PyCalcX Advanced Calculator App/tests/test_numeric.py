@@ -0,0 +1,62 @@
+import decimal
+from fractions import Fraction
+
+import pytest
+from pycalcx.calculator import Calculator, CalcError
+from pycalcx.numeric import Limits
+
+
+def test_fraction_backend_is_exact():
+    c = Calculator(backend="fraction")
+    assert c.eval("0.1 + 0.2")[0] == Fraction(3, 10)
+    assert c.eval("1/3 * 3")[0] == 1
+    assert c.eval("sqrt(9/4)")[0] == Fraction(3, 2)
+    assert isinstance(c.eval("sqrt(2)")[0], float)
+
+
+def test_decimal_backend_uses_its_precision():
+    c = Calculator(backend="decimal", precision=50)
+    third = c.eval("1/3")[0]
+    assert isinstance(third, decimal.Decimal)
+    assert len(third.as_tuple().digits) == 50
+    assert c.eval("0.1 + 0.2")[0] == decimal.Decimal("0.3")
+    assert abs(c.eval("sin(pi/6)")[0] - decimal.Decimal("0.5")) < decimal.Decimal("1e-48")
+    assert c.eval("-7 % 3")[0] == 2
+    # the thread's own decimal context is left alone
+    assert decimal.getcontext().prec == 28
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        Calculator(backend="binary")
+
+
+@pytest.mark.parametrize("backend", ["float", "fraction", "decimal"])
+def test_factorial_limit(backend):
+    c = Calculator(backend=backend, limits=Limits(max_factorial=100))
+    assert c.eval("factorial(5)")[0] == 120
+    with pytest.raises(CalcError):
+        c.eval("factorial(101)")
+
+
+@pytest.mark.parametrize("backend", ["float", "fraction"])
+def test_power_limits_checked_before_computing(backend):
+    c = Calculator(backend=backend)
+    with pytest.raises(CalcError):
+        c.eval("9**9**9")
+    with pytest.raises(CalcError):
+        c.eval("(2**1000)**2000")
+    assert c.eval("2**10")[0] == 1024
+    c = Calculator(backend=backend, limits=Limits(max_exponent=5))
+    with pytest.raises(CalcError):
+        c.eval("2**6")
+
+
+@pytest.mark.parametrize("backend", ["float", "fraction"])
+def test_power_of_trivial_base_is_not_limited(backend):
+    c = Calculator(backend=backend)
+    assert c.eval("1**(10**12)")[0] == 1
+    assert c.eval("(-1)**(10**12 + 1)")[0] == -1
+    assert c.eval("0**(10**12)")[0] == 0
+    with pytest.raises(CalcError):
+        c.eval("(1/2)**(10**12)" if backend == "fraction" else "3**(10**12)")
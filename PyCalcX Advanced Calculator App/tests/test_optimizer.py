@@ -0,0 +1,57 @@
+import math
+import pytest
+from pycalcx.calculator import Calculator, CalcError
+
+
+def test_constant_subtrees_are_folded():
+    c = Calculator()
+    info = c.explain("sqrt(2)*pi/4 + x")
+    assert info.source == f"{math.sqrt(2) * math.pi / 4!r} + x"
+    assert info.nodes_after < info.nodes_before
+    assert info.assumes == {"pi"}
+    c.vars["x"] = 1
+    assert c.eval("sqrt(2)*pi/4 + x")[0] == pytest.approx(math.sqrt(2) * math.pi / 4 + 1)
+
+
+def test_repeated_subtrees_are_shared():
+    c = Calculator()
+    expr = "sqrt(x*x + y*y) * sin(sqrt(x*x + y*y)) + cos(sqrt(x*x + y*y))"
+    info = c.explain(expr)
+    assert info.shared == 1
+    assert info.source.count("sqrt") == 1
+    c.vars.update(x=3, y=4)
+    assert c.eval(expr)[0] == pytest.approx(5 * math.sin(5) + math.cos(5))
+
+
+def test_optimized_errors_match_unoptimized():
+    c = Calculator()
+    with pytest.raises(ZeroDivisionError):
+        c.eval("1/0 + 2")
+    with pytest.raises(ValueError):
+        c.eval("sqrt(-1) * 2")
+    with pytest.raises(CalcError):
+        c.eval("sqrt(2) + nope(1)")
+    with pytest.raises(CalcError):
+        c.eval("(y := 2) + y")
+    f = c.compile("log(-1)")  # folding failure is deferred to evaluation
+    with pytest.raises(ValueError):
+        f()
+
+
+def test_shadowed_constants_are_not_folded():
+    c = Calculator()
+    assert c.eval("pi * 2")[0] == pytest.approx(2 * math.pi)
+    f = c.compile("pi * 2")
+    c.eval("pi = 3")
+    assert c.eval("pi * 2")[0] == 6
+    assert f() == 6
+    del c.vars["pi"]
+    assert f() == pytest.approx(2 * math.pi)
+
+
+def test_temporary_names_do_not_clash_with_variables():
+    c = Calculator()
+    c.vars.update(_t0=2, x=3)
+    expr = "(_t0*x + 1) * (_t0*x + 1) * (_t0*x + 1)"
+    assert c.explain(expr).shared == 1
+    assert c.eval(expr)[0] == 343
@@ -0,0 +1,93 @@
+import pytest
+from pycalcx.calculator import Calculator, CalcError
+
+
+def test_dependents_follow_inputs():
+    c = Calculator(reactive=True)
+    c.eval("a = 2")
+    c.eval("b = a * 2")
+    c.eval("c = b + a")
+    assert (c.vars["b"], c.vars["c"]) == (4, 6)
+    c.eval("a = 10")
+    assert (c.vars["b"], c.vars["c"]) == (20, 30)
+    assert c.formulas["c"] == "b + a"
+
+
+def test_only_downstream_is_recomputed():
+    c = Calculator(reactive=True)
+    c.eval("a = 1")
+    c.eval("x = 5")
+    c.eval("b = a + 1")
+    c.eval("y = x + 1")
+    c.cache.clear()
+    c.eval("a = 2")
+    # the new input and b's formula; y's formula was never looked up
+    assert c.cache.misses == 2
+    assert (c.vars["b"], c.vars["y"]) == (3, 6)
+
+
+def test_redefining_a_formula_updates_the_graph():
+    c = Calculator(reactive=True)
+    c.eval("a = 1")
+    c.eval("b = 2")
+    c.eval("c = a + 1")
+    c.eval("c = b * 10")
+    c.eval("a = 100")
+    assert c.vars["c"] == 20
+    c.eval("b = 3")
+    assert c.vars["c"] == 30
+
+
+def test_cycles_are_rejected():
+    c = Calculator(reactive=True)
+    c.eval("a = 1")
+    c.eval("b = a + 1")
+    c.eval("c = b + 1")
+    with pytest.raises(CalcError, match="Circular"):
+        c.eval("a = c * 2")
+    with pytest.raises(CalcError, match="Circular"):
+        c.eval("d = d + 1")
+    assert c.vars == {"a": 1, "b": 2, "c": 3}
+    assert "a" not in c._dependents.get("c", ())
+
+
+def test_failed_recomputation_changes_nothing():
+    c = Calculator(reactive=True)
+    c.eval("a = 1")
+    c.eval("b = 1 / a")
+    with pytest.raises(CalcError, match="Cannot update b"):
+        c.eval("a = 0")
+    assert c.vars == {"a": 1, "b": 1}
+
+
+def test_shadowed_constant_propagates():
+    c = Calculator(reactive=True)
+    c.eval("r = 2 * pi")
+    c.eval("pi = 3")
+    assert c.vars["r"] == 6
+
+
+def test_undo_restores_previous_formula_and_dependents():
+    c = Calculator(reactive=True)
+    c.eval("a = 1")
+    c.eval("b = a + 1")
+    c.eval("a = 2")
+    assert c.vars["b"] == 3
+    c.undo()
+    assert (c.vars["a"], c.vars["b"]) == (1, 2)
+    c.redo()
+    assert (c.vars["a"], c.vars["b"]) == (2, 3)
+    c.undo()
+    c.undo()
+    assert "b" not in c.vars
+    c.eval("a = 5")
+    assert "b" not in c.vars
+
+
+def test_undo_removing_a_shadowing_variable_recomputes_readers():
+    c = Calculator(reactive=True)
+    c.eval("r = 2 * pi")
+    c.eval("pi = 3")
+    assert c.vars["r"] == 6
+    c.undo()
+    assert c.vars["r"] == pytest.approx(6.283185307179586)
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+from pycalcx.calculator import CalcError
+from pycalcx.service import CalculatorService
+
+
+def test_sessions_are_isolated_and_share_the_cache():
+    with CalculatorService() as svc:
+        svc.evaluate("alice", "x = 2")
+        svc.evaluate("bob", "x = 10")
+        assert svc.evaluate("alice", "x * 3") == 6
+        assert svc.evaluate("bob", "x * 3") == 30
+        assert svc.cache.hits >= 1
+        with pytest.raises(CalcError):
+            svc.evaluate("carol", "x")
+
+
+def test_concurrent_requests_on_one_session_are_serialized():
+    with CalculatorService(workers=8) as svc:
+        svc.evaluate("s", "n = 0")
+        futures = [svc.submit("s", "n = n + 1") for _ in range(200)]
+        for f in futures:
+            f.result()
+        assert svc.variables("s") == {"n": 200}
+
+
+def test_least_recently_used_session_is_evicted():
+    with CalculatorService(max_sessions=2) as svc:
+        svc.evaluate("a", "v = 1")
+        svc.evaluate("b", "v = 2")
+        svc.evaluate("a", "v")
+        svc.evaluate("c", "v = 3")
+        assert svc.variables("b") == {}
+        assert svc.variables("a") == {"v": 1}
+        assert svc.stats()["evicted"] == 1
+
+
+def test_session_is_not_evicted_while_in_flight():
+    with CalculatorService(max_sessions=1) as svc:
+        session = svc._acquire("a")  # as evaluate does, around the call
+        svc.evaluate("b", "v = 2")
+        session.calc.eval("v = 1")
+        svc._release(session)
+        assert svc.variables("a") == {"v": 1}
+        svc.evaluate("c", "v = 3")
+        assert len(svc) == 1 and svc.variables("a") == {}
+
+
+def test_idle_sessions_expire():
+    with CalculatorService(idle_timeout=0.01) as svc:
+        svc.evaluate("old", "v = 1")
+        time.sleep(0.02)
+        svc.evaluate("new", "v = 2")
+        assert len(svc) == 1 and svc.variables("old") == {}
+
+
+def test_evaluate_async():
+    async def run(svc):
+        return await asyncio.gather(*(svc.evaluate_async(f"s{i}", f"{i} * 2") for i in range(10)))
+
+    with CalculatorService() as svc:
+        assert asyncio.run(run(svc)) == [i * 2 for i in range(10)]
@@ -0,0 +1,64 @@
+import math
+
+import pytest
+from pycalcx.calculator import Calculator, CalcError
+from pycalcx.numeric import Limits
+
+np = pytest.importorskip("numpy")
+
+
+def test_eval_batch_matches_row_by_row():
+    c = Calculator()
+    xs = [0.5, 1.0, 2.0, 3.5]
+    ys = [1.0, 4.0, 9.0, 16.0]
+    expr = "sqrt(y) * sin(x) + x ** 2 % 3 - log(y + 1) / pi"
+    out = c.eval_batch(expr, {"x": xs, "y": ys})
+    expected = []
+    for x, y in zip(xs, ys):
+        c.vars.update(x=x, y=y)
+        expected.append(c.eval(expr)[0])
+    assert out.shape == (4,)
+    assert out == pytest.approx(expected)
+
+
+def test_eval_batch_uses_vars_and_broadcasts_constants():
+    c = Calculator()
+    c.eval("k = 10")
+    assert list(c.eval_batch("k * x + factorial(3)", {"x": [1, 2]})) == [16.0, 26.0]
+    assert list(c.eval_batch("2 + 2", {"x": [1, 2, 3]})) == [4, 4, 4]
+
+
+def test_eval_batch_keeps_safety_checks():
+    c = Calculator()
+    with pytest.raises(CalcError):
+        c.eval_batch("__import__('os')", {"x": [1]})
+    with pytest.raises(CalcError):
+        c.eval_batch("x.real", {"x": [1]})
+    with pytest.raises(CalcError):
+        c.eval_batch("1 / x", {"x": [1, 0]})
+    with pytest.raises(CalcError):
+        c.eval_batch("x + y", {"x": [1, 2], "y": [1]})
+    with pytest.raises(CalcError):
+        c.eval_batch("x + z", {"x": [1]})
+
+
+def test_eval_batch_computes_literals_as_floats():
+    c = Calculator()
+    for expr in ("x + 2**70", "x*0 + 10**20*10", "x * 2**-1"):
+        out = c.eval_batch(expr, {"x": [1.0, 4.0]})
+        c.vars["x"] = 1.0
+        assert out[0] == pytest.approx(float(c.eval(expr)[0]))
+    assert list(c.eval_batch("x + 2**70", {"x": [1.0, 4.0]})) == [2.0**70 + 1, 2.0**70 + 4]
+    with pytest.raises(CalcError):
+        c.eval_batch("x + " + "9" * 400, {"x": [1.0]})
+
+
+def test_eval_batch_bounds_factorial_like_the_scalar_backends():
+    c = Calculator()
+    assert list(c.eval_batch("factorial(x)", {"x": [0, 5, 170]})) == [1, 120, float(math.factorial(170))]
+    with pytest.raises(CalcError, match="too large"):
+        c.eval_batch("factorial(x)", {"x": [3, 10_001]})
+    with pytest.raises(CalcError, match="overflow"):
+        c.eval_batch("factorial(x)", {"x": [171]})
+    with pytest.raises(CalcError, match="limit 5"):
+        Calculator(limits=Limits(max_factorial=5)).eval_batch("factorial(x)", {"x": [6]})
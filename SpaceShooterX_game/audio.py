@@ -0,0 +1,81 @@
+"""Procedural sound synthesis for Space Shooter.
+
+Sounds are computed as whole NumPy buffers of 16-bit mono samples rather
+than one sample at a time: a 5-second layered background loop takes
+milliseconds instead of seconds. Each synthesis function is cached on its
+parameters and returns a read-only array, so asking for the same sound
+twice costs nothing. A buffer can be written to a WAV file in one call
+(`write_wav`), or handed to the mixer without touching disk
+(`make_sound`, `wav_bytes` for `pygame.mixer.music`).
+"""
+import io
+import wave
+from functools import lru_cache
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+
+
+def _times(duration, sample_rate):
+    return np.arange(int(sample_rate * duration)) / sample_rate
+
+
+def _finish(samples):
+    # int16, truncated toward zero like int(), and shared from the cache
+    out = np.clip(samples, -32767, 32767).astype(np.int16)
+    out.flags.writeable = False
+    return out
+
+
+@lru_cache(maxsize=32)
+def tone(freq, duration, volume=0.2, sample_rate=SAMPLE_RATE):
+    """A sine tone at `volume` (0..1) of full scale."""
+    t = _times(duration, sample_rate)
+    return _finish(32767 * volume * np.sin(2 * np.pi * freq * t))
+
+
+@lru_cache(maxsize=32)
+def layered(freqs, duration, max_amp=16000, gain=0.25, sample_rate=SAMPLE_RATE):
+    """Sine tones played together, each softer than the one before and
+    swelling in and out on its own slow envelope; `freqs` is a tuple."""
+    t = _times(duration, sample_rate)
+    v = np.zeros_like(t)
+    for j, f in enumerate(freqs):
+        envelope = 0.5 + 0.5 * np.sin(0.5 * t + j)
+        v += (max_amp // (j + 1)) * np.sin(2 * np.pi * f * t) * envelope
+    return _finish(v * gain)
+
+
+def wav_bytes(samples, sample_rate=SAMPLE_RATE):
+    """`samples` as the bytes of a mono 16-bit WAV file."""
+    buf = io.BytesIO()
+    write_wav(buf, samples, sample_rate)
+    return buf.getvalue()
+
+
+def write_wav(file, samples, sample_rate=SAMPLE_RATE):
+    """Write `samples` as a mono 16-bit WAV to a path or binary file object."""
+    with wave.open(file, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+
+
+def make_sound(samples):
+    """A `pygame.mixer.Sound` playing `samples`, adapted to the mixer's
+    rate and channel count. The mixer must be initialized with 16-bit or
+    float samples (the game asks for 16-bit)."""
+    import pygame
+
+    frequency, size, channels = pygame.mixer.get_init()
+    if frequency != SAMPLE_RATE:
+        # nearest-sample resampling is plenty for these tones
+        idx = np.arange(int(len(samples) * frequency / SAMPLE_RATE)) * SAMPLE_RATE // frequency
+        samples = samples[idx]
+    if size == 32:  # float samples
+        samples = samples.astype(np.float32) / 32768
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
@@ -0,0 +1,171 @@
+"""Struct-of-arrays entity storage for Space Shooter.
+
+Each kind of entity (bullets, enemies, powerups) lives in one
+`EntityStore`: positions, velocities, sizes and colors are columns of
+NumPy arrays instead of attributes on separate objects. Moving every
+entity of a kind is one vectorized step, off-screen entities are culled
+with a boolean mask, and removed slots are filled by swapping live
+entities in from the end so the live entities always occupy `[:count]`.
+
+A store is also the pool for its kind: rows are preallocated, `acquire`
+hands out free rows and `release` returns them, and the per-frame update
+and cull write into preallocated scratch buffers. Once a store has grown
+to its working size, steady play allocates no new entity memory.
+"""
+import numpy as np
+
+
+class EntityStore:
+    """Entities of one kind, stored column-wise.
+
+    `x`, `y` are centers, `w`, `h` full extents and `px`, `py` the centers
+    before the last `update`, for drawing between ticks; only the first
+    `count` rows are live. Arrays grow by doubling when full; pass the expected
+    peak as `capacity` to avoid that. Indices are only stable until the
+    next `release`, which reorders rows.
+    """
+
+    __slots__ = ('count', 'capacity', 'grown', 'x', 'y', 'px', 'py', 'vx', 'vy', 'w', 'h', 'color',
+                 '_mask', '_tmp', '_edge', '_half')
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.grown = 0  # times the arrays had to be reallocated
+        self.x = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.x
+        n = self.count
+        self.capacity = capacity
+        for name in ('x', 'y', 'px', 'py', 'vx', 'vy', 'w', 'h'):
+            col = np.zeros(capacity, dtype=np.float32)
+            if old is not None:
+                col[:n] = getattr(self, name)[:n]
+            setattr(self, name, col)
+        color = np.zeros((capacity, 3), dtype=np.uint8)
+        if old is not None:
+            color[:n] = self.color[:n]
+            self.grown += 1
+        self.color = color
+        self._mask = np.zeros(capacity, dtype=bool)
+        self._tmp = np.zeros(capacity, dtype=bool)
+        self._edge = np.zeros(capacity, dtype=np.float32)
+        self._half = np.zeros(capacity, dtype=np.float32)
+
+    def acquire(self, n=1):
+        """Take `n` free rows and return their slice; the caller fills them."""
+        needed = self.count + n
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            self._allocate(capacity)
+        rows = slice(self.count, needed)
+        self.count = needed
+        return rows
+
+    def add(self, x, y, vx=0.0, vy=0.0, w=8.0, h=8.0, color=(255, 255, 255)):
+        """Acquire one row, fill it and return its index."""
+        i = self.acquire(1).start
+        self.x[i], self.y[i], self.vx[i], self.vy[i] = x, y, vx, vy
+        self.px[i], self.py[i] = x, y
+        self.w[i], self.h[i] = w, h
+        self.color[i] = color
+        return i
+
+    def add_many(self, x, y, vx=0.0, vy=0.0, w=8.0, h=8.0, color=(255, 255, 255)):
+        """Acquire and fill several rows; arguments may be scalars or arrays."""
+        n = np.broadcast(x, y, vx, vy).size
+        if n == 0:
+            return
+        s = self.acquire(n)
+        self.x[s], self.y[s], self.vx[s], self.vy[s] = x, y, vx, vy
+        self.px[s], self.py[s] = self.x[s], self.y[s]
+        self.w[s], self.h[s] = w, h
+        self.color[s] = color
+
+    def update(self):
+        """Move every live entity by its velocity."""
+        n = self.count
+        self.px[:n] = self.x[:n]
+        self.py[:n] = self.y[:n]
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+
+    def bounds(self):
+        """(left, top, right, bottom) arrays of the live entities."""
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        hw, hh = self.w[:n] * 0.5, self.h[:n] * 0.5
+        return x - hw, y - hh, x + hw, y + hh
+
+    def release(self, dead):
+        """Remove the entities selected by `dead` (a boolean mask over the
+        live rows or an array of indices) by swap-remove.
+
+        Holes left below the new count are filled with the live entities
+        above it, so only as many rows move as are removed.
+        """
+        n = self.count
+        dead = np.asarray(dead)
+        if dead.dtype == bool:
+            dead_mask = dead[:n]
+        else:
+            if not dead.size:
+                return
+            dead_mask = self._mask[:n]
+            dead_mask[:] = False
+            dead_mask[dead] = True
+        removed = int(dead_mask.sum())
+        if not removed:
+            return
+        keep = n - removed
+        holes = np.flatnonzero(dead_mask[:keep])
+        movers = keep + np.flatnonzero(~dead_mask[keep:n])
+        if holes.size:
+            for col in (self.x, self.y, self.px, self.py, self.vx, self.vy, self.w, self.h, self.color):
+                col[holes] = col[movers]
+        self.count = keep
+
+    def cull(self, mask):
+        """Remove the entities where `mask` is true; return how many."""
+        removed = int(np.count_nonzero(mask))
+        if removed:
+            self.release(mask)
+        return removed
+
+    def cull_outside(self, left, top, right, bottom):
+        """Release entities whose rect lies entirely outside the box; return
+        how many. Computed in the scratch buffers, without temporaries."""
+        n = self.count
+        if not n:
+            return 0
+        mask, tmp, edge, half = self._mask[:n], self._tmp[:n], self._edge[:n], self._half[:n]
+        np.multiply(self.w[:n], 0.5, out=half)
+        np.add(self.x[:n], half, out=edge)
+        np.less(edge, left, out=mask)
+        np.subtract(self.x[:n], half, out=edge)
+        np.greater(edge, right, out=tmp)
+        mask |= tmp
+        np.multiply(self.h[:n], 0.5, out=half)
+        np.add(self.y[:n], half, out=edge)
+        np.less(edge, top, out=tmp)
+        mask |= tmp
+        np.subtract(self.y[:n], half, out=edge)
+        np.greater(edge, bottom, out=tmp)
+        mask |= tmp
+        return self.cull(mask)
+
+    def lerp(self, alpha):
+        """(x, y) arrays of the live centers drawn `alpha` of the way from
+        the previous tick's positions to the current ones."""
+        n = self.count
+        px, py = self.px[:n], self.py[:n]
+        return px + (self.x[:n] - px) * alpha, py + (self.y[:n] - py) * alpha
+
+    def clear(self):
+        self.count = 0
+
+    def __len__(self):
+        return self.count
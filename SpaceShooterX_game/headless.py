@@ -0,0 +1,252 @@
+"""Headless runner and throughput benchmark for the Space Shooter simulation.
+
+Runs `sim.py` without a window, sound or keyboard: an input policy
+chooses each tick's inputs and the ticks run back to back as fast as
+they can. Each run reports ticks per second, the time spent in every
+simulation phase (plus drawing, with --draw, onto a surface of SDL's dummy
+video driver) and the peak entity counts. Several seeds run in parallel
+worker processes.
+
+    python headless.py --ticks 20000 --seeds 4 --policy random --stress --draw
+
+When a game ends (the player is out of lives) the next one starts from
+the next seed, so a run always covers the requested number of ticks.
+
+Replays recorded by the game (replay.py) are the standard load traces:
+
+    python headless.py --replay replays/20250101-120000-seed42.ssr --draw
+"""
+import os
+
+# no window, no audio device and no banner on stdout; must be set before
+# pygame is imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+# SDL otherwise turns SIGTERM into a quit event, and a worker that has drawn
+# ignores the pool's terminate
+os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+
+import argparse
+import json
+import random
+import sys
+import time
+import multiprocessing
+
+from replay import Replay
+from profiler import FrameProfiler
+from sim import FIRE, HEIGHT, LEFT, PHASES, RIGHT, WIDTH, GameState, step
+
+
+# Input policies: built from a seeded random.Random, they map each tick to
+# that tick's input bitmask.
+def idle_policy(rng):
+    return lambda tick: 0
+
+
+def fire_policy(rng):
+    return lambda tick: FIRE
+
+
+def sweep_policy(rng):
+    # scripted: fire while sweeping from side to side every 1.5 s
+    return lambda tick: FIRE | (LEFT if (tick // 90) % 2 else RIGHT)
+
+
+def random_policy(rng):
+    # a random combination of keys, held for 10 ticks at a time
+    held = 0
+
+    def choose(tick):
+        nonlocal held
+        if tick % 10 == 0:
+            held = rng.getrandbits(3)
+        return held
+
+    return choose
+
+
+POLICIES = {
+    'idle': idle_policy,
+    'fire': fire_policy,
+    'sweep': sweep_policy,
+    'random': random_policy,
+}
+
+
+class Drawer:
+    """Draws the game like the display loop does, onto an off-screen surface."""
+
+    def __init__(self):
+        import pygame
+
+        from main import BACKGROUND, draw_bullets, draw_enemies, draw_player, draw_powerups
+        from render import RenderCache
+
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.cache = RenderCache()
+        self.background = BACKGROUND
+        self.draw_player, self.draw_bullets = draw_player, draw_bullets
+        self.draw_enemies, self.draw_powerups = draw_enemies, draw_powerups
+
+    def __call__(self, state):
+        screen, cache = self.screen, self.cache
+        screen.fill(self.background)
+        self.draw_player(screen, state.player, cache, 1.0)
+        self.draw_bullets(screen, state.bullets, cache, 1.0)
+        self.draw_enemies(screen, state.enemies, cache, 1.0)
+        self.draw_powerups(screen, state.powerups, cache, 1.0)
+
+
+def run(seed, ticks, policy='random', stress=False, draw=False):
+    """Simulate `ticks` ticks from `seed`; return a dict of results.
+
+    `policy` is the name of one of POLICIES or a policy function.
+    """
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+    choose = policy(random.Random(seed))
+    state = GameState(seed, stress)
+    drawer = Drawer() if draw else None
+    names = [name for name, _ in PHASES] + (['draw'] if drawer else [])
+    # a tick is one profiler frame; the phase totals and p99s cover every
+    # tick of the run in the profiler's fixed memory
+    profiler = FrameProfiler(names)
+    lap = profiler.lap
+    peaks = dict.fromkeys(('bullets', 'enemies', 'powerups'), 0)
+    games = 1
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(ticks):
+        if state.over:
+            state.reset(state.seed + 1)
+            games += 1
+        profiler.begin_frame()
+        step(state, choose(state.tick), lap)
+        if drawer:
+            drawer(state)
+            lap('draw')
+        profiler.end_frame(state.tick)
+        if state.bullets.count > peaks['bullets']:
+            peaks['bullets'] = state.bullets.count
+        if state.enemies.count > peaks['enemies']:
+            peaks['enemies'] = state.enemies.count
+        if state.powerups.count > peaks['powerups']:
+            peaks['powerups'] = state.powerups.count
+    elapsed = clock() - start
+    totals = profiler.seconds()
+    return {
+        'seed': seed,
+        'ticks': ticks,
+        'games': games,
+        'seconds': elapsed,
+        'ticks_per_sec': ticks / elapsed if elapsed else 0.0,
+        'phase_ms': {name: float(t) * 1e3 for name, t in zip(names, totals)},
+        'phase_p99_ms': {name: float(v[1]) for name, v in profiler.overall().items() if name != 'total'},
+        'peak': peaks,
+        'score': state.score,
+    }
+
+
+def run_replay(path, draw=False):
+    """Play the replay file at `path` at full speed; the result also says
+    whether it ended with the recorded score."""
+    replay = Replay.load(path)
+    result = run(replay.seed, len(replay), replay.policy, replay.stress, draw)
+    result['replay'] = path
+    result['in_sync'] = result['score'] == replay.score and result['games'] == 1
+    return result
+
+
+def _run(job):
+    return run(*job)
+
+
+def _run_replay(job):
+    return run_replay(*job)
+
+
+def run_many(seeds, ticks, policy='random', stress=False, draw=False, jobs=None):
+    """`run` every seed, in `jobs` worker processes (default: one per CPU)."""
+    work = [(seed, ticks, policy, stress, draw) for seed in seeds]
+    if jobs == 1 or len(work) == 1:
+        return [_run(job) for job in work]
+    # fresh interpreters rather than forks: SDL does not survive a fork
+    with multiprocessing.get_context('spawn').Pool(jobs) as pool:
+        return pool.map(_run, work)
+
+
+def run_replays(paths, draw=False, jobs=None):
+    """`run_replay` every file, in parallel like `run_many`."""
+    work = [(path, draw) for path in paths]
+    if jobs == 1 or len(work) == 1:
+        return [_run_replay(job) for job in work]
+    with multiprocessing.get_context('spawn').Pool(jobs) as pool:
+        return pool.map(_run_replay, work)
+
+
+def summarize(results):
+    ticks = sum(r['ticks'] for r in results)
+    phase_ms = {}
+    for r in results:
+        for name, ms in r['phase_ms'].items():
+            phase_ms[name] = phase_ms.get(name, 0.0) + ms
+    return {
+        'runs': len(results),
+        'ticks': ticks,
+        'ticks_per_sec': sum(r['ticks_per_sec'] for r in results) / len(results),
+        'phase_us_per_tick': {name: ms * 1e3 / ticks for name, ms in phase_ms.items()},
+        # worst run's p99
+        'phase_p99_ms': {name: max(r['phase_p99_ms'][name] for r in results) for name in phase_ms},
+        'peak': {kind: max(r['peak'][kind] for r in results) for kind in results[0]['peak']},
+    }
+
+
+def print_report(results, summary, out=sys.stdout):
+    for r in results:
+        print(f"seed {r['seed']:>6}  {r['ticks']} ticks  {r['games']} games  "
+              f"{r['ticks_per_sec']:9.0f} ticks/s  peak bullets {r['peak']['bullets']}  "
+              f"enemies {r['peak']['enemies']}  powerups {r['peak']['powerups']}", file=out)
+        if 'replay' in r:
+            sync = 'in sync' if r['in_sync'] else 'DESYNCED'
+            print(f"  replay {r['replay']}: score {r['score']}, {sync}", file=out)
+    print(f"\nmean {summary['ticks_per_sec']:.0f} ticks/s per process over {summary['runs']} runs", file=out)
+    total = sum(summary['phase_us_per_tick'].values())
+    for name, us in summary['phase_us_per_tick'].items():
+        share = us / total if total else 0.0
+        p99 = summary['phase_p99_ms'][name] * 1e3
+        print(f"  {name:<10} {us:8.1f} us/tick  {share:6.1%}  p99 {p99:8.1f} us", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the Space Shooter simulation headless, as fast as possible')
+    parser.add_argument('--ticks', type=int, default=10000, help='ticks per seed (default: 10000)')
+    parser.add_argument('--seed', type=int, default=0, help='first seed (default: 0)')
+    parser.add_argument('--seeds', type=int, default=1, help='number of seeds, run in parallel (default: 1)')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random', help='input policy (default: random)')
+    parser.add_argument('--stress', action='store_true', help='bullet-hell stress mode')
+    parser.add_argument('--draw', action='store_true', help='also draw every tick, and time it')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--replay', nargs='+', metavar='FILE',
+                        help='play recorded games instead (their seed, mode and length override the options above)')
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        results = run_replays(args.replay, args.draw, args.jobs)
+    else:
+        seeds = range(args.seed, args.seed + args.seeds)
+        results = run_many(seeds, args.ticks, args.policy, args.stress, args.draw, args.jobs)
+    summary = summarize(results)
+    if args.json:
+        json.dump({'runs': results, 'summary': summary}, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(results, summary)
+    return 0 if all(r.get('in_sync', True) for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
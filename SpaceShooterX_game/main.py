@@ -1,69 +1,70 @@
 import os
+import io
 import sys
 import json
 import random
-import math
-import wave
-import struct
+import argparse
+import gc
+import itertools
+import time
+import numpy as np
 import pygame
-from pygame import Rect
 
-# Constants
-WIDTH, HEIGHT = 640, 800
+import audio
+from memstats import AllocStats
+from profiler import COLORS, FrameProfiler, ProfileGraph
+from render import DirtyRenderer, FullRenderer, RenderCache, make_overlay
+from replay import Recorder, Replay
+from sim import (
+    BULLET_COLOR, BULLET_SIZE, FIRE, HEIGHT, LEFT, POWERUP_COLOR, POWERUP_SIZE, RIGHT,
+    TICK_MS, WIDTH, GameState, step,
+)
+
+# Constants (the simulation's own are in sim.py)
 FPS = 60
-PLAYER_SPEED = 6
-BULLET_SPEED = -10
-ENEMY_BASE_SPEED = 2.0
-SPAWN_INTERVAL = 900  # milliseconds
-POWERUP_CHANCE = 0.2
-MAX_WEAPON_LEVEL = 3
+# longest frame the simulation catches up on; slower frames slow the game
+# down instead of running ever more ticks per frame
+MAX_FRAME_MS = 250
+BACKGROUND = (12, 12, 28)
+PLAYER_COLOR = (50, 200, 255)
+LIFE_COLOR = (200, 40, 40)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 HIGHSCORE_FILE = os.path.join(BASE_DIR, "highscore.json")
 BGM_FILE = os.path.join(BASE_DIR, "bgm.wav")
 SND_SHOOT = os.path.join(BASE_DIR, "snd_shoot.wav")
 SND_EXPLODE = os.path.join(BASE_DIR, "snd_explode.wav")
-
-# Utility: generate simple WAV sounds (sine tones) if not present
-def generate_sine_wav(path, freq=440.0, duration=2.0, volume=0.2, sample_rate=44100):
-    n_samples = int(sample_rate * duration)
-    with wave.open(path, 'w') as wav:
-        nchannels = 1
-        sampwidth = 2
-        wav.setparams((nchannels, sampwidth, sample_rate, n_samples, 'NONE', 'not compressed'))
-        max_amp = 32767 * volume
-        for i in range(n_samples):
-            t = float(i) / sample_rate
-            sample = int(max_amp * math.sin(2 * math.pi * freq * t))
-            wav.writeframes(struct.pack('<h', sample))
+REPLAY_DIR = os.path.join(BASE_DIR, "replays")
+MAX_REPLAYS = 50  # oldest recordings are deleted beyond this
+
+# Sounds are synthesized (audio.py) into any of these files that are missing;
+# files that exist, including your own replacements, are used as they are
+BGM_NOTES = (220.0, 277.0, 330.0, 392.0)
+SOUND_SYNTHS = {
+    BGM_FILE: lambda: audio.layered(BGM_NOTES, 5.0),  # a 5-second loop
+    SND_SHOOT: lambda: audio.tone(880.0, 0.08, volume=0.6),
+    SND_EXPLODE: lambda: audio.tone(120.0, 0.2, volume=0.7),
+}
 
 def ensure_sounds():
-    if not os.path.exists(BGM_FILE):
-        # generate a short looping background "melody" by combining tones sequentially
-        # We'll create a 5-second clip that will loop
-        sample_rate = 44100
-        duration = 5.0
-        n_samples = int(sample_rate * duration)
-        freqs = [220.0, 277.0, 330.0, 392.0]  # A set of notes
-        with wave.open(BGM_FILE, 'w') as wav:
-            nchannels = 1
-            sampwidth = 2
-            wav.setparams((nchannels, sampwidth, sample_rate, n_samples, 'NONE', 'not compressed'))
-            max_amp = 16000
-            for i in range(n_samples):
-                t = float(i) / sample_rate
-                # layered tones to sound nicer
-                v = 0.0
-                for j, f in enumerate(freqs):
-                    # small amplitude envelope
-                    v += (max_amp // (j + 1)) * math.sin(2 * math.pi * f * t) * (0.5 + 0.5 * math.sin(0.5 * t + j))
-                # clip
-                sample = max(-32767, min(32767, int(v * 0.25)))
-                wav.writeframes(struct.pack('<h', sample))
-    if not os.path.exists(SND_SHOOT):
-        generate_sine_wav(SND_SHOOT, freq=880.0, duration=0.08, volume=0.6)
-    if not os.path.exists(SND_EXPLODE):
-        generate_sine_wav(SND_EXPLODE, freq=120.0, duration=0.2, volume=0.7)
+    for path, synth in SOUND_SYNTHS.items():
+        if not os.path.exists(path):
+            try:
+                audio.write_wav(path, synth())
+            except OSError as e:
+                print("Failed to write sound:", e)
+
+def load_sound(path):
+    # a file that could not be written is played straight from memory
+    if os.path.exists(path):
+        return pygame.mixer.Sound(path)
+    return audio.make_sound(SOUND_SYNTHS[path]())
+
+def load_music(path):
+    if os.path.exists(path):
+        pygame.mixer.music.load(path)
+    else:
+        pygame.mixer.music.load(io.BytesIO(audio.wav_bytes(SOUND_SYNTHS[path]())), 'wav')
 
 # High score helpers
 def load_highscore():
@@ -81,115 +82,72 @@ def save_highscore(score):
     except Exception as e:
         print("Failed to save highscore:", e)
 
-# Game objects
-class Player:
-    def __init__(self):
-        self.width = 40
-        self.height = 24
-        self.x = WIDTH // 2
-        self.y = HEIGHT - 60
-        self.speed = PLAYER_SPEED
-        self.rect = Rect(self.x - self.width // 2, self.y - self.height // 2, self.width, self.height)
-        self.cooldown = 250  # ms
-        self.last_shot = 0
-        self.lives = 3
-        self.weapon_level = 1
-
-    def move(self, dx):
-        self.x += dx * self.speed
-        self.x = max(self.width // 2, min(WIDTH - self.width // 2, self.x))
-        self.rect.centerx = int(self.x)
-
-    def can_shoot(self, now):
-        return now - self.last_shot >= self.cooldown
-
-    def shoot(self, now):
-        self.last_shot = now
-        bullets = []
-        if self.weapon_level == 1:
-            bullets.append(Bullet(self.x, self.y - self.height // 2, 0))
-        elif self.weapon_level == 2:
-            bullets.append(Bullet(self.x - 10, self.y - self.height // 2, -0.05))
-            bullets.append(Bullet(self.x + 10, self.y - self.height // 2, 0.05))
-        else:
-            bullets.append(Bullet(self.x, self.y - self.height // 2, 0))
-            bullets.append(Bullet(self.x - 14, self.y - self.height // 2, -0.12))
-            bullets.append(Bullet(self.x + 14, self.y - self.height // 2, 0.12))
-        return bullets
-
-    def draw(self, surf):
-        # simple spaceship as polygon
-        points = [
-            (self.x, self.y - self.height // 2),
-            (self.x - self.width // 2, self.y + self.height // 2),
-            (self.x + self.width // 2, self.y + self.height // 2),
-        ]
-        pygame.draw.polygon(surf, (50, 200, 255), points)
-        # cockpit
-        pygame.draw.circle(surf, (255, 255, 255), (int(self.x), int(self.y - 4)), 4)
-
-class Bullet:
-    def __init__(self, x, y, xvel=0.0):
-        self.x = x
-        self.y = y
-        self.radius = 4
-        self.vx = xvel * 10
-        self.vy = BULLET_SPEED
-        self.rect = Rect(self.x - self.radius, self.y - self.radius, self.radius*2, self.radius*2)
-
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.rect.topleft = (int(self.x - self.radius), int(self.y - self.radius))
-
-    def draw(self, surf):
-        pygame.draw.circle(surf, (255, 240, 80), (int(self.x), int(self.y)), self.radius)
-
-class Enemy:
-    def __init__(self, x, y, speed):
-        self.x = x
-        self.y = y
-        self.size = random.randint(24, 48)
-        self.speed = speed
-        self.rect = Rect(self.x - self.size//2, self.y - self.size//2, self.size, self.size)
-        self.color = (255, random.randint(80, 200), random.randint(40, 120))
-
-    def update(self):
-        self.y += self.speed
-        self.rect.topleft = (int(self.x - self.size//2), int(self.y - self.size//2))
-
-    def draw(self, surf):
-        pygame.draw.rect(surf, self.color, self.rect)
-        # eyes
-        pygame.draw.circle(surf, (0,0,0), (int(self.x - self.size*0.18), int(self.y - self.size*0.08)), max(1, self.size//12))
-        pygame.draw.circle(surf, (0,0,0), (int(self.x + self.size*0.18), int(self.y - self.size*0.08)), max(1, self.size//12))
-
-class Powerup:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = 18
-        self.vy = 2.5
-        self.rect = Rect(self.x - self.size//2, self.y - self.size//2, self.size, self.size)
-
-    def update(self):
-        self.y += self.vy
-        self.rect.topleft = (int(self.x - self.size//2), int(self.y - self.size//2))
-
-    def draw(self, surf):
-        # draw a star-ish shape
-        cx, cy = int(self.x), int(self.y)
-        points = []
-        for i in range(5):
-            ang = i * (2*math.pi/5) - math.pi/2
-            x = cx + int(math.cos(ang) * self.size//2)
-            y = cy + int(math.sin(ang) * self.size//2)
-            points.append((x,y))
-        pygame.draw.polygon(surf, (255, 220, 30), points)
+def save_replay(recorder, score):
+    # one file per game, named after when it ended and its seed
+    try:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-seed{recorder.seed}.ssr"
+        recorder.save(os.path.join(REPLAY_DIR, name), score)
+        old = sorted(f for f in os.listdir(REPLAY_DIR) if f.endswith('.ssr'))
+        for f in old[:-MAX_REPLAYS]:
+            os.remove(os.path.join(REPLAY_DIR, f))
+    except OSError as e:
+        print("Failed to save replay:", e)
+
+# The game itself is simulated in fixed ticks by sim.py. Bullets, enemies and
+# powerups live in EntityStores (entities.py); these helpers draw them from
+# the sprites in a RenderCache (render.py), one blits call per kind, at
+# positions interpolated `alpha` of the way between the last two ticks. With
+# `track` the draw helpers return the drawn rects for a DirtyRenderer.
+def draw_player(surf, player, cache, alpha):
+    sprite = cache.sprite('player', (player.width, player.height), PLAYER_COLOR)
+    x = player.prev_x + (player.x - player.prev_x) * alpha
+    return surf.blit(sprite, (int(x) - player.width // 2, int(player.y) - player.height // 2))
+
+def draw_bullets(surf, bullets, cache, alpha, track=False):
+    n = bullets.count
+    if not n:
+        return None
+    sprite = cache.sprite('bullet', BULLET_SIZE, BULLET_COLOR)
+    r = BULLET_SIZE // 2
+    x, y = bullets.lerp(alpha)
+    xs = (x - r).astype(np.int32).tolist()
+    ys = (y - r).astype(np.int32).tolist()
+    return surf.blits(zip(itertools.repeat(sprite), zip(xs, ys)), doreturn=track)
+
+def draw_enemies(surf, enemies, cache, alpha, track=False):
+    n = enemies.count
+    if not n:
+        return None
+    sizes = enemies.w[:n].astype(np.int32)
+    x, y = enemies.lerp(alpha)
+    xs = (x - sizes // 2).astype(np.int32).tolist()
+    ys = (y - sizes // 2).astype(np.int32).tolist()
+    sprite = cache.sprite
+    return surf.blits([(sprite('enemy', size, tuple(color)), pos)
+                       for size, color, pos in zip(sizes.tolist(), enemies.color[:n].tolist(), zip(xs, ys))],
+                      doreturn=track)
+
+def draw_powerups(surf, powerups, cache, alpha, track=False):
+    n = powerups.count
+    if not n:
+        return None
+    sprite = cache.sprite('powerup', POWERUP_SIZE, POWERUP_COLOR)
+    r = POWERUP_SIZE // 2
+    x, y = powerups.lerp(alpha)
+    xs = (x.astype(np.int32) - r).tolist()
+    ys = (y.astype(np.int32) - r).tolist()
+    return surf.blits(zip(itertools.repeat(sprite), zip(xs, ys)), doreturn=track)
 
 # Main game class
 class SpaceShooter:
-    def __init__(self):
+    def __init__(self, stress=False, dirty_rects=False, seed=None, record=True, replay=None,
+                 profile_out=None):
+        self.stress = stress
+        self.chosen_stress = stress  # the mode asked for; a replay overrides `stress` while it plays
+        # each game is simulated from its own seed: the first is `seed`, or
+        # random when not given, and every new game takes the next one
+        self.next_seed = random.randrange(2**32) if seed is None else seed
         pygame.mixer.pre_init(44100, -16, 1, 512)
         pygame.init()
         ensure_sounds()
@@ -198,48 +156,172 @@ class SpaceShooter:
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont('Consolas', 24)
         self.bigfont = pygame.font.SysFont('Consolas', 48)
+        self.smallfont = pygame.font.SysFont('Consolas', 16)
+        # sprites and text are rendered once and reused (render.py)
+        self.render_cache = RenderCache()
+        self.overlay = make_overlay((WIDTH, HEIGHT))
+        # what each frame clears and presents: everything, or only what changed
+        renderer = DirtyRenderer if dirty_rects else FullRenderer
+        self.renderer = renderer(self.screen, BACKGROUND)
 
         # Load sounds
         try:
-            pygame.mixer.music.load(BGM_FILE)
+            load_music(BGM_FILE)
             pygame.mixer.music.set_volume(0.4)
         except Exception as e:
             print("bgm load error", e)
         try:
-            self.snd_shoot = pygame.mixer.Sound(SND_SHOOT)
-            self.snd_explode = pygame.mixer.Sound(SND_EXPLODE)
+            self.snd_shoot = load_sound(SND_SHOOT)
+            self.snd_explode = load_sound(SND_EXPLODE)
         except Exception as e:
             self.snd_shoot = None
             self.snd_explode = None
 
-        self.reset_game()
+        self.sim = GameState(self.next_seed, stress)
+        self.accumulator = 0.0  # ms of real time not yet simulated
+        # every game's inputs are recorded and saved to REPLAY_DIR when it ends
+        self.recorder = Recorder() if record else None
+        self.replay = None  # Replay being played back, instead of the keyboard
         self.highscore = load_highscore()
-        self.state = 'menu'  # menu, playing, paused, gameover
+        self.state = 'playing' if stress else 'menu'  # menu, playing, paused, gameover
+        if replay is not None:
+            self.start_replay(replay)
+        elif stress:
+            self.reset_game()
+        self.debug = False  # F3 toggles the debug overlay
+        self.alloc_stats = AllocStats()
+        # always on; F4 shows it, and `profile_out` (.csv or .json) gets a dump on exit
+        self.profiler = FrameProfiler()
+        self.profile_graph = ProfileGraph(self.profiler)
+        self.profile_out = profile_out
+        self.show_profile = False
+        self.profile_lines = []
+        self.profile_lines_frame = 0
+        self.profile_panel = None  # backdrop of the table, built on first use
+        # everything created so far lives for the whole run: keep it out of
+        # the collector's generations so collections stay short
+        gc.freeze()
 
     def reset_game(self):
-        self.player = Player()
-        self.bullets = []
-        self.enemies = []
-        self.powerups = []
-        self.score = 0
-        self.enemy_speed = ENEMY_BASE_SPEED
-        self.last_spawn = pygame.time.get_ticks()
-        self.spawn_interval = SPAWN_INTERVAL
-        self.level = 1
-
-    def spawn_enemy(self):
-        x = random.randint(30, WIDTH - 30)
-        e = Enemy(x, -40, self.enemy_speed + random.random()*0.8)
-        self.enemies.append(e)
-
-    def update_difficulty(self):
-        # every 10 points increase enemy speed slightly
-        target_level = 1 + self.score // 10
-        if target_level != self.level:
-            self.level = target_level
-            self.enemy_speed = ENEMY_BASE_SPEED + 0.6 * (self.level - 1)
-            # tighten spawn interval a bit
-            self.spawn_interval = max(350, SPAWN_INTERVAL - (self.level-1)*60)
+        self.save_recording()
+        if self.sim.stress != self.stress:
+            # the last game was a replay in the other mode
+            self.sim = GameState(self.next_seed, self.stress)
+        self.sim.reset(self.next_seed)
+        if self.recorder:
+            self.recorder.start(self.next_seed, self.stress)
+        self.next_seed = (self.next_seed + 1) % 2**32
+        self.accumulator = 0.0
+
+    def save_recording(self):
+        recorder = self.recorder
+        if recorder and recorder.ticks and self.replay is None:
+            save_replay(recorder, self.sim.score)
+            recorder.start(recorder.seed, recorder.stress)
+
+    def start_replay(self, replay):
+        """Play `replay` back in real time; the keyboard takes over again
+        with the next game."""
+        self.save_recording()
+        self.replay = replay
+        self.stress = replay.stress
+        self.sim = GameState(replay.seed, replay.stress)
+        self.accumulator = 0.0
+        self.state = 'playing'
+
+    def end_replay(self):
+        replay, sim = self.replay, self.sim
+        self.replay = None
+        self.stress = self.chosen_stress
+        if sim.score != replay.score:
+            print(f"Replay desynced: scored {sim.score}, recording says {replay.score}")
+        self.state = 'gameover'
+
+    def read_inputs(self):
+        keys = pygame.key.get_pressed()
+        inputs = 0
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            inputs |= LEFT
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            inputs |= RIGHT
+        if keys[pygame.K_SPACE]:
+            inputs |= FIRE
+        return inputs
+
+    def simulate(self, dt):
+        """Run as many fixed ticks as `dt` ms of real time covers; return how
+        far (0..1) the leftover time is into the next tick."""
+        self.accumulator += min(dt, MAX_FRAME_MS)
+        sim, replay, recorder = self.sim, self.replay, self.recorder
+        inputs = self.read_inputs() if replay is None else 0
+        while self.accumulator >= TICK_MS:
+            self.accumulator -= TICK_MS
+            if replay is not None:
+                if sim.tick >= len(replay):
+                    self.end_replay()
+                    break
+                inputs = replay.inputs[sim.tick]
+            elif recorder is not None:
+                recorder.record(inputs)
+            for event in step(sim, inputs, self.profiler.lap):
+                if event == 'shoot':
+                    if self.snd_shoot:
+                        self.snd_shoot.play()
+                elif event == 'explode':
+                    if self.snd_explode:
+                        self.snd_explode.play()
+                elif event == 'gameover':
+                    if replay is not None:
+                        self.end_replay()
+                        break
+                    if sim.score > self.highscore:
+                        self.highscore = sim.score
+                        save_highscore(self.highscore)
+                    self.save_recording()
+                    self.state = 'gameover'
+            if sim.over:
+                break
+        return self.accumulator / TICK_MS
+
+    def draw_debug(self):
+        sim = self.sim
+        lines = [
+            f'bullets {sim.bullets.count}/{sim.bullets.capacity}  '
+            f'enemies {sim.enemies.count}/{sim.enemies.capacity}  '
+            f'powerups {sim.powerups.count}/{sim.powerups.capacity}',
+            f'pool growths {sim.bullets.grown + sim.enemies.grown + sim.powerups.grown}',
+            f'tick {sim.tick}  seed {sim.seed}' + ('  (replay)' if self.replay else ''),
+        ] + self.alloc_stats.lines() + self.render_cache.lines() + self.renderer.lines()
+        y = HEIGHT - 30 - 22 * len(lines)
+        text = self.render_cache.text
+        return self.screen.blits([(text(self.font, line, (100,255,100)), (10, y + 22 * i))
+                                  for i, line in enumerate(lines)], doreturn=self.renderer.tracks)
+
+    def draw_profile(self):
+        # scrolling graph, then a p50/p99/max table colored like the graph;
+        # the table is recomputed twice a second
+        prof = self.profiler
+        self.profile_graph.update()
+        if not self.profile_lines or prof.frames - self.profile_lines_frame >= 30:
+            self.profile_lines = prof.lines()
+            self.profile_lines_frame = prof.frames
+        text, font = self.render_cache.text, self.smallfont
+        graph = self.profile_graph.surface
+        x, y = 10, 100
+        if self.profile_panel is None:
+            # room for the header, one line per phase, total and worst frame
+            self.profile_panel = make_overlay((graph.get_width(), 16 * (len(prof.phases) + 3) + 8), alpha=200)
+        blits = [(graph, (x, y)), (self.profile_panel, (x, y + graph.get_height()))]
+        y += graph.get_height() + 4
+        colors = ((200, 200, 200),) + COLORS + ((255, 255, 255),) * 2
+        for i, line in enumerate(self.profile_lines):
+            blits.append((text(font, line, colors[i]), (x, y + 16 * i)))
+        return self.screen.blits(blits, doreturn=self.renderer.tracks)
+
+    def centered(self, font, string, color, y):
+        """(surface, position) of `string` centered horizontally at `y`."""
+        surf = self.render_cache.text(font, string, color)
+        return surf, (WIDTH//2 - surf.get_width()//2, y)
 
     def run(self):
         # Start bgm
@@ -248,10 +330,11 @@ class SpaceShooter:
         except Exception:
             pass
 
+        prof = self.profiler
         running = True
         while running:
             dt = self.clock.tick(FPS)
-            now = pygame.time.get_ticks()
+            prof.begin_frame()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
@@ -262,6 +345,10 @@ class SpaceShooter:
                     elif self.state == 'gameover' and event.key == pygame.K_RETURN:
                         self.reset_game()
                         self.state = 'playing'
+                    elif event.key == pygame.K_F3:
+                        self.debug = not self.debug
+                    elif event.key == pygame.K_F4:
+                        self.show_profile = not self.show_profile
                     elif event.key == pygame.K_p:
                         if self.state == 'playing':
                             self.state = 'paused'
@@ -273,147 +360,99 @@ class SpaceShooter:
                         elif self.state == 'paused':
                             self.state = 'playing'
 
-            keys = pygame.key.get_pressed()
-            if self.state == 'playing':
-                dx = 0
-                if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-                    dx = -1
-                if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-                    dx = 1
-                self.player.move(dx)
-
-                if keys[pygame.K_SPACE] and self.player.can_shoot(now):
-                    bullets = self.player.shoot(now)
-                    self.bullets.extend(bullets)
-                    if self.snd_shoot:
-                        self.snd_shoot.play()
+            prof.lap('events')
 
-                # spawn enemies
-                if now - self.last_spawn >= self.spawn_interval:
-                    self.spawn_enemy()
-                    self.last_spawn = now
-
-                # updates
-                for b in list(self.bullets):
-                    b.update()
-                    if b.y < -10 or b.y > HEIGHT + 10:
-                        self.bullets.remove(b)
-
-                for e in list(self.enemies):
-                    e.update()
-                    if e.y - e.size//2 > HEIGHT:
-                        # enemy crossed screen: player loses life
-                        self.enemies.remove(e)
-                        self.player.lives -= 1
-                        if self.snd_explode:
-                            self.snd_explode.play()
-                        if self.player.lives <= 0:
-                            # game over
-                            if self.score > self.highscore:
-                                self.highscore = self.score
-                                save_highscore(self.highscore)
-                            self.state = 'gameover'
-
-                for p in list(self.powerups):
-                    p.update()
-                    if p.y > HEIGHT + 20:
-                        self.powerups.remove(p)
-
-                # collisions bullets vs enemies
-                for b in list(self.bullets):
-                    for e in list(self.enemies):
-                        if b.rect.colliderect(e.rect):
-                            try:
-                                self.bullets.remove(b)
-                            except ValueError:
-                                pass
-                            try:
-                                self.enemies.remove(e)
-                            except ValueError:
-                                pass
-                            self.score += 1
-                            if self.snd_explode:
-                                self.snd_explode.play()
-                            # chance to drop power-up
-                            if random.random() < POWERUP_CHANCE:
-                                self.powerups.append(Powerup(e.x, e.y))
-                            break
-
-                # player vs powerups
-                for p in list(self.powerups):
-                    if self.player.rect.colliderect(p.rect):
-                        self.powerups.remove(p)
-                        # upgrade weapon
-                        self.player.weapon_level = min(MAX_WEAPON_LEVEL, self.player.weapon_level + 1)
-
-                # update difficulty
-                self.update_difficulty()
-
-            # Drawing
-            self.screen.fill((12, 12, 28))
+            # fixed-tick simulation; only paused, menu and game over frames skip it
+            if self.state == 'playing':
+                alpha = self.simulate(dt)
+            else:
+                alpha = self.accumulator / TICK_MS
+
+            # Drawing: cached sprites and text, batched into blits calls
+            screen, font, text = self.screen, self.font, self.render_cache.text
+            renderer = self.renderer
+            track = renderer.tracks
+            renderer.begin()
             if self.state == 'menu':
-                title = self.bigfont.render('SPACE SHOOTER', True, (255,255,255))
-                self.screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//3))
-                info = self.font.render('Press ENTER to start  •  Arrow keys to move  •  Space to shoot', True, (200,200,200))
-                self.screen.blit(info, (WIDTH//2 - info.get_width()//2, HEIGHT//2))
-                info2 = self.font.render('P to pause during play. Collect stars to upgrade weapon.', True, (180,180,180))
-                self.screen.blit(info2, (WIDTH//2 - info2.get_width()//2, HEIGHT//2 + 30))
-                hs = self.font.render(f'High Score: {self.highscore}', True, (255,200,120))
-                self.screen.blit(hs, (10, 10))
+                renderer.add(screen.blits([
+                    self.centered(self.bigfont, 'SPACE SHOOTER', (255,255,255), HEIGHT//3),
+                    self.centered(font, 'Press ENTER to start  •  Arrow keys to move  •  Space to shoot', (200,200,200), HEIGHT//2),
+                    self.centered(font, 'P to pause during play. Collect stars to upgrade weapon.', (180,180,180), HEIGHT//2 + 30),
+                    (text(font, f'High Score: {self.highscore}', (255,200,120)), (10, 10)),
+                ], doreturn=track))
 
             elif self.state in ('playing', 'paused'):
-                # Draw player
-                self.player.draw(self.screen)
-
-                # Draw bullets
-                for b in self.bullets:
-                    b.draw(self.screen)
-
-                # Draw enemies
-                for e in self.enemies:
-                    e.draw(self.screen)
-
-                # Draw powerups
-                for p in self.powerups:
-                    p.draw(self.screen)
+                cache, sim, player = self.render_cache, self.sim, self.sim.player
+                renderer.add(draw_player(screen, player, cache, alpha))
+                renderer.add(draw_bullets(screen, sim.bullets, cache, alpha, track))
+                renderer.add(draw_enemies(screen, sim.enemies, cache, alpha, track))
+                renderer.add(draw_powerups(screen, sim.powerups, cache, alpha, track))
 
                 # HUD: score, lives, weapon level
-                score_surf = self.font.render(f'Score: {self.score}', True, (220,220,220))
-                self.screen.blit(score_surf, (10, 10))
-                level_surf = self.font.render(f'Lv: {self.level}  Weapon: {self.player.weapon_level}', True, (200,200,255))
-                self.screen.blit(level_surf, (10, 40))
-
+                hud = [
+                    (text(font, f'Score: {sim.score}', (220,220,220)), (10, 10)),
+                    (text(font, f'Lv: {sim.level}  Weapon: {player.weapon_level}', (200,200,255)), (10, 40)),
+                ]
+                if self.stress:
+                    hud.append((text(font, f'Bullets: {sim.bullets.count}', (200,200,255)), (10, 70)))
                 # Lives / health bar
-                for i in range(self.player.lives):
-                    pygame.draw.rect(self.screen, (200,40,40), (WIDTH - 20 - i*26, 10, 20, 12))
+                life = cache.sprite('life', (20, 12), LIFE_COLOR)
+                hud.extend((life, (WIDTH - 20 - i*26, 10)) for i in range(player.lives))
+                renderer.add(screen.blits(hud, doreturn=track))
 
                 # If paused overlay
                 if self.state == 'paused':
-                    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-                    overlay.fill((0,0,0,160))
-                    self.screen.blit(overlay, (0,0))
-                    paused = self.bigfont.render('PAUSED', True, (255,255,255))
-                    self.screen.blit(paused, (WIDTH//2 - paused.get_width()//2, HEIGHT//2 - paused.get_height()//2))
+                    renderer.add(screen.blit(self.overlay, (0, 0)))
+                    paused = text(self.bigfont, 'PAUSED', (255,255,255))
+                    screen.blit(paused, (WIDTH//2 - paused.get_width()//2, HEIGHT//2 - paused.get_height()//2))
 
             elif self.state == 'gameover':
-                over = self.bigfont.render('GAME OVER', True, (255,180,120))
-                self.screen.blit(over, (WIDTH//2 - over.get_width()//2, HEIGHT//3))
-                s = self.font.render(f'Your Score: {self.score}', True, (230,230,230))
-                self.screen.blit(s, (WIDTH//2 - s.get_width()//2, HEIGHT//2))
-                hs = self.font.render(f'High Score: {self.highscore}', True, (255,230,140))
-                self.screen.blit(hs, (WIDTH//2 - hs.get_width()//2, HEIGHT//2 + 30))
-                info = self.font.render('Press ENTER to play again', True, (200,200,200))
-                self.screen.blit(info, (WIDTH//2 - info.get_width()//2, HEIGHT//2 + 80))
+                renderer.add(screen.blits([
+                    self.centered(self.bigfont, 'GAME OVER', (255,180,120), HEIGHT//3),
+                    self.centered(font, f'Your Score: {self.sim.score}', (230,230,230), HEIGHT//2),
+                    self.centered(font, f'High Score: {self.highscore}', (255,230,140), HEIGHT//2 + 30),
+                    self.centered(font, 'Press ENTER to play again', (200,200,200), HEIGHT//2 + 80),
+                ], doreturn=track))
 
             # FPS
-            fps_surf = self.font.render(str(int(self.clock.get_fps())), True, (100,255,100))
-            self.screen.blit(fps_surf, (WIDTH - 40, HEIGHT - 30))
-
-            pygame.display.flip()
-
+            renderer.add(screen.blit(text(font, str(int(self.clock.get_fps())), (100,255,100)), (WIDTH - 40, HEIGHT - 30)))
+
+            self.alloc_stats.frame()
+            if self.debug:
+                renderer.add(self.draw_debug())
+            if self.show_profile:
+                renderer.add(self.draw_profile())
+            prof.lap('draw')
+
+            renderer.present()
+            prof.lap('flip')
+            prof.end_frame(self.sim.tick)
+
+        self.save_recording()
+        if self.profile_out:
+            try:
+                prof.dump(self.profile_out)
+            except OSError as e:
+                print("Failed to write profile:", e)
         pygame.quit()
 
 
 if __name__ == '__main__':
-    game = SpaceShooter()
+    parser = argparse.ArgumentParser(description='Space Shooter')
+    parser.add_argument('--stress', action='store_true',
+                        help='bullet-hell stress mode: sprays thousands of bullets, no lives lost')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='redraw and present only the screen regions that changed each frame')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the first game (default: random); later games use the next seeds')
+    parser.add_argument('--no-record', action='store_true',
+                        help=f'do not save a replay of each game to {os.path.basename(REPLAY_DIR)}/')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='play back a recorded game in real time (headless.py --replay runs it at full speed)')
+    parser.add_argument('--profile-out', metavar='FILE',
+                        help='on exit, write the frame profile: per-frame phase times (.csv) or a p50/p99 summary (.json)')
+    args = parser.parse_args()
+    replay = Replay.load(args.replay) if args.replay else None
+    game = SpaceShooter(stress=args.stress, dirty_rects=args.dirty_rects, seed=args.seed,
+                        record=not args.no_record, replay=replay, profile_out=args.profile_out)
     game.run()
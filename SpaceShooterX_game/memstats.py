@@ -0,0 +1,59 @@
+"""Allocation and garbage-collector counters for the debug overlay.
+
+`AllocStats` hooks `gc.callbacks` to count collections per generation and
+time each pause, and samples `sys.getallocatedblocks()` once per frame to
+show how many Python memory blocks a frame leaves behind. In steady play
+both the block delta and the collection rate should stay near zero.
+"""
+import gc
+import sys
+import time
+
+
+class AllocStats:
+    __slots__ = ('collections', 'last_pause', 'worst_pause', 'frames', 'block_delta',
+                 '_gc_start', '_window', '_window_blocks')
+
+    def __init__(self, window=60):
+        self.collections = [0, 0, 0]
+        self.last_pause = 0.0
+        self.worst_pause = 0.0
+        self.frames = 0
+        self.block_delta = 0.0  # average net blocks allocated per frame over the window
+        self._gc_start = 0.0
+        self._window = window
+        self._window_blocks = sys.getallocatedblocks()
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+        else:
+            pause = time.perf_counter() - self._gc_start
+            self.collections[info['generation']] += 1
+            self.last_pause = pause
+            if pause > self.worst_pause:
+                self.worst_pause = pause
+
+    def frame(self):
+        """Call once per frame."""
+        self.frames += 1
+        if self.frames % self._window == 0:
+            blocks = sys.getallocatedblocks()
+            self.block_delta = (blocks - self._window_blocks) / self._window
+            self._window_blocks = blocks
+
+    def gen0_per_frame(self):
+        return self.collections[0] / self.frames if self.frames else 0.0
+
+    def lines(self):
+        g0, g1, g2 = self.collections
+        return [
+            f'blocks/frame {self.block_delta:+.1f}',
+            f'gc {g0}/{g1}/{g2}  {self.gen0_per_frame():.2f} gen0/frame',
+            f'gc pause {self.last_pause * 1e3:.2f} ms  worst {self.worst_pause * 1e3:.2f} ms',
+        ]
+
+    def close(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
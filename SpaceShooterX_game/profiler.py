@@ -0,0 +1,217 @@
+"""Per-phase frame profiler for Space Shooter.
+
+The game loop calls `begin_frame` once per frame, `lap(name)` at the end
+of each phase (the simulation's own phases report through `sim.step`'s
+`lap` hook), and `end_frame`. The time since the previous lap is charged
+to the named phase, so a frame that runs several ticks adds them up.
+
+The last `window` frames are kept in a ring buffer, from which `stats`
+computes p50, p99 and max per phase. Every time the ring fills up, its
+frames are also folded into running sums and a log-spaced histogram, so
+`seconds` and `overall` cover every frame since the start (the
+percentiles to within 5%) in constant memory. The slowest frame since
+the start is kept whole, with the tick it ended on. `ProfileGraph` draws the
+window as a scrolling stacked bar graph, and `dump` writes the window as
+CSV or a JSON summary.
+
+A lap is a `perf_counter` call and a list update, so the profiler stays
+on in normal play; percentiles are only computed when asked for.
+"""
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+
+PHASES = ('events', 'input', 'spawn', 'update', 'collision', 'difficulty', 'draw', 'flip')
+
+# graph colors, one per phase
+COLORS = (
+    (150, 150, 150),
+    (90, 160, 255),
+    (160, 110, 255),
+    (80, 220, 120),
+    (255, 120, 80),
+    (200, 200, 80),
+    (255, 200, 60),
+    (240, 90, 200),
+)
+
+
+# histogram bin edges for `FrameProfiler.overall`: 50 per decade, 1 us to 10 s
+HIST_EDGES = np.logspace(-6, 1, 7 * 50 + 1)
+
+
+class FrameProfiler:
+    __slots__ = ('phases', 'window', 'frames', 'worst', 'worst_total', 'worst_frame', 'worst_tick',
+                 '_index', '_ring', '_cur', '_last', '_sums', '_hist', '_max')
+
+    def __init__(self, phases=PHASES, window=600):
+        self.phases = tuple(phases)
+        self.window = window
+        self.frames = 0
+        self.worst = [0.0] * len(self.phases)  # seconds per phase of the slowest frame
+        self.worst_total = 0.0
+        self.worst_frame = 0
+        self.worst_tick = 0
+        self._index = {name: i for i, name in enumerate(self.phases)}
+        self._ring = np.zeros((window, len(self.phases)))
+        self._cur = [0.0] * len(self.phases)
+        self._last = 0.0
+        # frames folded out of the ring; one column per phase plus the total
+        self._sums = np.zeros(len(self.phases))
+        self._hist = np.zeros((len(self.phases) + 1, len(HIST_EDGES) + 1), dtype=np.int64)
+        self._max = np.zeros(len(self.phases) + 1)
+
+    def begin_frame(self):
+        cur = self._cur
+        for i in range(len(cur)):
+            cur[i] = 0.0
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        """Charge the time since the last lap to phase `name`."""
+        now = time.perf_counter()
+        self._cur[self._index[name]] += now - self._last
+        self._last = now
+
+    def end_frame(self, tick=0):
+        """Store the frame; `tick` is the simulation tick, to find it in a replay."""
+        cur = self._cur
+        self._ring[self.frames % self.window] = cur
+        self.frames += 1
+        if self.frames % self.window == 0:
+            self._fold(self._ring)
+        total = sum(cur)
+        if total > self.worst_total:
+            self.worst_total = total
+            self.worst[:] = cur
+            self.worst_frame = self.frames
+            self.worst_tick = tick
+
+    def _fold(self, frames):
+        self._sums += frames.sum(axis=0)
+        self._count(frames, self._hist, self._max)
+
+    @staticmethod
+    def _count(frames, hist, peak):
+        cols = np.column_stack((frames, frames.sum(axis=1)))
+        bins = np.searchsorted(HIST_EDGES, cols)
+        for i in range(cols.shape[1]):
+            hist[i] += np.bincount(bins[:, i], minlength=hist.shape[1])
+        np.maximum(peak, cols.max(axis=0), out=peak)
+
+    def _unfolded(self):
+        # frames stored since the ring last filled up
+        return self._ring[:self.frames % self.window]
+
+    def seconds(self):
+        """Seconds per phase over every frame since the start."""
+        return self._sums + self._unfolded().sum(axis=0)
+
+    def overall(self):
+        """{phase: (p50, p99, max)} in milliseconds like `stats`, over every
+        frame since the start; percentiles are histogram bin edges, within
+        5% of the exact ones."""
+        if not self.frames:
+            return {}
+        hist, peak = self._hist.copy(), self._max.copy()
+        rest = self._unfolded()
+        if len(rest):
+            self._count(rest, hist, peak)
+        # a bin's upper edge (the max for the last, open-ended bin)
+        edges = np.append(HIST_EDGES, np.inf)
+        cum = hist.cumsum(axis=1)
+        out = {}
+        for i, name in enumerate(self.phases + ('total',)):
+            p50, p99 = (min(edges[np.searchsorted(cum[i], q * self.frames)], peak[i]) for q in (0.5, 0.99))
+            out[name] = (p50 * 1e3, p99 * 1e3, peak[i] * 1e3)
+        return out
+
+    def last(self):
+        """Seconds per phase of the most recent frame."""
+        return self._ring[(self.frames - 1) % self.window]
+
+    def recent(self):
+        """(frames, phases) array of the stored frames, oldest first."""
+        n = min(self.frames, self.window)
+        start = self.frames % self.window if self.frames > self.window else 0
+        return np.roll(self._ring, -start, axis=0)[:n]
+
+    def stats(self):
+        """{phase: (p50, p99, max)} in milliseconds over the window, with a
+        'total' entry for whole frames."""
+        frames = self.recent()
+        if not len(frames):
+            return {}
+        cols = np.column_stack((frames, frames.sum(axis=1))) * 1e3
+        p50, p99 = np.percentile(cols, (50, 99), axis=0)
+        peak = cols.max(axis=0)
+        names = self.phases + ('total',)
+        return {name: (p50[i], p99[i], peak[i]) for i, name in enumerate(names)}
+
+    def lines(self):
+        stats = self.stats()
+        out = [f'{"phase":<10} {"p50":>6} {"p99":>6} {"max":>6} ms']
+        out += [f'{name:<10} {p50:6.2f} {p99:6.2f} {peak:6.2f}' for name, (p50, p99, peak) in stats.items()]
+        out.append(f'worst frame {self.worst_frame} (tick {self.worst_tick}) {self.worst_total * 1e3:.2f} ms')
+        return out
+
+    def summary(self):
+        return {
+            'frames': self.frames,
+            'window': min(self.frames, self.window),
+            'ms': {name: dict(zip(('p50', 'p99', 'max'), map(float, v))) for name, v in self.stats().items()},
+            'worst_frame': {
+                'frame': self.worst_frame,
+                'tick': self.worst_tick,
+                'total_ms': self.worst_total * 1e3,
+                'ms': {name: t * 1e3 for name, t in zip(self.phases, self.worst)},
+            },
+        }
+
+    def dump(self, path):
+        """Write the window as CSV (one row per frame, ms per phase) or, for
+        a .json path, the summary."""
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump(self.summary(), f, indent=2)
+            return
+        first = max(0, self.frames - self.window) + 1
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('frame',) + self.phases + ('total',))
+            for n, row in enumerate(self.recent() * 1e3, first):
+                writer.writerow([n] + [f'{v:.4f}' for v in row] + [f'{row.sum():.4f}'])
+
+
+class ProfileGraph:
+    """Scrolling stacked bar graph of frame times, one column per frame.
+
+    Each frame the graph scrolls by one bar and draws only the newest, so
+    keeping it on screen costs a handful of fills.
+    """
+
+    def __init__(self, profiler, width=300, height=120, bar=2, budget_ms=1000 / 60):
+        self.profiler = profiler
+        self.bar = bar
+        self.budget_ms = budget_ms
+        self.scale = height / (2 * budget_ms)  # pixels per ms: two frame budgets fit
+        self.surface = pygame.Surface((width, height)).convert()
+        self.surface.set_alpha(200)
+        self.surface.fill((0, 0, 0))
+
+    def update(self):
+        surf, bar = self.surface, self.bar
+        w, h = surf.get_size()
+        surf.scroll(-bar, 0)
+        surf.fill((0, 0, 0), (w - bar, 0, bar, h))
+        y = h
+        for ms, color in zip((self.profiler.last() * 1e3).tolist(), COLORS):
+            px = int(ms * self.scale + 0.5)
+            if px:
+                y -= px
+                surf.fill(color, (w - bar, max(y, 0), bar, px))
+        budget_y = h - int(self.budget_ms * self.scale)
+        surf.fill((255, 255, 255), (w - bar, budget_y, bar, 1))
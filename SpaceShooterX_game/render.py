@@ -0,0 +1,259 @@
+"""Cached surfaces for Space Shooter drawing.
+
+Rasterizing every ship, enemy and star with `pygame.draw` each frame, and
+re-rendering every line of text with `Font.render`, costs far more than
+blitting a finished surface. `RenderCache` builds each sprite once per
+(kind, size, color) and each text surface once per (font, string, color),
+keeps the most recently used ones, and the game draws a frame as a few
+batched `Surface.blits` calls.
+
+Sprites are converted to the display format with a colorkey and RLE
+acceleration, so the display mode must be set before the first lookup.
+
+A renderer decides how much of the screen each frame clears and presents:
+`FullRenderer` clears and flips everything, `DirtyRenderer` (the
+--dirty-rects option) only the rects drawn this frame and the last.
+"""
+import math
+from collections import OrderedDict
+
+import pygame
+
+# Transparent pixels of a sprite; no sprite is drawn in this color.
+COLORKEY = (255, 0, 255)
+
+
+def _surface(w, h):
+    surf = pygame.Surface((w, h)).convert()
+    surf.fill(COLORKEY)
+    return surf
+
+
+def _bullet(size, color):
+    r = size // 2
+    surf = _surface(size + 1, size + 1)
+    pygame.draw.circle(surf, color, (r, r), r)
+    return surf
+
+
+def _enemy(size, color):
+    # square body with two eyes
+    surf = _surface(size, size)
+    surf.fill(color)
+    c = size // 2
+    eye_r = max(1, size // 12)
+    eye_y = int(c - size * 0.08)
+    pygame.draw.circle(surf, (0, 0, 0), (int(c - size * 0.18), eye_y), eye_r)
+    pygame.draw.circle(surf, (0, 0, 0), (int(c + size * 0.18), eye_y), eye_r)
+    return surf
+
+
+def _powerup(size, color):
+    # five-pointed star-ish shape
+    r = size // 2
+    surf = _surface(size + 1, size + 1)
+    points = []
+    for i in range(5):
+        ang = i * (2 * math.pi / 5) - math.pi / 2
+        points.append((r + int(math.cos(ang) * size // 2), r + int(math.sin(ang) * size // 2)))
+    pygame.draw.polygon(surf, color, points)
+    return surf
+
+
+def _player(size, color):
+    # `size` is (width, height): a triangle ship with a cockpit
+    w, h = size
+    surf = _surface(w + 1, h + 1)
+    pygame.draw.polygon(surf, color, [(w // 2, 0), (0, h), (w, h)])
+    pygame.draw.circle(surf, (255, 255, 255), (w // 2, h // 2 - 4), 4)
+    return surf
+
+
+def _life(size, color):
+    # `size` is (width, height) of one pip of the lives bar
+    surf = pygame.Surface(size).convert()
+    surf.fill(color)
+    return surf
+
+
+BUILDERS = {
+    'bullet': _bullet,
+    'enemy': _enemy,
+    'powerup': _powerup,
+    'player': _player,
+    'life': _life,
+}
+
+
+def make_overlay(size, color=(0, 0, 0), alpha=160):
+    """A full-screen tint; a surface-alpha blit is cheaper than per-pixel alpha."""
+    surf = pygame.Surface(size).convert()
+    surf.fill(color)
+    surf.set_alpha(alpha)
+    return surf
+
+
+class RenderCache:
+    """Least recently used caches of sprite and text surfaces.
+
+    `sprite` and `text` return the cached surface, building it on a miss;
+    callers must not draw on what they get back.
+    """
+
+    __slots__ = ('max_sprites', 'max_texts', 'hits', 'misses', '_sprites', '_texts')
+
+    def __init__(self, max_sprites=256, max_texts=128):
+        self.max_sprites = max_sprites
+        self.max_texts = max_texts
+        self.hits = 0
+        self.misses = 0
+        self._sprites = OrderedDict()
+        self._texts = OrderedDict()
+
+    def sprite(self, kind, size, color):
+        key = (kind, size, color)
+        sprites = self._sprites
+        surf = sprites.get(key)
+        if surf is not None:
+            sprites.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = BUILDERS[kind](size, color)
+        surf.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        sprites[key] = surf
+        if len(sprites) > self.max_sprites:
+            sprites.popitem(last=False)
+        return surf
+
+    def text(self, font, string, color):
+        key = (font, string, color)
+        texts = self._texts
+        surf = texts.get(key)
+        if surf is not None:
+            texts.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = texts[key] = font.render(string, True, color)
+        if len(texts) > self.max_texts:
+            texts.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._sprites.clear()
+        self._texts.clear()
+
+    def lines(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return [f'render cache {len(self._sprites)} sprites  {len(self._texts)} texts  '
+                f'{rate:.1%} hits']
+
+
+class FullRenderer:
+    """Clears the whole screen and flips it every frame."""
+
+    tracks = False  # whether callers need to report what they drew
+
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+
+    def begin(self):
+        self.screen.fill(self.background)
+
+    def add(self, rects):
+        pass
+
+    def present(self):
+        pygame.display.flip()
+
+    def lines(self):
+        return ['renderer full']
+
+
+class DirtyRenderer:
+    """Redraws and presents only the regions that changed.
+
+    Callers report the rects they draw each frame with `add`. `begin`
+    erases last frame's rects to the background, and `present` pushes
+    last frame's and this frame's rects with `pygame.display.update`.
+    When the dirty area covers more than `max_fraction` of the screen a
+    full flip is cheaper and is used instead. A frame with more than
+    `max_rects` rects is too busy to track at all: the next `backoff`
+    frames are cleared and flipped in full with `tracks` off.
+    """
+
+    def __init__(self, screen, background, max_fraction=0.5, max_rects=1024, backoff=60):
+        self.screen = screen
+        self.background = background
+        self.screen_area = screen.get_width() * screen.get_height()
+        self.max_fraction = max_fraction
+        self.max_rects = max_rects
+        self.backoff = backoff
+        self.tracks = True
+        self.full_frames = 0
+        self.partial_frames = 0
+        self.dirty_fraction = 1.0  # of the last frame, for the debug overlay
+        self._prev = []
+        self._cur = []
+        self._full = True  # the first frame draws everything
+        self._untracked = 0  # frames left before tracking resumes
+
+    def begin(self):
+        if self._full:
+            self.screen.fill(self.background)
+        else:
+            fill, bg = self.screen.fill, self.background
+            for rect in self._prev:
+                fill(bg, rect)
+
+    def add(self, rects):
+        if rects is None or not self.tracks:
+            return
+        if isinstance(rects, pygame.Rect):
+            self._cur.append(rects)
+        else:
+            self._cur.extend(rects)
+
+    def present(self):
+        prev, cur = self._prev, self._cur
+        if not self.tracks:
+            self._flip()
+            self._untracked -= 1
+            if not self._untracked:
+                self.tracks = True
+            return
+        if len(cur) > self.max_rects:
+            self._flip()
+            self.tracks = False
+            self._untracked = self.backoff
+            self._full = True
+            prev.clear()
+            cur.clear()
+            return
+        if self._full:
+            self._flip()
+        else:
+            # overlapping rects are counted twice: an upper bound is enough here
+            area = sum(r.w * r.h for r in prev) + sum(r.w * r.h for r in cur)
+            self.dirty_fraction = area / self.screen_area
+            if self.dirty_fraction > self.max_fraction:
+                self._flip()
+            else:
+                pygame.display.update(prev + cur)
+                self.partial_frames += 1
+        self._full = False
+        self._prev, self._cur = cur, prev
+        self._cur.clear()
+
+    def _flip(self):
+        pygame.display.flip()
+        self.full_frames += 1
+        self.dirty_fraction = 1.0
+
+    def lines(self):
+        mode = 'dirty' if self.tracks else 'dirty (backed off)'
+        return [f'renderer {mode}  {self.dirty_fraction:.0%} of screen  '
+                f'{self.partial_frames} partial / {self.full_frames} full frames']
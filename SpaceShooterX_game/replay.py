@@ -0,0 +1,113 @@
+"""Input recording and replay files for Space Shooter.
+
+The simulation (sim.py) is deterministic given its seed and the input
+bitmask of every tick, so a game is captured by just those: a replay
+file holds the seed and the inputs, run-length encoded since keys stay
+held for many ticks. A minute of play is typically a few hundred bytes.
+
+File layout, little-endian:
+
+    header  4s magic b'SSRP', u8 version, u8 flags (1 = stress mode),
+            u16 tick rate, i64 seed, u32 ticks, u32 final score
+    runs    (u8 inputs, u16 count) until `ticks` inputs are covered
+
+The final score lets a replay check that it played out the same way.
+"""
+import struct
+
+from sim import TICK_RATE
+
+MAGIC = b'SSRP'
+VERSION = 1
+STRESS = 1
+
+_HEADER = struct.Struct('<4sBBHqII')
+_RUN = struct.Struct('<BH')
+_MAX_RUN = 0xFFFF
+
+
+class ReplayError(Exception):
+    pass
+
+
+class Recorder:
+    """Records one game's inputs, one `record` call per tick."""
+
+    __slots__ = ('seed', 'stress', 'ticks', '_runs', '_last', '_count')
+
+    def __init__(self, seed=0, stress=False):
+        self.start(seed, stress)
+
+    def start(self, seed, stress=False):
+        """Forget what was recorded and start a new game."""
+        self.seed = seed
+        self.stress = stress
+        self.ticks = 0
+        self._runs = []
+        self._last = 0
+        self._count = 0
+
+    def record(self, inputs):
+        self.ticks += 1
+        if inputs == self._last and self._count < _MAX_RUN:
+            self._count += 1
+        else:
+            if self._count:
+                self._runs.append((self._last, self._count))
+            self._last = inputs
+            self._count = 1
+
+    def to_bytes(self, score=0):
+        runs = self._runs + [(self._last, self._count)] if self._count else self._runs
+        header = _HEADER.pack(MAGIC, VERSION, STRESS if self.stress else 0, TICK_RATE,
+                              self.seed, self.ticks, score)
+        return header + b''.join(_RUN.pack(inputs, count) for inputs, count in runs)
+
+    def save(self, path, score=0):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes(score))
+
+
+class Replay:
+    """A recorded game: `seed`, `stress`, `score` and `inputs`, a bytes
+    object holding the input bitmask of every tick."""
+
+    __slots__ = ('seed', 'stress', 'score', 'inputs')
+
+    def __init__(self, seed, stress, score, inputs):
+        self.seed = seed
+        self.stress = stress
+        self.score = score
+        self.inputs = inputs
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < _HEADER.size:
+            raise ReplayError('not a replay file: too short')
+        magic, version, flags, tick_rate, seed, ticks, score = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError('not a replay file: bad magic')
+        if version != VERSION:
+            raise ReplayError(f'unsupported replay version {version}')
+        if tick_rate != TICK_RATE:
+            raise ReplayError(f'replay was recorded at {tick_rate} ticks/s, the game runs at {TICK_RATE}')
+        body = memoryview(data)[_HEADER.size:]
+        if len(body) % _RUN.size:
+            raise ReplayError('truncated replay file')
+        inputs = b''.join(bytes((mask,)) * count for mask, count in _RUN.iter_unpack(body))
+        if len(inputs) != ticks:
+            raise ReplayError(f'replay holds {len(inputs)} ticks of input, header says {ticks}')
+        return cls(seed, bool(flags & STRESS), score, inputs)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def policy(self, rng=None):
+        """A headless input policy (see headless.py) playing these inputs."""
+        inputs, n = self.inputs, len(self.inputs)
+        return lambda tick: inputs[tick] if tick < n else 0
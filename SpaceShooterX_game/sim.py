@@ -0,0 +1,255 @@
+"""Fixed-timestep game simulation for Space Shooter.
+
+`step(state, inputs)` advances a `GameState` by one tick of 1/TICK_RATE
+seconds. It reads nothing but the state and the input bitmask (no clock,
+no global random module): spawns are timed in ticks and every random
+choice comes from the state's own seeded generators. The same seed and
+the same inputs therefore always play out the same game, whether the
+ticks are driven by the display loop or run uncapped in a headless
+script.
+
+A tick is split into phases (`PHASES`) that run in order; `step` returns
+the events of the tick ('shoot', 'explode', 'gameover') for the caller to
+play sounds or end the game.
+"""
+import math
+import random
+
+import numpy as np
+from pygame import Rect
+
+from collision import collide_all, collide_first
+from entities import EntityStore
+
+# Constants
+WIDTH, HEIGHT = 640, 800
+TICK_RATE = 60  # ticks per second; velocities below are per tick
+TICK_MS = 1000 / TICK_RATE
+PLAYER_SPEED = 6
+BULLET_SPEED = -10
+ENEMY_BASE_SPEED = 2.0
+POWERUP_CHANCE = 0.2
+MAX_WEAPON_LEVEL = 3
+BULLET_SIZE = 8
+BULLET_COLOR = (255, 240, 80)
+POWERUP_SIZE = 18
+POWERUP_SPEED = 2.5
+POWERUP_COLOR = (255, 220, 30)
+
+
+def ticks(ms):
+    """Milliseconds as a whole number of ticks."""
+    return round(ms * TICK_RATE / 1000)
+
+
+SPAWN_INTERVAL = ticks(900)
+MIN_SPAWN_INTERVAL = ticks(350)
+SPAWN_SPEEDUP = ticks(60)  # spawn interval shrinks by this per level
+SHOOT_COOLDOWN = ticks(250)
+
+# Bullet-hell stress mode (--stress): bullets sprayed per tick in a fan
+STRESS_BULLETS_PER_TICK = 60
+STRESS_SPAWN_INTERVAL = ticks(120)
+
+# Input bits
+LEFT, RIGHT, FIRE = 1, 2, 4
+
+
+class Player:
+    __slots__ = ('width', 'height', 'x', 'y', 'prev_x', 'speed', 'rect', 'cooldown',
+                 'last_shot', 'lives', 'weapon_level')
+
+    def __init__(self):
+        self.width = 40
+        self.height = 24
+        self.x = WIDTH // 2
+        self.y = HEIGHT - 60
+        self.prev_x = self.x  # position at the previous tick, for interpolation
+        self.speed = PLAYER_SPEED
+        self.rect = Rect(self.x - self.width // 2, self.y - self.height // 2, self.width, self.height)
+        self.cooldown = SHOOT_COOLDOWN
+        self.last_shot = -SHOOT_COOLDOWN
+        self.lives = 3
+        self.weapon_level = 1
+
+    def move(self, dx):
+        self.prev_x = self.x
+        self.x += dx * self.speed
+        self.x = max(self.width // 2, min(WIDTH - self.width // 2, self.x))
+        self.rect.centerx = int(self.x)
+
+    def can_shoot(self, tick):
+        return tick - self.last_shot >= self.cooldown
+
+    def shoot(self, tick, bullets):
+        self.last_shot = tick
+        y = self.y - self.height // 2
+        # (x offset, sideways velocity) of each bullet per weapon level
+        if self.weapon_level == 1:
+            pattern = ((0, 0),)
+        elif self.weapon_level == 2:
+            pattern = ((-10, -0.05), (10, 0.05))
+        else:
+            pattern = ((0, 0), (-14, -0.12), (14, 0.12))
+        for dx, xvel in pattern:
+            bullets.add(self.x + dx, y, xvel * 10, BULLET_SPEED, BULLET_SIZE, BULLET_SIZE, BULLET_COLOR)
+
+
+def spawn_enemy(enemies, rng, x, y, speed):
+    size = rng.randint(24, 48)
+    color = (255, rng.randint(80, 200), rng.randint(40, 120))
+    enemies.add(x, y, 0.0, speed, size, size, color)
+
+
+def spawn_powerup(powerups, x, y):
+    powerups.add(x, y, 0.0, POWERUP_SPEED, POWERUP_SIZE, POWERUP_SIZE, POWERUP_COLOR)
+
+
+class GameState:
+    """Everything one game's simulation reads and writes."""
+
+    __slots__ = ('stress', 'seed', 'rng', 'np_rng', 'tick', 'player', 'bullets', 'enemies',
+                 'powerups', 'score', 'level', 'enemy_speed', 'spawn_interval', 'last_spawn',
+                 'over', 'events')
+
+    def __init__(self, seed=0, stress=False):
+        self.stress = stress
+        # entity pools, sized for peak counts so play never has to grow them
+        self.bullets = EntityStore(16384 if stress else 256)
+        self.enemies = EntityStore(256 if stress else 64)
+        self.powerups = EntityStore(64 if stress else 16)
+        self.events = []
+        self.reset(seed)
+
+    def reset(self, seed):
+        """Start a new game from `seed`, reusing the entity pools."""
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.tick = 0
+        self.player = Player()
+        self.bullets.clear()
+        self.enemies.clear()
+        self.powerups.clear()
+        self.score = 0
+        self.level = 1
+        self.enemy_speed = ENEMY_BASE_SPEED
+        self.spawn_interval = STRESS_SPAWN_INTERVAL if self.stress else SPAWN_INTERVAL
+        self.last_spawn = 0
+        self.over = False
+
+
+def input_phase(state, inputs):
+    player = state.player
+    dx = 0
+    if inputs & LEFT:
+        dx = -1
+    if inputs & RIGHT:
+        dx = 1
+    player.move(dx)
+
+    if inputs & FIRE and player.can_shoot(state.tick):
+        player.shoot(state.tick, state.bullets)
+        state.events.append('shoot')
+    if state.stress:
+        # a fan of slow bullets from the ship, so thousands stay on screen
+        n = STRESS_BULLETS_PER_TICK
+        angle = state.np_rng.uniform(-math.pi * 0.85, -math.pi * 0.15, n)
+        speed = state.np_rng.uniform(2.0, 5.0, n)
+        state.bullets.add_many(player.x, player.y - player.height // 2,
+                               np.cos(angle) * speed, np.sin(angle) * speed,
+                               BULLET_SIZE, BULLET_SIZE, BULLET_COLOR)
+
+
+def spawn_phase(state, inputs):
+    if state.tick - state.last_spawn >= state.spawn_interval:
+        rng = state.rng
+        x = rng.randint(30, WIDTH - 30)
+        spawn_enemy(state.enemies, rng, x, -40, state.enemy_speed + rng.random() * 0.8)
+        state.last_spawn = state.tick
+
+
+def update_phase(state, inputs):
+    # one vectorized step per kind, then cull off-screen entities
+    bullets, enemies, powerups = state.bullets, state.enemies, state.powerups
+    bullets.update()
+    # bullet centers more than 10 px off-screen
+    margin = 10 - BULLET_SIZE // 2
+    bullets.cull_outside(-margin, -margin, WIDTH + margin, HEIGHT + margin)
+
+    enemies.update()
+    escaped = enemies.cull_outside(-math.inf, -math.inf, math.inf, HEIGHT)
+    if escaped and not state.stress:
+        # enemy crossed screen: player loses life
+        state.player.lives -= escaped
+        state.events.append('explode')
+        if state.player.lives <= 0:
+            state.over = True
+            state.events.append('gameover')
+
+    powerups.update()
+    powerups.cull_outside(-math.inf, -math.inf, math.inf, HEIGHT + 20 - POWERUP_SIZE / 2)
+
+
+def collision_phase(state, inputs):
+    bullets, enemies, powerups = state.bullets, state.enemies, state.powerups
+    # bullets vs enemies (grid broad phase, see collision.py)
+    hit_b, hit_e = collide_first(bullets, enemies)
+    if hit_e.size:
+        state.score += hit_e.size
+        state.events.append('explode')
+        # chance to drop power-up
+        rng = state.rng
+        for x, y in zip(enemies.x[hit_e].tolist(), enemies.y[hit_e].tolist()):
+            if rng.random() < POWERUP_CHANCE:
+                spawn_powerup(powerups, x, y)
+        bullets.release(hit_b)
+        enemies.release(hit_e)
+
+    # player vs powerups
+    player = state.player
+    collected = collide_all(player.rect, powerups)
+    if collected.size:
+        powerups.release(collected)
+        # upgrade weapon
+        player.weapon_level = min(MAX_WEAPON_LEVEL, player.weapon_level + collected.size)
+
+
+def difficulty_phase(state, inputs):
+    # every 10 points increase enemy speed slightly
+    target_level = 1 + state.score // 10
+    if target_level != state.level:
+        state.level = target_level
+        state.enemy_speed = ENEMY_BASE_SPEED + 0.6 * (state.level - 1)
+        # tighten spawn interval a bit
+        if not state.stress:
+            state.spawn_interval = max(MIN_SPAWN_INTERVAL, SPAWN_INTERVAL - (state.level - 1) * SPAWN_SPEEDUP)
+
+
+PHASES = (
+    ('input', input_phase),
+    ('spawn', spawn_phase),
+    ('update', update_phase),
+    ('collision', collision_phase),
+    ('difficulty', difficulty_phase),
+)
+
+
+def step(state, inputs, lap=None):
+    """Advance `state` by one tick under the `inputs` bitmask (LEFT, RIGHT,
+    FIRE); return the list of events of the tick.
+
+    `lap`, if given, is called with each phase's name as the phase ends,
+    for profiling (see profiler.py).
+    """
+    state.events.clear()
+    if not state.over:
+        if lap is None:
+            for _, phase in PHASES:
+                phase(state, inputs)
+        else:
+            for name, phase in PHASES:
+                phase(state, inputs)
+                lap(name)
+        state.tick += 1
+    return state.events
@@ -0,0 +1,67 @@
+import io
+import math
+import wave
+
+import numpy as np
+import pytest
+
+from audio import SAMPLE_RATE, layered, tone, wav_bytes, write_wav
+
+
+# the per-sample loops the game used to write its sounds with
+
+def reference_tone(freq, duration, volume, sample_rate=SAMPLE_RATE):
+    max_amp = 32767 * volume
+    return [int(max_amp * math.sin(2 * math.pi * freq * (i / sample_rate)))
+            for i in range(int(sample_rate * duration))]
+
+
+def reference_layered(freqs, duration, max_amp=16000, sample_rate=SAMPLE_RATE):
+    out = []
+    for i in range(int(sample_rate * duration)):
+        t = float(i) / sample_rate
+        v = 0.0
+        for j, f in enumerate(freqs):
+            v += (max_amp // (j + 1)) * math.sin(2 * math.pi * f * t) * (0.5 + 0.5 * math.sin(0.5 * t + j))
+        out.append(max(-32767, min(32767, int(v * 0.25))))
+    return out
+
+
+@pytest.mark.parametrize('freq, duration, volume', [(880.0, 0.08, 0.6), (120.0, 0.2, 0.7), (440.0, 0.5, 1.0)])
+def test_tone_matches_the_per_sample_formula(freq, duration, volume):
+    samples = tone(freq, duration, volume)
+    expected = reference_tone(freq, duration, volume)
+    assert samples.dtype == np.int16 and len(samples) == len(expected)
+    # rounding differences may tip a truncation by one step
+    assert np.abs(samples.astype(int) - expected).max() <= 1
+
+
+def test_layered_matches_the_per_sample_formula():
+    freqs = (220.0, 277.0, 330.0, 392.0)
+    samples = layered(freqs, 0.5)
+    expected = reference_layered(freqs, 0.5)
+    assert len(samples) == len(expected)
+    assert np.abs(samples.astype(int) - expected).max() <= 1
+    # loud enough that the comparison means something
+    assert np.abs(samples).max() > 5000
+
+
+def test_sounds_are_cached_and_read_only():
+    assert tone(660.0, 0.1) is tone(660.0, 0.1)
+    with pytest.raises(ValueError):
+        tone(660.0, 0.1)[0] = 0
+
+
+def test_write_wav_reads_back(tmp_path):
+    samples = tone(880.0, 0.08, 0.6)
+    path = str(tmp_path / 'shoot.wav')
+    write_wav(path, samples)
+    with wave.open(path, 'rb') as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, SAMPLE_RATE)
+        assert wav.getnframes() == len(samples) == int(SAMPLE_RATE * 0.08)
+        frames = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+    assert (frames == samples).all()
+    with open(path, 'rb') as f:
+        assert f.read() == wav_bytes(samples)
+    with wave.open(io.BytesIO(wav_bytes(samples, 22050)), 'rb') as wav:
+        assert wav.getframerate() == 22050
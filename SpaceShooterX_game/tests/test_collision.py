@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from collision import candidate_pairs, collide_first
+from entities import EntityStore
+
+
+def random_store(rng, n, size):
+    store = EntityStore()
+    store.add_many(rng.uniform(-100, 740, n), rng.uniform(-200, 900, n),
+                   w=rng.uniform(2, size, n), h=rng.uniform(2, size, n))
+    return store
+
+
+def brute_force(movers, targets):
+    ml, mt, mr, mb = movers.bounds()
+    tl, tt, tr, tb = targets.bounds()
+    return {(m, t) for m in range(movers.count) for t in range(targets.count)
+            if ml[m] < tr[t] and mr[m] > tl[t] and mt[m] < tb[t] and mb[m] > tt[t]}
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('cell_size', [16, 64, 200])
+def test_grid_finds_exactly_the_overlapping_pairs(seed, cell_size):
+    rng = np.random.default_rng(seed)
+    movers = random_store(rng, 400, 20)
+    targets = random_store(rng, 60, 48)
+    cand_m, cand_t = candidate_pairs(movers, targets, cell_size)
+    pairs = list(zip(cand_m.tolist(), cand_t.tolist()))
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == brute_force(movers, targets)
+
+
+def test_collide_first_pairs_each_side_once():
+    rng = np.random.default_rng(7)
+    movers = random_store(rng, 300, 12)
+    targets = random_store(rng, 40, 48)
+    hits_m, hits_t = collide_first(movers, targets)
+    assert len(set(hits_m.tolist())) == len(hits_m)
+    assert len(set(hits_t.tolist())) == len(hits_t)
+    assert set(zip(hits_m.tolist(), hits_t.tolist())) <= brute_force(movers, targets)
+
+
+def test_empty_stores():
+    rng = np.random.default_rng(0)
+    m, t = candidate_pairs(EntityStore(), random_store(rng, 5, 10))
+    assert m.size == 0 and t.size == 0
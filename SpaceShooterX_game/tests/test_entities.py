@@ -0,0 +1,45 @@
+import numpy as np
+
+from entities import EntityStore
+
+
+def check(store, alive):
+    # every live row is one of `alive`, with its own columns intact
+    ids = store.x[:store.count].astype(int)
+    assert sorted(ids) == sorted(alive)
+    assert (store.y[:store.count] == ids * 2).all()
+    assert (store.vx[:store.count] == -ids).all()
+    assert (store.color[:store.count, 0] == ids % 256).all()
+
+
+def test_swap_remove_keeps_rows_whole():
+    rng = np.random.default_rng(3)
+    store = EntityStore(4)
+    alive, next_id = [], 0
+    for _ in range(200):
+        n = int(rng.integers(0, 20))
+        ids = np.arange(next_id, next_id + n)
+        store.add_many(ids, ids * 2, -ids, color=np.stack([ids % 256] * 3, axis=1))
+        alive += ids.tolist()
+        next_id += n
+        check(store, alive)
+        if rng.random() < 0.5:
+            dead = rng.random(store.count) < 0.3
+        else:
+            dead = rng.choice(store.count, size=int(rng.integers(0, store.count + 1)), replace=False)
+            dead = np.asarray(dead, dtype=np.intp)
+        gone = set(store.x[:store.count][dead].astype(int).tolist())
+        store.release(dead)
+        alive = [i for i in alive if i not in gone]
+        check(store, alive)
+    assert store.grown > 0
+
+
+def test_cull_outside_removes_only_what_is_off_screen():
+    store = EntityStore()
+    store.add(50, 50)
+    store.add(-20, 50)  # left of the box
+    store.add(50, 120, h=10)  # below it
+    store.add(100, 50, w=8)  # straddles the right edge: stays
+    assert store.cull_outside(0, 0, 100, 100) == 2
+    assert sorted(store.x[:store.count].tolist()) == [50, 100]
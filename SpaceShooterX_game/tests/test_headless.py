@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip('pygame')
+
+import headless
+from sim import PHASES
+
+TIMINGS = ('seconds', 'ticks_per_sec', 'phase_ms', 'phase_p99_ms')
+
+
+def outcome(result):
+    return {key: value for key, value in result.items() if key not in TIMINGS}
+
+
+@pytest.mark.parametrize('policy', ['random', 'sweep'])
+def test_run_is_deterministic_per_seed(policy):
+    first = headless.run(3, 1500, policy)
+    assert outcome(headless.run(3, 1500, policy)) == outcome(first)
+    assert outcome(headless.run(4, 1500, policy)) != outcome(first)
+
+
+def test_run_restarts_finished_games_and_reports_every_phase():
+    result = headless.run(1, 3000, 'idle')
+    # an idle player is out of lives long before 3000 ticks
+    assert result['games'] > 1 and result['ticks'] == 3000
+    assert result['peak']['bullets'] == 0 and result['peak']['enemies'] > 0
+    names = {name for name, _ in PHASES}
+    assert set(result['phase_ms']) == set(result['phase_p99_ms']) == names
+    assert all(ms >= 0 for ms in result['phase_ms'].values())
+
+
+def test_summary_adds_up_the_runs():
+    results = headless.run_many([0, 1], 500, 'random', jobs=1)
+    assert [r['seed'] for r in results] == [0, 1]
+    summary = headless.summarize(results)
+    assert (summary['runs'], summary['ticks']) == (2, 1000)
+    assert summary['peak'] == {kind: max(r['peak'][kind] for r in results) for kind in results[0]['peak']}
+    for name, us in summary['phase_us_per_tick'].items():
+        assert us == pytest.approx(sum(r['phase_ms'][name] for r in results) * 1e3 / 1000)
+        assert summary['phase_p99_ms'][name] == max(r['phase_p99_ms'][name] for r in results)
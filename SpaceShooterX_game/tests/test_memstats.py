@@ -0,0 +1,49 @@
+import gc
+
+import pytest
+
+from memstats import AllocStats
+
+
+@pytest.fixture
+def stats():
+    # only the collections the test asks for
+    enabled = gc.isenabled()
+    gc.disable()
+    stats = AllocStats(window=2)
+    yield stats
+    stats.close()
+    if enabled:
+        gc.enable()
+
+
+def test_collections_are_counted_per_generation(stats):
+    for generation in (0, 0, 1, 2):
+        gc.collect(generation)
+    assert stats.collections == [2, 1, 1]
+    assert 0 < stats.last_pause <= stats.worst_pause
+    for _ in range(4):
+        stats.frame()
+    assert stats.gen0_per_frame() == 0.5
+    assert stats.lines()[1] == 'gc 2/1/1  0.50 gen0/frame'
+
+
+def test_close_unhooks_the_callback(stats):
+    stats.close()
+    assert stats._on_gc not in gc.callbacks
+    gc.collect()
+    assert stats.collections == [0, 0, 0]
+    stats.close()  # closing twice is harmless
+
+
+def test_block_delta_is_averaged_over_the_window(stats):
+    kept = []
+    stats.frame()
+    assert stats.block_delta == 0.0  # not sampled until the window is full
+    kept.extend(object() for _ in range(2000))
+    stats.frame()
+    # about a block per object kept alive, over a two frame window
+    assert 900 <= stats.block_delta <= 1200
+    stats.frame()
+    stats.frame()
+    assert abs(stats.block_delta) < 50
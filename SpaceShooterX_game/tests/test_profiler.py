@@ -0,0 +1,88 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pygame')
+
+import profiler
+from profiler import FrameProfiler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+
+def feed(monkeypatch, prof, frames):
+    """Run `frames` (rows of seconds per phase) through `prof` on a fake clock."""
+    clock = FakeClock()
+    monkeypatch.setattr(profiler, 'time', clock)
+    for tick, row in enumerate(frames):
+        prof.begin_frame()
+        for name, seconds in zip(prof.phases, row):
+            clock.now += seconds
+            prof.lap(name)
+        prof.end_frame(tick)
+
+
+def test_overall_covers_every_frame(monkeypatch):
+    # 25 frames through a 10 frame ring: two folds and 5 frames still in the ring
+    frames = [(0.002, 0.001)] * 24 + [(0.002, 0.1)]
+    prof = FrameProfiler(('update', 'draw'), window=10)
+    feed(monkeypatch, prof, frames)
+    assert prof.seconds() == pytest.approx(np.sum(frames, axis=0))
+    overall = prof.overall()
+    p50, p99, peak = overall['draw']
+    assert 1.0 <= p50 <= 1.05 and p99 == peak == pytest.approx(100.0)
+    p50, p99, peak = overall['total']
+    assert 3.0 <= p50 <= 3.15 and p99 == peak == pytest.approx(102.0)
+    assert (prof.worst_frame, prof.worst_tick) == (25, 24)
+    assert prof.worst_total == pytest.approx(0.102)
+
+
+def test_overall_percentiles_are_within_a_bin_of_exact(monkeypatch):
+    rng = np.random.default_rng(7)
+    frames = rng.lognormal(np.log(0.004), 0.8, (1000, 3))
+    prof = FrameProfiler(('a', 'b', 'c'), window=64)
+    feed(monkeypatch, prof, frames)
+    cols = np.column_stack((frames, frames.sum(axis=1))) * 1e3
+    overall = prof.overall()
+    for i, name in enumerate(('a', 'b', 'c', 'total')):
+        p50, p99, peak = overall[name]
+        exact = np.percentile(cols[:, i], (50, 99), method='inverted_cdf')
+        # the upper edge of the bin holding the exact percentile
+        assert exact[0] * 0.999 <= p50 <= exact[0] * 1.05
+        assert exact[1] * 0.999 <= p99 <= exact[1] * 1.05
+        assert peak == pytest.approx(cols[:, i].max())
+
+
+def test_dump_writes_the_window_as_csv_and_a_json_summary(monkeypatch, tmp_path):
+    frames = [(0.001 * n, 0.002) for n in range(1, 7)]
+    prof = FrameProfiler(('update', 'draw'), window=4)
+    feed(monkeypatch, prof, frames)
+
+    path = str(tmp_path / 'frames.csv')
+    prof.dump(path)
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['frame', 'update', 'draw', 'total']
+    assert [row[0] for row in rows[1:]] == ['3', '4', '5', '6']
+    assert [float(v) for v in rows[-1][1:]] == pytest.approx([6.0, 2.0, 8.0])
+
+    path = str(tmp_path / 'frames.json')
+    prof.dump(path)
+    with open(path) as f:
+        summary = json.load(f)
+    assert (summary['frames'], summary['window']) == (6, 4)
+    assert set(summary['ms']) == {'update', 'draw', 'total'}
+    assert summary['ms']['update']['max'] == pytest.approx(6.0)
+    assert set(summary['ms']['total']) == {'p50', 'p99', 'max'}
+    worst = summary['worst_frame']
+    assert (worst['frame'], worst['tick']) == (6, 5)
+    assert worst['total_ms'] == pytest.approx(8.0)
+    assert worst['ms'] == pytest.approx({'update': 6.0, 'draw': 2.0})
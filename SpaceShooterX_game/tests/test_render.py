@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+pygame = pytest.importorskip('pygame')
+
+from render import COLORKEY, RenderCache
+
+
+@pytest.fixture(scope='module', autouse=True)
+def display():
+    # sprites are converted to the display format, so a mode must be set
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((64, 64))
+    yield
+    pygame.quit()
+
+
+def test_sprites_are_built_once_per_key():
+    cache = RenderCache()
+    enemy = cache.sprite('enemy', 24, (255, 0, 0))
+    assert cache.sprite('enemy', 24, (255, 0, 0)) is enemy
+    assert (cache.hits, cache.misses) == (1, 1)
+    # any part of the key changing is a different sprite
+    assert cache.sprite('enemy', 32, (255, 0, 0)) is not enemy
+    assert cache.sprite('enemy', 24, (0, 255, 0)) is not enemy
+    assert cache.sprite('bullet', 24, (255, 0, 0)) is not enemy
+    assert (cache.hits, cache.misses) == (1, 4)
+    assert enemy.get_size() == (24, 24) and enemy.get_colorkey()[:3] == COLORKEY
+
+
+def test_least_recently_used_sprite_is_evicted():
+    cache = RenderCache(max_sprites=2)
+    a = cache.sprite('bullet', 4, (255, 255, 255))
+    b = cache.sprite('bullet', 6, (255, 255, 255))
+    assert cache.sprite('bullet', 4, (255, 255, 255)) is a
+    cache.sprite('bullet', 8, (255, 255, 255))  # evicts the 6 px bullet
+    assert cache.sprite('bullet', 4, (255, 255, 255)) is a
+    assert cache.sprite('bullet', 6, (255, 255, 255)) is not b
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_texts_are_cached_until_evicted_or_cleared():
+    font = pygame.font.Font(None, 20)
+    cache = RenderCache(max_texts=1)
+    score = cache.text(font, 'Score: 10', (255, 255, 255))
+    assert cache.text(font, 'Score: 10', (255, 255, 255)) is score
+    cache.text(font, 'Score: 20', (255, 255, 255))
+    assert cache.text(font, 'Score: 10', (255, 255, 255)) is not score
+    enemy = cache.sprite('enemy', 24, (255, 0, 0))
+    cache.clear()
+    assert cache.sprite('enemy', 24, (255, 0, 0)) is not enemy
+    assert (cache.hits, cache.misses) == (1, 5)
+    assert cache.lines() == ['render cache 1 sprites  0 texts  16.7% hits']
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+
+from replay import Recorder, Replay, ReplayError
+from sim import FIRE, LEFT, RIGHT, GameState, step
+
+
+def play(seed, stress, choose, ticks):
+    state = GameState(seed, stress)
+    inputs = []
+    for tick in range(ticks):
+        if state.over:
+            break
+        inputs.append(choose(tick))
+        step(state, inputs[-1])
+    return state, inputs
+
+
+def fingerprint(state):
+    return (state.tick, state.score, state.level, state.player.x, state.player.lives,
+            state.bullets.x[:state.bullets.count].tobytes(), state.enemies.x[:state.enemies.count].tobytes())
+
+
+@pytest.mark.parametrize('stress', [False, True])
+def test_recorded_game_plays_back_identically(stress):
+    rng = random.Random(1)
+    held = [0]
+
+    def choose(tick):
+        if tick % 7 == 0:
+            held[0] = FIRE | rng.choice((0, LEFT, RIGHT))
+        return held[0]
+
+    state, inputs = play(42, stress, choose, 1500)
+    assert state.score > 0
+    recorder = Recorder(42, stress)
+    for mask in inputs:
+        recorder.record(mask)
+    replay = Replay.from_bytes(recorder.to_bytes(state.score))
+    assert (replay.seed, replay.stress, replay.score) == (42, stress, state.score)
+    assert replay.inputs == bytes(inputs)
+
+    again, _ = play(replay.seed, replay.stress, replay.policy(), len(replay))
+    assert fingerprint(again) == fingerprint(state)
+
+
+def test_long_holds_and_bad_files():
+    recorder = Recorder(1)
+    for _ in range(70000):  # longer than one run
+        recorder.record(FIRE)
+    assert Replay.from_bytes(recorder.to_bytes()).inputs == bytes([FIRE]) * 70000
+    data = recorder.to_bytes()
+    with pytest.raises(ReplayError):
+        Replay.from_bytes(b'XXXX' + data[4:])
+    with pytest.raises(ReplayError):
+        Replay.from_bytes(data[:-1])
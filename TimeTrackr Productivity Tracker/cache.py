@@ -0,0 +1,125 @@
+"""Caches for the per-sample process name and window title lookups.
+
+`ProcessNameCache` maps a pid to its process name. A pid can be reused
+once its process exits, so names are stored under (pid, create_time):
+every lookup reads the create time (`psutil.Process(pid)` does, in one
+process-table read), and the costlier `name()` is only called for a
+process not seen before.
+
+`TitleCache` keeps window titles per window handle for `ttl` seconds,
+or until `invalidate` (the event source calls it on title changes).
+
+Both are bounded LRU caches and keep `CacheStats`: hit rate and lookup
+latency.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+import psutil
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0  # total time spent in lookups
+        self.max_seconds = 0.0
+
+    def record(self, hit: bool, seconds: float) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        n = self.lookups or 1
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "mean_us": self.seconds / n * 1e6,
+            "max_us": self.max_seconds * 1e6,
+        }
+
+    def __str__(self) -> str:
+        d = self.as_dict()
+        return f"{d['lookups']} lookups, {d['hit_rate']:.1%} hits, {d['mean_us']:.1f} us mean, {d['max_us']:.0f} us max"
+
+
+class ProcessNameCache:
+    """pid -> process name, safe against pid reuse; raises psutil.Error
+    for a process that is gone."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._names = OrderedDict()  # (pid, create_time) -> name
+
+    def name(self, pid: int) -> str:
+        start = time.perf_counter()
+        proc = psutil.Process(pid)  # reads the create time
+        key = (pid, proc.create_time())
+        name = self._names.get(key)
+        hit = name is not None
+        if hit:
+            self._names.move_to_end(key)
+        else:
+            name = self._names[key] = proc.name()
+            if len(self._names) > self.maxsize:
+                self._names.popitem(last=False)
+        self.stats.record(hit, time.perf_counter() - start)
+        return name
+
+    def clear(self) -> None:
+        self._names.clear()
+
+
+class TitleCache:
+    """Window handle -> title, kept for `ttl` seconds (forever with
+    ttl=None) or until invalidated."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = None, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._titles = OrderedDict()  # hwnd -> (title, fetched at)
+
+    def get(self, hwnd: int, fetch: Callable[[int], str]) -> str:
+        """The title of `hwnd`, calling `fetch(hwnd)` on a miss."""
+        start = time.perf_counter()
+        now = self.clock()
+        entry = self._titles.get(hwnd)
+        hit = entry is not None and (self.ttl is None or now - entry[1] < self.ttl)
+        if hit:
+            self._titles.move_to_end(hwnd)
+            title = entry[0]
+        else:
+            title = fetch(hwnd)
+            self._titles[hwnd] = (title, now)
+            self._titles.move_to_end(hwnd)
+            if len(self._titles) > self.maxsize:
+                self._titles.popitem(last=False)
+        self.stats.record(hit, time.perf_counter() - start)
+        return title
+
+    def invalidate(self, hwnd: int) -> None:
+        self._titles.pop(hwnd, None)
+
+    def clear(self) -> None:
+        self._titles.clear()
@@ -1,21 +1,114 @@
 import argparse
+import csv
+import datetime
+import re
+import sys
+import time
+from focus import default_source
+from store import GRAINS, IntervalLog
 from tracker import Tracker
 import os
 
+BUCKET_FORMATS = {"minute": "%Y-%m-%d %H:%M", "hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d"}
+
+
+def parse_time(text: str) -> float:
+    """A local ISO date or date-time ("2025-03-01", "2025-03-01 09:30"),
+    "today", or a time ago: "90m", "12h", "7d"."""
+    if text == "today":
+        return datetime.datetime.combine(datetime.date.today(), datetime.time()).timestamp()
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([mhd])", text)
+    if m:
+        return time.time() - float(m.group(1)) * {"m": 60, "h": 3600, "d": 86400}[m.group(2)]
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a date, date-time or time ago: {text!r}")
+
+
+def parse_hours(text: str):
+    m = re.fullmatch(r"(\d{1,2})-(\d{1,2})", text)
+    if not m or not 0 <= int(m.group(1)) < int(m.group(2)) <= 24:
+        raise argparse.ArgumentTypeError(f"expected hours of the day like 9-12, got {text!r}")
+    return int(m.group(1)), int(m.group(2))
+
+
+def query_main(argv) -> None:
+    parser = argparse.ArgumentParser(prog="timetrackr query", description="Answer questions over a TimeTrackr log")
+    parser.add_argument("--log", type=str, default="timetrackr.db", help="SQLite log written by --log (default: timetrackr.db)")
+    parser.add_argument("--since", type=parse_time, help="Start: 2025-03-01, '2025-03-01 09:00', today, 7d (ago)")
+    parser.add_argument("--until", type=parse_time, help="End (exclusive), same forms as --since")
+    parser.add_argument("--by", choices=["app", "title"], default="app", help="Group by process name, or by name and window title")
+    parser.add_argument("--bucket", choices=list(GRAINS), help="Also split the time per minute, hour or day")
+    parser.add_argument("--hours", type=parse_hours, help="Only these local hours of every day, e.g. 9-12")
+    parser.add_argument("--app", action="append", dest="apps", help="Only this process name (repeatable)")
+    parser.add_argument("--top", type=int, help="Keep the top N rows (of each bucket)")
+    parser.add_argument("--csv", type=str, help="Write the rows to this CSV file instead of printing them")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.log):
+        parser.error(f"no log at {args.log}")
+    # read-only: safe next to a tracker that is writing to the log
+    log = IntervalLog(args.log, readonly=True)
+    start = time.perf_counter()
+    rows = log.query(args.since, args.until, args.by == "title", args.bucket, args.apps, args.hours, args.top)
+    elapsed = time.perf_counter() - start
+    log.close()
+
+    fmt = BUCKET_FORMATS.get(args.bucket)
+    out = [(datetime.datetime.fromtimestamp(b).strftime(fmt) if fmt else "", k, secs) for b, k, secs in rows]
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["bucket", "app", "seconds", "hh:mm:ss"])
+            for b, k, secs in out:
+                writer.writerow([b, k, round(secs, 2), str(datetime.timedelta(seconds=int(secs)))])
+        print(f"Exported {len(out)} rows to {args.csv}")
+    else:
+        for b, k, secs in out:
+            print(f"{b + '  ' if b else ''}{str(datetime.timedelta(seconds=int(secs))):>10}  {k}")
+    print(f"({len(out)} rows in {elapsed * 1e3:.1f} ms)", file=sys.stderr)
+
 
 def main():
-    parser = argparse.ArgumentParser(prog="timetrackr", description="Track active window usage on Windows")
+    if sys.argv[1:2] == ["query"]:
+        return query_main(sys.argv[2:])
+    parser = argparse.ArgumentParser(prog="timetrackr", description="Track active window usage on Windows",
+                                     epilog="Run 'timetrackr query --help' to query a log written with --log.")
     parser.add_argument("--duration", "-d", type=float, default=60, help="Duration in seconds to run the tracker")
-    parser.add_argument("--interval", "-i", type=float, default=1.0, help="Polling interval in seconds")
+    parser.add_argument("--interval", "-i", type=float, default=1.0,
+                        help="Seconds between updates of the totals (and the base polling interval with --source poll)")
+    parser.add_argument("--source", choices=["auto", "events", "poll"], default="auto",
+                        help="How focus changes are detected: a Win32 event hook (events, the default) or adaptive polling")
     parser.add_argument("--by-title", action="store_true", help="Aggregate by window title as well as process name")
     parser.add_argument("--csv", type=str, help="Path to output CSV file")
     parser.add_argument("--plot", type=str, help="Path to save matplotlib plot image (png)")
+    parser.add_argument("--log", type=str,
+                        help="SQLite file to stream focus intervals to (with titles); totals include earlier runs logged there")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="Serve live stats as JSON on http://127.0.0.1:PORT/stats while tracking")
 
     args = parser.parse_args()
 
-    t = Tracker(interval=args.interval, by_title=args.by_title)
+    source = default_source(args.source, interval=args.interval, titles=args.by_title or bool(args.log))
+    log = IntervalLog(args.log) if args.log else None
+    if log is not None and log.recovered:
+        start, end, app, title = log.recovered
+        print(f"Recovered an interrupted interval in {app} ({end - start:.0f} s) from {args.log}")
+    t = Tracker(interval=args.interval, by_title=args.by_title, source=source, log=log)
+    server = None
+    if args.serve:
+        from live import serve
+
+        server = serve(t, args.serve)
+        print(f"Live stats at http://127.0.0.1:{args.serve}/stats")
     print(f"Running tracker for {args.duration} seconds (interval={args.interval})...")
     t.run_for(args.duration)
+    if server is not None:
+        server.shutdown()
+    if log is not None:
+        log.close()
+    print(f"Process name cache: {t.names.stats}")
 
     out_csv = args.csv or os.path.join(os.getcwd(), "timetrackr_report.csv")
     t.export_csv(out_csv)
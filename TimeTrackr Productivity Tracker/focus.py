@@ -0,0 +1,355 @@
+"""Focus sources: where the tracker learns which window has focus.
+
+A source reports the current foreground window and blocks in `wait`
+until focus changes (or a timeout passes), returning the time of the
+change and the new window. The tracker only wakes up when there is
+something to account for.
+
+- `WinEventSource`: event driven. A Win32 event hook calls back on every
+  foreground change (and, with titles, on title changes of the
+  foreground window); nothing runs while focus stays put.
+- `PollingSource`: fallback. Polls the foreground window, backing off
+  while focus is stable and snapping back to the base interval after a
+  change.
+- `ScriptedSource`: plays a fixed list of focus changes, in real or
+  virtual time, so the tracker can be driven (and tested) without Windows.
+
+The Win32 modules are imported on first use, so this module (and the
+tracker) can be imported on any platform.
+"""
+import queue
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+from cache import TitleCache
+
+
+class Window(NamedTuple):
+    hwnd: int
+    pid: int
+    title: str = ""
+    name: Optional[str] = None  # process name, when the source already knows it
+
+
+# (timestamp, window) reported by FocusSource.wait
+Change = Tuple[float, Optional[Window]]
+
+
+def _win32():
+    import win32gui
+    import win32process
+
+    return win32gui, win32process
+
+
+def _title(hwnd: int) -> str:
+    return _win32()[0].GetWindowText(hwnd) or ""
+
+
+def window_info(hwnd: int, titles: bool = True, title_cache: Optional[TitleCache] = None) -> Optional[Window]:
+    """The Window for a Win32 handle, or None for no window."""
+    if not hwnd:
+        return None
+    _, pid = _win32()[1].GetWindowThreadProcessId(hwnd)
+    if not titles:
+        title = ""
+    elif title_cache is not None:
+        title = title_cache.get(hwnd, _title)
+    else:
+        title = _title(hwnd)
+    return Window(hwnd, pid, title)
+
+
+class FocusSource:
+    """Base class; `exhausted` is set by sources that can run out."""
+
+    exhausted = False
+
+    def clock(self) -> float:
+        return time.time()
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        """Stop the source and wake up a pending `wait`."""
+
+    def current(self) -> Optional[Window]:
+        raise NotImplementedError
+
+    def wait(self, timeout: float) -> Optional[Change]:
+        """Block until focus changes or `timeout` seconds pass; return the
+        change, or None on timeout or stop."""
+        raise NotImplementedError
+
+
+class PollingSource(FocusSource):
+    """Polls the foreground window, every `interval` seconds right after
+    a change, growing by `backoff` per unchanged poll up to `max_interval`.
+
+    A poll is one GetForegroundWindow call (plus GetWindowText with
+    titles); the process id is only looked up when the handle changes.
+    With `title_ttl`, titles are cached per window for that many seconds,
+    trading that much delay in noticing a title change for fewer
+    GetWindowText calls (each one a message to the window's thread).
+    """
+
+    def __init__(self, interval: float = 1.0, max_interval: Optional[float] = None,
+                 backoff: float = 1.5, titles: bool = False, title_ttl: Optional[float] = None):
+        self.interval = float(interval)
+        self.max_interval = float(max_interval) if max_interval is not None else 4 * self.interval
+        self.backoff = float(backoff)
+        self.titles = bool(titles)
+        self.title_cache = TitleCache(ttl=title_ttl) if title_ttl else None
+        self.polls = 0
+        self._stop = threading.Event()
+        self._last = None
+        self._delay = self.interval
+        self._next_poll = 0.0
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._last = self.current()
+        self._delay = self.interval
+        self._next_poll = self.clock() + self._delay
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _poll(self) -> Optional[Window]:
+        self.polls += 1
+        win32gui, _ = _win32()
+        hwnd = win32gui.GetForegroundWindow()
+        last = self._last
+        if last is not None and hwnd == last.hwnd:
+            if not self.titles:
+                return last
+            title = self.title_cache.get(hwnd, _title) if self.title_cache else _title(hwnd)
+            return last._replace(title=title)
+        return window_info(hwnd, self.titles, self.title_cache)
+
+    def current(self) -> Optional[Window]:
+        return window_info(_win32()[0].GetForegroundWindow(), self.titles)
+
+    def wait(self, timeout: float) -> Optional[Change]:
+        deadline = self.clock() + timeout
+        while True:
+            now = self.clock()
+            if self._next_poll > deadline:
+                self._stop.wait(max(0.0, deadline - now))
+                return None
+            if self._stop.wait(max(0.0, self._next_poll - now)):
+                return None
+            window = self._poll()
+            now = self.clock()
+            if window != self._last:
+                self._last = window
+                self._delay = self.interval
+                self._next_poll = now + self._delay
+                return now, window
+            self._delay = min(self._delay * self.backoff, self.max_interval)
+            self._next_poll = now + self._delay
+
+
+# Win32 constants for the event hook
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+WM_QUIT = 0x0012
+
+
+class WinEventSource(FocusSource):
+    """Event-driven source built on SetWinEventHook.
+
+    A background thread installs the hook and runs a message loop; the
+    hook callback stamps each change and queues it for `wait`. With
+    `titles`, title changes of the foreground window count as changes too;
+    titles are cached per window and dropped when the window reports a
+    title change, so switching back to a window costs no GetWindowText.
+    """
+
+    def __init__(self, titles: bool = False):
+        self.titles = bool(titles)
+        self.title_cache = TitleCache() if titles else None  # only used on the hook thread
+        self.events = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def current(self) -> Optional[Window]:
+        return window_info(_win32()[0].GetForegroundWindow(), self.titles)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        while not self._queue.empty():  # a stale wake-up from the last stop
+            self._queue.get_nowait()
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread = None
+            raise self._error
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            import ctypes
+
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._queue.put(None)  # wake up a pending wait
+
+    def wait(self, timeout: float) -> Optional[Change]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _pump(self) -> None:
+        def callback(hook, event, hwnd, id_object, id_child, thread, ms):
+            if event == EVENT_OBJECT_NAMECHANGE:
+                if id_object != OBJID_WINDOW or id_child != 0:
+                    return
+                self.title_cache.invalidate(hwnd)
+                if hwnd != user32.GetForegroundWindow():
+                    return
+            now = time.time()
+            try:
+                window = window_info(hwnd, self.titles, self.title_cache)
+            except Exception:
+                window = None
+            self.events += 1
+            self._queue.put((now, window))
+
+        hooks = []
+        try:  # any failure here must reach start(), which is waiting on _ready
+            import ctypes
+            from ctypes import wintypes
+
+            user32 = ctypes.windll.user32
+            proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                           wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+            user32.SetWinEventHook.restype = wintypes.HANDLE
+            user32.SetWinEventHook.argtypes = (wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, proc_type,
+                                               wintypes.DWORD, wintypes.DWORD, wintypes.DWORD)
+            proc = proc_type(callback)  # must outlive the hooks
+            flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+            hooks.append(user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0, proc, 0, 0, flags))
+            if self.titles:
+                hooks.append(user32.SetWinEventHook(EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE, 0, proc, 0, 0, flags))
+            self._thread_id = threading.get_native_id()
+            if not all(hooks):
+                raise OSError("SetWinEventHook failed")
+        except Exception as exc:
+            self._error = exc
+        self._ready.set()
+        try:
+            if self._error is None:
+                msg = wintypes.MSG()
+                while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                    user32.TranslateMessage(ctypes.byref(msg))
+                    user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+
+
+class ScriptedSource(FocusSource):
+    """Plays a fixed script of focus changes, for tests and demos off Windows.
+
+    `script` is a list of (seconds, name) or (seconds, name, title) steps:
+    `seconds` after the start, focus moves to a window of process `name`.
+    The source is exhausted at `end` seconds (default: the last step).
+    Timestamps start at `start` (default: the time of `start()`; always
+    that in real time).
+
+    By default time is virtual: `wait` jumps straight to the next step, so
+    a tracker runs through a day-long script at once. With `realtime=True`
+    the steps happen at their wall-clock times.
+    """
+
+    def __init__(self, script: Sequence[tuple], end: Optional[float] = None,
+                 start: Optional[float] = None, realtime: bool = False):
+        self.steps = sorted(script, key=lambda step: step[0])
+        self.end = float(end) if end is not None else (self.steps[-1][0] if self.steps else 0.0)
+        self.start_time = start
+        self.realtime = bool(realtime)
+        self._stop = threading.Event()
+        self._t0 = 0.0
+        self._now = 0.0
+        self._next = 0
+        self._current = None
+
+    def clock(self) -> float:
+        return time.time() if self.realtime else self._now
+
+    def _window(self, i: int) -> Window:
+        step = self.steps[i]
+        return Window(0, 0, step[2] if len(step) > 2 else "", step[1])
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._t0 = time.time() if self.realtime or self.start_time is None else self.start_time
+        self._now = self._t0
+        self.exhausted = False
+        self._next = 0
+        self._current = None
+        # steps at (or before) the start are the initial focus
+        while self._next < len(self.steps) and self.steps[self._next][0] <= 0:
+            self._current = self._window(self._next)
+            self._next += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def current(self) -> Optional[Window]:
+        return self._current
+
+    def wait(self, timeout: float) -> Optional[Change]:
+        more = self._next < len(self.steps)
+        at = self._t0 + (self.steps[self._next][0] if more else self.end)
+        now = self.clock()
+        until = min(at, now + timeout)
+        if self.realtime:
+            if self._stop.wait(max(0.0, until - now)):
+                return None
+        else:
+            self._now = until
+        if until < at:
+            return None
+        if not more:
+            self.exhausted = True
+            return None
+        self._current = self._window(self._next)
+        self._next += 1
+        return at, self._current
+
+
+def default_source(kind: str = "auto", interval: float = 1.0, titles: bool = False) -> FocusSource:
+    """The focus source for `kind`: 'events', 'poll' or 'auto' (events on
+    Windows, falling back to polling if the event hook cannot be
+    installed; the event source comes back already started)."""
+    if kind == "poll":
+        return PollingSource(interval, titles=titles)
+    if kind not in ("auto", "events"):
+        raise ValueError(f"unknown focus source {kind!r}")
+    if sys.platform != "win32":
+        raise RuntimeError("foreground window tracking needs Windows; use a ScriptedSource elsewhere")
+    source = WinEventSource(titles)
+    if kind == "events":
+        return source
+    try:
+        source.start()
+    except Exception:
+        return PollingSource(interval, titles=titles)
+    return source
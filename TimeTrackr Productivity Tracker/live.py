@@ -0,0 +1,50 @@
+"""Optional HTTP endpoint for a running tracker's live stats.
+
+    GET /stats           Tracker.live_stats() as JSON (?top=N, default 5)
+    GET /snapshot        every key's seconds as JSON
+
+Requests are answered from the tracker's latest immutable snapshot on
+the server's own threads, so polling never blocks the sampler.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tracker import Tracker
+
+
+def serve(tracker: Tracker, port: int = 8765, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Start serving `tracker`'s stats in a background thread; call
+    `shutdown()` on the returned server to stop."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                try:
+                    top = int(parse_qs(url.query).get("top", ["5"])[0])
+                except ValueError:
+                    self.send_error(400, "top must be an integer")
+                    return
+                body = tracker.live_stats(top)
+            elif url.path == "/snapshot":
+                snap = tracker.snapshot()
+                body = {"time": snap.time, "data": snap.totals()}
+            else:
+                self.send_error(404)
+                return
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # polled often; keep the console quiet
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,442 @@
+"""Append-only on-disk log of focus intervals, with time-bucketed rollups.
+
+The tracker streams every focus interval (start, end, app, title) to a
+SQLite database in WAL mode. Intervals are buffered in memory and
+written in one transaction per batch, every `flush_interval` seconds or
+`batch_size` intervals, whichever comes first. Each commit is fsynced
+(synchronous=FULL), so a crash loses at most the last batch.
+
+The interval still in progress is saved with every batch as a single
+"open" row. On opening the log, a leftover open row (the tracker did
+not stop cleanly) is closed at its last saved end and appended. A crash
+or reboot therefore costs at most `flush_interval` seconds of tracking.
+
+Only one writer may have a log open: it holds an OS lock on
+`<path>.lock` (released by the OS if the process dies), and only it
+recovers the open row. Open the log with `readonly=True` to query it
+alongside a running tracker; a reader never writes to the database.
+
+Apps and titles are stored once, in the `windows` table; an interval row
+is two timestamps and a window id.
+
+The same transaction that appends intervals adds them to three rollup
+tables: seconds per window per minute, per hour and per local calendar
+day. `query` splits a time range into whole days, hours and minutes
+plus the sub-minute edges, and reads each part from the coarsest table
+that covers it (the edges from the raw intervals), so a question over a
+year of history reads a few hundred rows. Hour rollups are UTC hours: in
+a zone whose offset is not a whole number of hours they are not local
+hours, so there answers per bucket or for `hours=` are read from the
+minute rollups instead.
+"""
+import datetime
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS windows (
+    id INTEGER PRIMARY KEY,
+    app TEXT NOT NULL,
+    title TEXT NOT NULL,
+    UNIQUE (app, title)
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    window INTEGER NOT NULL REFERENCES windows (id)
+);
+CREATE INDEX IF NOT EXISTS intervals_start ON intervals (start);
+CREATE TABLE IF NOT EXISTS open_interval (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    window INTEGER NOT NULL REFERENCES windows (id)
+);
+"""
+
+# rollup tables: seconds per window per bucket; a bucket is the epoch
+# time its minute, hour or local day starts
+_ROLLUP = """
+CREATE TABLE IF NOT EXISTS rollup_{grain} (
+    bucket INTEGER NOT NULL,
+    window INTEGER NOT NULL REFERENCES windows (id),
+    seconds REAL NOT NULL,
+    PRIMARY KEY (bucket, window)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollup_{grain}_window ON rollup_{grain} (window, bucket);
+"""
+
+
+def _local_midnight(t: float) -> int:
+    day = datetime.date.fromtimestamp(t)
+    return int(datetime.datetime(day.year, day.month, day.day).timestamp())
+
+
+def _next_midnight(bucket: int) -> int:
+    day = datetime.date.fromtimestamp(bucket) + datetime.timedelta(days=1)
+    return int(datetime.datetime(day.year, day.month, day.day).timestamp())
+
+
+# grain -> (bucket of a time, start of the next bucket)
+GRAINS: Dict[str, Tuple[Callable[[float], int], Callable[[int], int]]] = {
+    "minute": (lambda t: int(t // 60) * 60, lambda b: b + 60),
+    "hour": (lambda t: int(t // 3600) * 3600, lambda b: b + 3600),
+    "day": (_local_midnight, _next_midnight),
+}
+
+
+def window_key(app: str, title: str, by_title: bool) -> str:
+    """The totals key of a window: the process name, or with `by_title`
+    "name - title" (the unknown app is "Unknown" either way)."""
+    if by_title and app != "Unknown":
+        return f"{app} - {title}"
+    return app
+
+
+def _lock(path: str):
+    """Open and lock `path`; the lock lasts until the returned file is
+    closed (or the process dies). RuntimeError if someone else holds it."""
+    f = open(path, "a+b")
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        raise RuntimeError(f"{path} is locked: another tracker is writing to this log")
+    return f
+
+
+def _local_hour(t: float) -> int:
+    """Start of the local hour `t` is in."""
+    return int(t // 60) * 60 - datetime.datetime.fromtimestamp(t).minute * 60
+
+
+def _whole_hour_offset(t: float) -> bool:
+    """Whether local time is a whole number of hours off UTC at `t`."""
+    return datetime.datetime.fromtimestamp(t).astimezone().utcoffset().total_seconds() % 3600 == 0
+
+
+def _pieces(start: float, end: float, grain: str) -> Iterator[Tuple[int, float]]:
+    """(bucket, seconds) of [start, end) split at the grain's boundaries."""
+    floor, step = GRAINS[grain]
+    t = start
+    while t < end:
+        bucket = floor(t)
+        stop = min(end, step(bucket))
+        yield bucket, stop - t
+        t = stop
+
+
+def _ceil(t: float, grain: str) -> float:
+    floor, step = GRAINS[grain]
+    bucket = floor(t)
+    return bucket if bucket == t else step(bucket)
+
+
+def plan(since: float, until: float, coarsest: str = "day") -> List[Tuple[str, float, float]]:
+    """Cover [since, until) with (source, lo, hi) parts: 'raw' for the
+    sub-minute edges, then the minute, hour and day rollups inward, up to
+    `coarsest`."""
+    parts = []
+    lo, hi = since, until
+    source = "raw"
+    for grain in ("minute", "hour", "day"):
+        inner_lo, inner_hi = _ceil(lo, grain), GRAINS[grain][0](hi)
+        # a local day that does not start on the hour (half-hour zones)
+        # cannot be split from hour buckets; stay on hours there
+        aligned = grain != "day" or (inner_lo % 3600 == 0 and inner_hi % 3600 == 0)
+        if inner_lo >= inner_hi or not aligned:
+            break
+        parts += [(source, lo, inner_lo), (source, inner_hi, hi)]
+        lo, hi, source = inner_lo, inner_hi, grain
+        if grain == coarsest:
+            break
+    parts.append((source, lo, hi))
+    return [part for part in parts if part[1] < part[2]]
+
+
+class IntervalLog:
+    """Batched, crash-safe writer (and reader) of the interval log at `path`.
+
+    With `readonly`, the log is only queried: it must exist at the
+    current schema version, nothing is recovered or written, and it may
+    be open while a tracker writes to it.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0, batch_size: int = 256, readonly: bool = False):
+        self.path = path
+        self.flush_interval = float(flush_interval)
+        self.batch_size = int(batch_size)
+        self.readonly = bool(readonly)
+        self.recovered = None  # (start, end, app, title) closed on open, if any
+        self._lock = threading.Lock()
+        self._pending = []  # (start, end, window id)
+        self._open = None  # (start, end, window id) of the interval in progress
+        self._dirty = False  # anything to write since the last flush
+        self._windows = {}  # (app, title) -> id
+        self._last_flush = time.monotonic()
+        # longest interval, to bound index range scans over `start`, as of
+        # interval rowid `_seen`
+        self._longest = 0.0
+        self._seen = 0
+        self._owner = None
+        if self.readonly:
+            uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+            self._db = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._db.close()
+                raise ValueError(f"{path}: log schema version {version}, expected {SCHEMA_VERSION}"
+                                 f" (open it with the tracker once to upgrade it)")
+            return
+        if path != ":memory:":
+            self._owner = _lock(path + ".lock")
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{path}: log schema version {version} is newer than this TimeTrackr ({SCHEMA_VERSION})")
+        if version < SCHEMA_VERSION:
+            self._db.executescript(_SCHEMA + "".join(_ROLLUP.format(grain=grain) for grain in GRAINS))
+            if version == 1:
+                # version 1 logs had no rollups
+                with self._db:
+                    self._db.execute("BEGIN")
+                    self._rollup(self._db.execute("SELECT start, end, window FROM intervals").fetchall())
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        with self._db:
+            self._db.execute("BEGIN")
+            self._recover()
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Catch up with windows and intervals added (by a writer) since
+        the last call."""
+        known = max(self._windows.values(), default=0)
+        for id_, app, title in self._db.execute("SELECT id, app, title FROM windows WHERE id > ?", (known,)):
+            self._windows[app, title] = id_
+        last, longest = self._db.execute(
+            "SELECT MAX(rowid), MAX(end - start) FROM intervals WHERE rowid > ?", (self._seen,)).fetchone()
+        if last is not None:
+            self._seen = last
+            self._longest = max(self._longest, longest)
+
+    def _recover(self) -> None:
+        row = self._db.execute(
+            "SELECT o.start, o.end, o.window, w.app, w.title FROM open_interval o JOIN windows w ON w.id = o.window"
+        ).fetchone()
+        if row is None:
+            return
+        start, end, window, app, title = row
+        if end > start:
+            self._db.execute("INSERT INTO intervals (start, end, window) VALUES (?, ?, ?)", (start, end, window))
+            self._rollup([(start, end, window)])
+        self._db.execute("DELETE FROM open_interval")
+        self.recovered = (start, end, app, title)
+
+    def _rollup(self, intervals: Sequence[Tuple[float, float, int]]) -> None:
+        for grain in GRAINS:
+            seconds = {}
+            for start, end, window in intervals:
+                for bucket, secs in _pieces(start, end, grain):
+                    seconds[bucket, window] = seconds.get((bucket, window), 0.0) + secs
+            self._db.executemany(
+                f"INSERT INTO rollup_{grain} (bucket, window, seconds) VALUES (?, ?, ?)"
+                f" ON CONFLICT (bucket, window) DO UPDATE SET seconds = seconds + excluded.seconds",
+                [(bucket, window, secs) for (bucket, window), secs in seconds.items()])
+
+    def _window_id(self, app: str, title: str) -> int:
+        if self.readonly:
+            raise ValueError(f"{self.path} is open read-only")
+        key = (app, title)
+        id_ = self._windows.get(key)
+        if id_ is None:
+            # written at once (outside the batch) so ids are stable; a new
+            # window is rare next to the intervals spent in it
+            cur = self._db.execute("INSERT OR IGNORE INTO windows (app, title) VALUES (?, ?)", key)
+            id_ = cur.lastrowid if cur.rowcount else self._db.execute(
+                "SELECT id FROM windows WHERE app = ? AND title = ?", key).fetchone()[0]
+            self._windows[key] = id_
+        return id_
+
+    def append(self, start: float, end: float, app: str, title: str = "") -> None:
+        """Log a finished interval; it reaches disk with the next batch."""
+        with self._lock:
+            if end > start:
+                self._pending.append((start, end, self._window_id(app, title)))
+            self._open = None
+            self._dirty = True
+            self._maybe_flush()
+
+    def checkpoint(self, start: float, end: float, app: str, title: str = "") -> None:
+        """Note the interval in progress, so a crash keeps it up to `end`."""
+        with self._lock:
+            self._open = (start, end, self._window_id(app, title))
+            self._dirty = True
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._dirty:
+            return
+        pending, self._pending = self._pending, []
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT INTO intervals (start, end, window) VALUES (?, ?, ?)", pending)
+            self._rollup(pending)
+            if self._open is not None:
+                self._db.execute("INSERT OR REPLACE INTO open_interval (id, start, end, window) VALUES (0, ?, ?, ?)",
+                                 self._open)
+            else:
+                self._db.execute("DELETE FROM open_interval")
+        for start, end, _ in pending:
+            self._longest = max(self._longest, end - start)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        """Write (and fsync) everything buffered now."""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            self._db.close()
+            if self._owner is not None:
+                self._owner.close()
+                self._owner = None
+
+    def _flush_pending(self) -> None:
+        # before reading: only finished intervals are queried, so a
+        # checkpoint alone is no reason to write
+        if self._pending:
+            self._flush()
+
+    def span(self) -> Optional[Tuple[float, float]]:
+        """(first start, last end) of the logged intervals, or None if empty."""
+        with self._lock:
+            self._flush_pending()
+            row = self._db.execute("SELECT MIN(start), MAX(end) FROM intervals").fetchone()
+        return None if row[0] is None else row
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None, by_title: bool = False,
+              bucket: Optional[str] = None, apps: Optional[Sequence[str]] = None,
+              hours: Optional[Tuple[int, int]] = None, top: Optional[int] = None) -> List[Tuple[Optional[int], str, float]]:
+        """Seconds spent per app (or per "app - title" with `by_title`)
+        within [since, until) (default: all of the log).
+
+        With `bucket` ('minute', 'hour' or 'day'), the seconds are also
+        split per bucket. `apps` keeps only those process names; `hours`
+        = (first, last) keeps only the local hours of the day in
+        [first, last). Returns (bucket start or None, key, seconds) rows,
+        by bucket and then most time first; `top` keeps the first `top`
+        keys of each bucket.
+        """
+        if bucket is not None and bucket not in GRAINS:
+            raise ValueError(f"unknown bucket {bucket!r}; expected one of {', '.join(GRAINS)}")
+        if since is None or until is None:
+            span = self.span()
+            if span is None:
+                return []
+            since = span[0] if since is None else since
+            until = span[1] if until is None else until
+        coarsest = bucket or "day"
+        if hours is not None and coarsest == "day":
+            coarsest = "hour"  # hours of the day need hour buckets at most
+        per_bucket = bucket is not None or hours is not None
+        if per_bucket and not (_whole_hour_offset(since) and _whole_hour_offset(until)):
+            # UTC hours straddle local hours (and days) here
+            coarsest = "minute"
+        label = _local_hour if bucket == "hour" else GRAINS[bucket][0] if bucket else None
+
+        totals = {}  # (bucket, window id) -> seconds
+        labels = {}  # start of a part or rollup bucket -> its bucket, or False if outside `hours`
+
+        def add(t, window, secs):
+            b = labels.get(t)
+            if b is None:
+                if hours is not None and not hours[0] <= datetime.datetime.fromtimestamp(t).hour < hours[1]:
+                    b = labels[t] = False
+                else:
+                    b = labels[t] = label(t) if label else None
+            if b is not False:
+                totals[b, window] = totals.get((b, window), 0.0) + secs
+
+        with self._lock, self._db:
+            self._flush_pending()
+            # one read transaction: the windows and intervals a writer adds
+            # meanwhile are either all seen or not at all
+            self._db.execute("BEGIN")
+            if self.readonly:
+                self._refresh()
+            windows = {id_: (app, title) for (app, title), id_ in self._windows.items()}
+            where, args = "", []
+            if apps:
+                ids = [id_ for id_, (app, _) in windows.items() if app in set(apps)]
+                where = f" AND window IN ({', '.join('?' * len(ids))})"
+                args = ids
+            # grouped by window id (the keys are joined in below): integer
+            # grouping that follows the rollups' primary key
+            for source, lo, hi in plan(since, until, coarsest):
+                if source == "raw":
+                    # per minute, so each piece has one bucket and hour of the day
+                    for minute, _ in _pieces(lo, hi, "minute"):
+                        a, b = max(lo, minute), min(hi, minute + 60)
+                        rows = self._db.execute(
+                            f"SELECT window, SUM(MIN(end, ?) - MAX(start, ?)) FROM intervals"
+                            f" WHERE start >= ? AND start < ? AND end > ?{where} GROUP BY window",
+                            [b, a, a - self._longest, b, a] + args)
+                        for window, secs in rows:
+                            add(a, window, secs)
+                elif per_bucket:
+                    rows = self._db.execute(
+                        f"SELECT bucket, window, SUM(seconds) FROM rollup_{source}"
+                        f" WHERE bucket >= ? AND bucket < ?{where} GROUP BY bucket, window",
+                        [lo, hi] + args)
+                    for b, window, secs in rows:
+                        add(b, window, secs)
+                else:
+                    rows = self._db.execute(
+                        f"SELECT window, SUM(seconds) FROM rollup_{source}"
+                        f" WHERE bucket >= ? AND bucket < ?{where} GROUP BY window",
+                        [lo, hi] + args)
+                    for window, secs in rows:
+                        add(lo, window, secs)
+
+        keyed = {}
+        for (b, window), secs in totals.items():
+            k = window_key(*windows[window], by_title)
+            keyed[b, k] = keyed.get((b, k), 0.0) + secs
+        rows = sorted(((b, k, secs) for (b, k), secs in keyed.items()),
+                      key=lambda row: (row[0] or 0, -row[2]))
+        if top is not None:
+            kept, counts = [], {}
+            for row in rows:
+                counts[row[0]] = counts.get(row[0], 0) + 1
+                if counts[row[0]] <= top:
+                    kept.append(row)
+            rows = kept
+        return rows
+
+    def totals(self, by_title: bool = False, since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, float]:
+        """Seconds per app (or per "app - title") over the logged intervals,
+        optionally clipped to [since, until)."""
+        return {k: secs for _, k, secs in self.query(since, until, by_title)}
@@ -0,0 +1,86 @@
+import cache
+from cache import ProcessNameCache, TitleCache
+
+
+class FakeProcess:
+    """psutil.Process over a table of pid -> (create time, name), counting
+    name() calls."""
+
+    table = {}
+    name_calls = 0
+
+    def __init__(self, pid):
+        self.pid = pid
+        self._create_time, self._name = self.table[pid]
+
+    def create_time(self):
+        return self._create_time
+
+    def name(self):
+        FakeProcess.name_calls += 1
+        return self._name
+
+
+def fake_psutil(monkeypatch, table):
+    monkeypatch.setattr(FakeProcess, "table", table)
+    monkeypatch.setattr(FakeProcess, "name_calls", 0)
+    monkeypatch.setattr(cache.psutil, "Process", FakeProcess)
+
+
+def test_names_are_cached_per_process(monkeypatch):
+    fake_psutil(monkeypatch, {10: (1.0, "code.exe"), 11: (1.0, "chrome.exe")})
+    names = ProcessNameCache()
+    assert [names.name(10), names.name(11), names.name(10)] == ["code.exe", "chrome.exe", "code.exe"]
+    assert FakeProcess.name_calls == 2
+    assert (names.stats.hits, names.stats.misses) == (1, 2)
+
+
+def test_reused_pid_gets_the_new_name(monkeypatch):
+    table = {10: (1.0, "code.exe")}
+    fake_psutil(monkeypatch, table)
+    names = ProcessNameCache()
+    assert names.name(10) == "code.exe"
+    table[10] = (2.0, "notepad.exe")  # exited, and the pid was reused at once
+    assert names.name(10) == "notepad.exe"
+
+
+def test_least_recently_used_name_is_evicted(monkeypatch):
+    fake_psutil(monkeypatch, {pid: (1.0, f"p{pid}") for pid in range(3)})
+    names = ProcessNameCache(maxsize=2)
+    names.name(0)
+    names.name(1)
+    names.name(0)
+    names.name(2)  # evicts 1, the least recently used
+    calls = FakeProcess.name_calls
+    names.name(0)
+    assert FakeProcess.name_calls == calls
+    names.name(1)
+    assert FakeProcess.name_calls == calls + 1
+
+
+def test_titles_expire_after_ttl_and_on_invalidate():
+    now = [0.0]
+    titles = TitleCache(ttl=2.0, clock=lambda: now[0])
+    fetched = []
+
+    def fetch(hwnd):
+        fetched.append(hwnd)
+        return f"title {len(fetched)}"
+
+    assert titles.get(1, fetch) == "title 1"
+    now[0] = 1.5
+    assert titles.get(1, fetch) == "title 1"
+    now[0] = 2.5
+    assert titles.get(1, fetch) == "title 2"
+    titles.invalidate(1)
+    assert titles.get(1, fetch) == "title 3"
+    assert titles.stats.hits == 1 and titles.stats.misses == 3
+
+
+def test_titles_without_ttl_are_kept_until_evicted():
+    titles = TitleCache(maxsize=2)
+    for hwnd in (1, 2, 1, 3):  # 2 is the least recently used when 3 comes
+        titles.get(hwnd, str)
+    assert titles.stats.misses == 3
+    titles.get(1, lambda hwnd: "refetched")
+    assert titles.get(2, lambda hwnd: "refetched") == "refetched"
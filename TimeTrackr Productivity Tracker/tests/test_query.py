@@ -0,0 +1,172 @@
+import datetime
+import random
+import time
+
+import pytest
+
+from store import GRAINS, IntervalLog, plan
+
+
+@pytest.fixture
+def tz(monkeypatch):
+    """Switch the local time zone for one test."""
+    if not hasattr(time, "tzset"):
+        pytest.skip("needs time.tzset")
+
+    def use(name):
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+
+    yield use
+    monkeypatch.undo()
+    time.tzset()
+
+
+def at(*args):
+    return datetime.datetime(*args).timestamp()
+
+
+def check_cover(since, until, parts):
+    # contiguous pieces of [since, until), each aligned to its grain
+    edges = sorted((lo, hi) for _, lo, hi in parts)
+    assert edges[0][0] == since and edges[-1][1] == until
+    assert all(a[1] == b[0] for a, b in zip(edges, edges[1:]))
+    for source, lo, hi in parts:
+        if source != "raw":
+            floor, step = GRAINS[source]
+            assert floor(lo) == lo and floor(hi) == hi
+
+
+def test_plan_edges(tz):
+    tz("Europe/Paris")
+    assert plan(100.0, 100.0) == []
+    assert plan(100.5, 130.0) == [("raw", 100.5, 130.0)]  # within one minute
+    assert plan(120.0, 180.0) == [("minute", 120.0, 180.0)]
+    assert plan(3600.0, 7200.0) == [("hour", 3600.0, 7200.0)]
+    assert plan(3600.0, 7200.0, coarsest="minute") == [("minute", 3600.0, 7200.0)]
+    since, until = at(2025, 3, 1, 9, 58, 30) + 0.5, at(2025, 3, 4, 17, 2, 12)
+    parts = plan(since, until)
+    check_cover(since, until, parts)
+    assert {source for source, _, _ in parts} == {"raw", "minute", "hour", "day"}
+    assert [source for source, _, _ in parts if source == "day"] == ["day"]
+
+
+def test_plan_covers_random_ranges(tz):
+    tz("Asia/Kolkata")  # local days start on the half hour
+    rng = random.Random(5)
+    base = at(2025, 1, 1)
+    for _ in range(200):
+        since = base + rng.uniform(0, 30 * 86400)
+        until = since + rng.choice((30, 3600, 86400, 10 * 86400)) * rng.random()
+        if until > since:
+            parts = plan(since, until)
+            check_cover(since, until, parts)
+            # days cannot be split from hour buckets there
+            assert "day" not in {source for source, _, _ in parts}
+
+
+def test_local_hours_in_a_half_hour_zone(tmp_path, tz):
+    # hour rollups are UTC hours, which start at :30 local time there
+    tz("Asia/Kolkata")
+    log = IntervalLog(str(tmp_path / "log.db"))
+    log.append(at(2025, 3, 3, 9), at(2025, 3, 3, 10), "a", "")
+    day = at(2025, 3, 3), at(2025, 3, 4)
+    assert log.query(*day, hours=(9, 12)) == [(None, "a", 3600.0)]
+    assert log.query(*day, hours=(10, 12)) == []
+    assert log.query(*day, bucket="hour") == [(at(2025, 3, 3, 9), "a", 3600.0)]
+    assert log.query(*day, bucket="day", hours=(9, 10)) == [(at(2025, 3, 3), "a", 3600.0)]
+    log.close()
+
+
+def test_rollups_match_raw_intervals(tmp_path):
+    log = IntervalLog(str(tmp_path / "log.db"))
+    # crossing minute, hour and day boundaries
+    log.append(at(2025, 3, 1, 23, 59, 30), at(2025, 3, 2, 0, 1, 15), "a", "x")
+    log.append(at(2025, 3, 2, 0, 1, 15), at(2025, 3, 2, 2, 0, 0), "b", "y")
+    log.flush()
+    db = log._db
+    raw = dict(db.execute("SELECT window, SUM(end - start) FROM intervals GROUP BY window"))
+    for grain in GRAINS:
+        rolled = dict(db.execute(f"SELECT window, SUM(seconds) FROM rollup_{grain} GROUP BY window"))
+        assert rolled == pytest.approx(raw)
+    days = log.query(bucket="day")
+    assert [(datetime.date.fromtimestamp(b), k, s) for b, k, s in days] == [
+        (datetime.date(2025, 3, 1), "a", 30.0),
+        (datetime.date(2025, 3, 2), "b", 7125.0),
+        (datetime.date(2025, 3, 2), "a", 75.0),
+    ]
+    log.close()
+
+
+def test_day_buckets_follow_dst(tmp_path, tz):
+    tz("America/New_York")
+    log = IntervalLog(str(tmp_path / "log.db"))
+    log.append(at(2025, 3, 8, 12), at(2025, 3, 10, 12), "spring", "")
+    log.append(at(2025, 11, 1, 12), at(2025, 11, 3, 12), "fall", "")
+    days = {(datetime.date.fromtimestamp(b), k): s for b, k, s in log.query(bucket="day")}
+    assert days[datetime.date(2025, 3, 9), "spring"] == 23 * 3600
+    assert days[datetime.date(2025, 11, 2), "fall"] == 25 * 3600
+    # the same hours of the day, either side of the change
+    hours = log.query(at(2025, 3, 8), at(2025, 3, 11), hours=(12, 13))
+    assert hours == [(None, "spring", 2 * 3600.0)]
+    log.close()
+
+
+def brute_force(intervals, since, until, by_title, bucket, apps, hours):
+    totals = {}
+    for start, end, app, title in intervals:
+        if apps and app not in apps:
+            continue
+        t = max(start, since)
+        end = min(end, until)
+        while t < end:
+            stop = min(end, (t // 60 + 1) * 60)
+            local = datetime.datetime.fromtimestamp(t)
+            if hours is None or hours[0] <= local.hour < hours[1]:
+                if bucket == "hour":
+                    b = t - t % 60 - local.minute * 60
+                else:
+                    b = GRAINS[bucket][0](t) if bucket else None
+                k = f"{app} - {title}" if by_title and app != "Unknown" else app
+                totals[b, k] = totals.get((b, k), 0.0) + (stop - t)
+            t = stop
+    return totals
+
+
+@pytest.mark.parametrize("zone", ["Europe/Berlin", "Asia/Kolkata"])  # a DST change; half-hour offset
+def test_query_matches_brute_force(tmp_path, tz, zone):
+    tz(zone)
+    rng = random.Random(11)
+    apps = ["code.exe", "chrome.exe", "slack.exe", "Unknown"]
+    intervals = []
+    t = at(2025, 3, 27, 8)
+    while t < at(2025, 4, 3):
+        d = rng.expovariate(1 / 600)
+        intervals.append((t, t + d, rng.choice(apps), f"title {rng.randrange(4)}"))
+        t += d + (rng.expovariate(1 / 3600) if rng.random() < 0.1 else 0)
+    log = IntervalLog(str(tmp_path / "log.db"), batch_size=1000)
+    for interval in intervals:
+        log.append(*interval)
+    first, last = intervals[0][0], intervals[-1][1]
+    for _ in range(60):
+        since = rng.uniform(first - 3600, last)
+        until = rng.uniform(since, last + 3600)
+        args = dict(by_title=rng.random() < 0.5, bucket=rng.choice([None, *GRAINS]),
+                    apps=rng.choice([None, ["code.exe"], ["chrome.exe", "Unknown"]]),
+                    hours=rng.choice([None, (9, 12), (0, 24), (13, 14)]))
+        got = {(b, k): s for b, k, s in log.query(since, until, **args)}
+        expected = brute_force(intervals, since, until, **args)
+        assert got.keys() == expected.keys()
+        for key, secs in expected.items():
+            assert got[key] == pytest.approx(secs, abs=1e-6)
+    log.close()
+
+
+def test_top_keeps_the_largest_per_bucket(tmp_path):
+    log = IntervalLog(str(tmp_path / "log.db"))
+    for i, app in enumerate("abcd"):
+        log.append(at(2025, 5, 1, 10), at(2025, 5, 1, 10, 10 + i), app, "")
+        log.append(at(2025, 5, 2, 10), at(2025, 5, 2, 10, 10 - i), app, "")
+    rows = log.query(bucket="day", top=2)
+    assert [k for _, k, _ in rows] == ["d", "c", "a", "b"]
+    log.close()
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from focus import ScriptedSource
+from store import IntervalLog
+from tracker import Tracker
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def crash_after(path, code):
+    """Run `code` with `log` open at `path` in a child process that then
+    dies without closing it."""
+    script = f"import os, sys; sys.path.insert(0, {HERE!r})\nfrom store import IntervalLog\n" \
+             f"log = IntervalLog({path!r}, flush_interval=0)\n{code}\nos._exit(0)\n"
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+def test_intervals_survive_a_clean_close(tmp_path):
+    path = str(tmp_path / "log.db")
+    log = IntervalLog(path, flush_interval=60)
+    log.append(1000, 1060, "code.exe", "a.py")
+    log.append(1060, 1090, "chrome.exe", "docs")
+    log.close()
+    log = IntervalLog(path)
+    assert log.recovered is None
+    assert log.totals() == {"code.exe": 60.0, "chrome.exe": 30.0}
+    assert log.totals(by_title=True) == {"code.exe - a.py": 60.0, "chrome.exe - docs": 30.0}
+    log.close()
+
+
+def test_crash_keeps_the_open_interval_up_to_its_checkpoint(tmp_path):
+    path = str(tmp_path / "log.db")
+    crash_after(path, "log.append(1000, 1100, 'code.exe', 'a.py')\nlog.checkpoint(1100, 1250, 'chrome.exe', 'docs')")
+    log = IntervalLog(path)
+    assert log.recovered == (1100, 1250, "chrome.exe", "docs")
+    assert log.totals() == {"code.exe": 100.0, "chrome.exe": 150.0}
+    log.close()
+    log = IntervalLog(path)  # recovered once only
+    assert log.recovered is None and log.totals()["chrome.exe"] == 150.0
+    log.close()
+
+
+def test_crash_loses_at_most_the_unflushed_batch(tmp_path):
+    path = str(tmp_path / "log.db")
+    crash_after(path, "log.flush_interval = 3600\nlog.append(1000, 1100, 'a', '')\nlog.flush()\n"
+                      "log.append(1100, 1200, 'b', '')")
+    log = IntervalLog(path)
+    assert log.totals() == {"a": 100.0}
+    log.close()
+
+
+def test_tracker_resumes_from_the_log(tmp_path):
+    path = str(tmp_path / "log.db")
+    for _ in range(2):
+        log = IntervalLog(path)
+        t = Tracker(interval=5, by_title=True, log=log,
+                    source=ScriptedSource([(0, "code.exe", "a.py"), (30, "Unknown")], end=40, start=1000.0))
+        t.run_for(10)
+        log.close()
+    assert t.data == {"code.exe - a.py": 60.0, "Unknown": 20.0}
+    log = IntervalLog(path)
+    assert log.totals(by_title=True) == t.data
+    log.close()
+
+
+def test_one_writer_at_a_time(tmp_path):
+    path = str(tmp_path / "log.db")
+    log = IntervalLog(path)
+    with pytest.raises(RuntimeError):
+        IntervalLog(path)
+    log.close()
+    IntervalLog(path).close()
+
+
+def test_reader_does_not_recover_a_live_writers_interval(tmp_path):
+    path = str(tmp_path / "log.db")
+    writer = IntervalLog(path, flush_interval=0)
+    writer.checkpoint(1000, 1300, "code.exe", "a.py")
+    reader = IntervalLog(path, readonly=True)
+    assert reader.recovered is None and reader.totals() == {}
+    writer.append(1000, 1600, "code.exe", "a.py")
+    writer.append(1600, 1700, "chrome.exe", "docs")
+    writer.flush()
+    # new windows and intervals are picked up by the next query
+    assert reader.totals() == {"code.exe": 600.0, "chrome.exe": 100.0}
+    with pytest.raises(ValueError):
+        reader.append(1700, 1800, "code.exe", "a.py")
+    reader.close()
+    writer.close()
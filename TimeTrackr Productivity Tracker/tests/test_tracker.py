@@ -0,0 +1,132 @@
+import pytest
+
+import focus
+from focus import PollingSource, ScriptedSource, WinEventSource, Window, default_source
+from tracker import Tracker
+
+SCRIPT = [
+    (0, "code.exe", "a.py"),
+    (10, "chrome.exe", "docs"),
+    (25, "code.exe", "b.py"),
+    (30, "code.exe", "a.py"),
+]
+
+
+def run(by_title=False, interval=5.0, end=40):
+    t = Tracker(interval=interval, by_title=by_title, source=ScriptedSource(SCRIPT, end=end, start=1000.0))
+    t.run_for(10)
+    return t
+
+
+def test_scripted_totals():
+    t = run()
+    assert t.data == {"code.exe": 25.0, "chrome.exe": 15.0}
+    snap = t.snapshot()
+    assert snap.time == 1040.0 and snap.current is None
+
+
+def test_by_title_keys():
+    assert run(by_title=True).data == {"code.exe - a.py": 20.0, "chrome.exe - docs": 15.0, "code.exe - b.py": 5.0}
+
+
+def test_unknown_app_has_no_title_in_by_title_mode():
+    t = Tracker(by_title=True)
+    assert t._key(("Unknown", "whatever")) == "Unknown"
+    assert t._key(t._resolve(None)) == "Unknown"
+
+
+def test_updates_every_interval_while_focus_stays():
+    # a snapshot at every focus change and every `interval` in between,
+    # plus the first and the final one
+    t = run(interval=5.0)
+    assert t.snapshot().seq == 10
+    t = run(interval=100.0)
+    assert t.snapshot().seq == 6
+
+
+def test_live_stats():
+    stats = run().live_stats(top_n=1)
+    assert stats["top"] == [{"app": "code.exe", "seconds": 25.0}]
+    assert stats["total_seconds"] == 40.0 and stats["keys"] == 2 and not stats["running"]
+
+
+class FakeWin32:
+    """win32gui and win32process stand-ins, with a fake clock that
+    `wait` advances instead of sleeping."""
+
+    def __init__(self):
+        self.hwnd = 1
+        self.now = 0.0
+
+    # win32gui
+    def GetForegroundWindow(self):
+        return self.hwnd
+
+    def GetWindowText(self, hwnd):
+        return f"window {hwnd}"
+
+    # win32process
+    def GetWindowThreadProcessId(self, hwnd):
+        return 0, 100 + hwnd
+
+    # the source's stop event
+    def wait(self, timeout):
+        self.now += timeout
+        return False
+
+    def set(self):
+        pass
+
+    def clear(self):
+        pass
+
+
+def polling_source(monkeypatch, fake, **kwargs):
+    monkeypatch.setattr(focus, "_win32", lambda: (fake, fake))
+    source = PollingSource(**kwargs)
+    source.clock = lambda: fake.now
+    source._stop = fake
+    source.start()
+    return source
+
+
+def test_polling_backs_off_while_focus_stays(monkeypatch):
+    fake = FakeWin32()
+    source = polling_source(monkeypatch, fake, interval=1.0, backoff=1.5, max_interval=3.0)
+    assert source.wait(10.0) is None
+    # polls at 1, 2.5, 4.75 and 7.75: the delay grows by 1.5x up to 3 s
+    assert source.polls == 4
+    fake.hwnd = 2
+    assert source.wait(10.0) == (10.75, Window(2, 102, ""))
+    # back to the base interval after a change
+    assert source.wait(1.0) is None and source.polls == 6
+
+
+def test_polling_with_titles(monkeypatch):
+    fake = FakeWin32()
+    source = polling_source(monkeypatch, fake, titles=True)
+    assert source.current() == Window(1, 101, "window 1")
+    fake.hwnd = 3
+    assert source.wait(5.0)[1] == Window(3, 103, "window 3")
+
+
+def test_auto_source_falls_back_to_polling(monkeypatch):
+    def fail(self):
+        raise OSError("SetWinEventHook failed")
+
+    monkeypatch.setattr(focus.sys, "platform", "win32")
+    monkeypatch.setattr(WinEventSource, "start", fail)
+    source = default_source("auto", interval=2.0, titles=True)
+    assert isinstance(source, PollingSource)
+    assert source.interval == 2.0 and source.titles
+    # asked for explicitly, the event source is returned as is
+    assert isinstance(default_source("events"), WinEventSource)
+
+
+def test_event_source_start_reports_a_failed_setup():
+    # without Win32 the hook thread fails before installing anything;
+    # start() must raise that instead of waiting forever
+    source = WinEventSource()
+    with pytest.raises(Exception):
+        source.start()
+    assert source._thread is None
@@ -1,71 +1,207 @@
-import time
 import threading
 import csv
 import datetime
+import heapq
+import queue
+import time
+
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from cache import ProcessNameCache
+from focus import FocusSource, Window, default_source
+from store import IntervalLog, window_key
+
+
+class Snapshot(NamedTuple):
+    """The tracker's totals as of `time` (source clock), never modified
+    once published: `base` holds the totals up to the last focus change,
+    and `current` has had focus for `current_seconds` since."""
+
+    time: float
+    base: Mapping[str, float]
+    current: Optional[str]
+    current_seconds: float
+    seq: int  # number of snapshots published before this one
 
-import psutil
-import win32gui
-import win32process
+    def totals(self) -> Dict[str, float]:
+        data = dict(self.base)
+        if self.current is not None:
+            data[self.current] = data.get(self.current, 0.0) + self.current_seconds
+        return data
 
 
 class Tracker:
     """Simple Windows active-window tracker.
 
-    Polls the foreground window at a regular interval and accumulates
-    time spent per process (or per process+title when by_title=True).
+    Accumulates time spent per process (or per process+title when
+    by_title=True). Focus changes come from a `focus.FocusSource`: by
+    default a Win32 event hook, so the tracker sleeps while focus stays
+    put and charges time up to the moment of each change. Totals in
+    `data` are brought up to date every `interval` seconds.
+    Pass source=focus.PollingSource(...) to poll instead, or a
+    focus.ScriptedSource to drive the tracker without Windows.
+
+    With a `store.IntervalLog`, every focus interval is also streamed to
+    disk, and `data` starts from the totals already in the log.
+
+    The sampling thread is the only writer: after every update it
+    publishes an immutable `Snapshot`, and readers (`data`, `snapshot`,
+    `live_stats`, the exports) just pick up the latest one, without
+    locks. Log writes go through a queue to a writer thread, so disk
+    syncs and log queries never delay sampling.
     """
 
-    def __init__(self, interval: float = 1.0, by_title: bool = False):
+    def __init__(self, interval: float = 1.0, by_title: bool = False, source: Optional[FocusSource] = None,
+                 log: Optional[IntervalLog] = None):
         self.interval = float(interval)
         self.by_title = bool(by_title)
+        self.source = source
+        self.log = log
+        self.names = ProcessNameCache()
         self._running = False
-        self.data = {}  # mapping: key -> seconds
-        self._lock = threading.Lock()
+        self._totals = log.totals(self.by_title) if log is not None else {}  # key -> seconds, sampler-owned
+        self._snapshot = Snapshot(0.0, MappingProxyType(dict(self._totals)), None, 0.0, 0)
+        self._publish_seconds = 0.0
+        self._writes = queue.SimpleQueue()
+
+    @property
+    def data(self) -> Dict[str, float]:
+        """Seconds per key, as of the latest snapshot (a copy)."""
+        return self._snapshot.totals()
+
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    def live_stats(self, top_n: int = 5) -> dict:
+        """Summary of the latest snapshot, cheap enough to poll often: it
+        never blocks the sampler."""
+        snap = self._snapshot
+        data = snap.totals()
+        top = heapq.nlargest(top_n, data.items(), key=lambda item: item[1])
+        return {
+            "time": snap.time,
+            "running": self._running,
+            "current": snap.current,
+            "current_seconds": snap.current_seconds,
+            "total_seconds": sum(data.values()),
+            "keys": len(data),
+            "top": [{"app": k, "seconds": v} for k, v in top],
+            "snapshots": snap.seq,
+            "publish_us": self._publish_seconds / snap.seq * 1e6 if snap.seq else 0.0,
+            "cache": self.cache_stats(),
+        }
+
+    def _resolve(self, window: Optional[Window]) -> Tuple[str, str]:
+        """(process name, title) of `window`; the name is "Unknown" if it
+        cannot be found."""
+        if window is None:
+            return "Unknown", ""
+        try:
+            return window.name or self.names.name(window.pid), window.title
+        except Exception:
+            return "Unknown", ""
+
+    def _key(self, app: Tuple[str, str]) -> str:
+        return window_key(*app, self.by_title)
 
     def _get_active_app(self) -> str:
         try:
-            hwnd = win32gui.GetForegroundWindow()
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            proc = psutil.Process(pid)
-            name = proc.name()
-            title = win32gui.GetWindowText(hwnd) or ""
-            if self.by_title:
-                key = f"{name} - {title}"
-            else:
-                key = name
-            return key
+            return self._key(self._resolve(self.source.current()))
         except Exception:
             return "Unknown"
 
+    def cache_stats(self) -> dict:
+        """Hit rate and lookup latency of the process name cache and, if
+        the source caches titles, of its title cache."""
+        stats = {"names": self.names.stats.as_dict()}
+        title_cache = getattr(self.source, "title_cache", None)
+        if title_cache is not None:
+            stats["titles"] = title_cache.stats.as_dict()
+        return stats
+
     def start(self) -> None:
         if self._running:
             return
+        if self.source is None:
+            self.source = default_source(interval=self.interval, titles=self.by_title)
+        self.source.start()
         self._running = True
+        if self.log is not None:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
         self._running = False
+        if self.source is not None:
+            self.source.stop()
         if hasattr(self, "_thread"):
-            self._thread.join(timeout=self.interval * 2)
+            # no timeout: the sampler's last append must be queued before
+            # the writer's stop sentinel (source.stop wakes it promptly)
+            self._thread.join()
+        if getattr(self, "_writer", None) is not None:
+            self._writes.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _publish(self, now: float, base: Mapping[str, float], current: Optional[str], started: float) -> None:
+        t0 = time.perf_counter()
+        seq = self._snapshot.seq + 1
+        self._snapshot = Snapshot(now, base, current, now - started, seq)
+        self._publish_seconds += time.perf_counter() - t0
+
+    def _write_loop(self) -> None:
+        log = self.log
+        while True:
+            item = self._writes.get()
+            if item is None:
+                log.flush()
+                return
+            op, args = item
+            op(log, *args)
 
     def _run_loop(self) -> None:
-        last_time = time.time()
-        last_key = self._get_active_app()
-        while self._running:
-            time.sleep(self.interval)
-            now = time.time()
-            elapsed = now - last_time
-            key = self._get_active_app()
-            with self._lock:
-                self.data[last_key] = self.data.get(last_key, 0.0) + elapsed
-            last_key = key
-            last_time = now
+        source, log, totals = self.source, self.log, self._totals
+        write = self._writes.put
+        started = source.clock()  # when `last` got focus
+        try:
+            last = self._resolve(source.current())
+        except Exception:
+            last = ("Unknown", "")
+        last_key = self._key(last)
+        base = MappingProxyType(dict(totals))
+        self._publish(started, base, last_key, started)
+        now = started
+        while self._running and not source.exhausted:
+            change = source.wait(self.interval)
+            now = source.clock() if change is None else change[0]
+            app = self._resolve(change[1]) if change is not None else last
+            if app == last:
+                if log is not None:
+                    write((IntervalLog.checkpoint, (started, now) + last))
+                self._publish(now, base, last_key, started)
+                continue
+            # focus moved: fold the finished interval into a new base
+            totals[last_key] = totals.get(last_key, 0.0) + (now - started)
+            base = MappingProxyType(dict(totals))
+            if log is not None:
+                write((IntervalLog.append, (started, now) + last))
+            started, last = now, app
+            last_key = self._key(app)
+            self._publish(now, base, last_key, started)
+        totals[last_key] = totals.get(last_key, 0.0) + (now - started)
+        self._publish(now, MappingProxyType(dict(totals)), None, now)
+        if log is not None:
+            write((IntervalLog.append, (started, now) + last))
+        self._running = False
 
     def run_for(self, seconds: float) -> None:
-        """Run tracking for a fixed number of seconds (blocking)."""
+        """Run tracking for a fixed number of seconds (blocking), or until
+        the source runs out."""
         self.start()
-        time.sleep(seconds)
+        self._thread.join(seconds)
         self.stop()
 
     def export_csv(self, path: str) -> None:
@@ -73,8 +209,7 @@ class Tracker:
 
         Columns: app, seconds, hh:mm:ss, percent
         """
-        with self._lock:
-            items = sorted(self.data.items(), key=lambda x: x[1], reverse=True)
+        items = sorted(self.data.items(), key=lambda x: x[1], reverse=True)
         total = sum(v for _, v in items) or 1.0
         with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
@@ -90,8 +225,7 @@ class Tracker:
         """
         import matplotlib.pyplot as plt
 
-        with self._lock:
-            items = sorted(self.data.items(), key=lambda x: x[1], reverse=True)[:top_n]
+        items = heapq.nlargest(top_n, self.data.items(), key=lambda x: x[1])
 
         if not items:
             print("No data to plot.")